@@ -1,4 +1,6 @@
 from .cortex import ML_Brain  # Export the Left Brain
 from .memory import KnowledgeBase  # Export the Right Brain
+from .maintenance import KnowledgeMaintainer  # Export the memory janitor
 from .chat import AresChatbot  # Export the Chatbot
+from .service import ChatService  # Export the shared chat service
 from .base import ClassificationResult, RegressionResult
\ No newline at end of file
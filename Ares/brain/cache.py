@@ -0,0 +1,86 @@
+"""
+召回快取模組
+
+提供 KnowledgeBase.recall 使用的 LRU + TTL 記憶體快取，
+命中時可同時跳過嵌入（embedding）呼叫與向量搜索。
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+def normalize_query(query: str) -> str:
+    """
+    正規化查詢字串，讓大小寫或空白不同的相同問題共用同一個快取項目。
+
+    Args:
+        query: 原始查詢字串
+
+    Returns:
+        str: 去除多餘空白並轉為小寫（casefold）的查詢字串
+    """
+    return " ".join(str(query).split()).casefold()
+
+
+class RecallCache:
+    """
+    執行緒安全的 LRU + TTL 快取
+
+    - 超過 maxsize 時淘汰最久未使用的項目
+    - 超過 ttl 秒的項目視為過期（ttl 為 None 時永不過期）
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = 600.0):
+        """
+        Args:
+            maxsize: 最多保留的項目數量；設為 0 則停用快取
+            ttl: 項目存活秒數；None 表示不依時間過期
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """取得快取值；未命中或已過期時回傳 None。"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """寫入快取值，必要時淘汰最久未使用的項目。"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空所有快取項目（統計數字保留）。"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def stats(self) -> dict:
+        """回傳命中統計：hits、misses、size。"""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data)}
@@ -3,11 +3,18 @@ Ares 聊天機器人模組
 
 整合大腦記憶庫（Hippocampus）與 LLM，實現基於知識庫的問答功能
 """
+import asyncio
 import os
-import re
+import time
+from typing import Iterator
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from Ares.brain.memory import KnowledgeBase
+from Ares.brain.context import ContextBudgeter, estimate_tokens
+from Ares.brain.conversation import Conversation, Turn, extractive_summary
+from Ares.brain.grounding import CitationGrounder
+from Ares.brain.response_cache import ResponseCache
+from Ares.utils.llm_response import extract_text, looks_like_repr
 
 # 載入環境變數
 load_dotenv()
@@ -20,80 +27,465 @@ class AresChatbot:
     使用向量資料庫檢索相關論文，並結合 LLM 生成回答
     """
     
-    def __init__(self):
+    NO_MEMORY_MESSAGE = "我腦中沒有相關記憶，請先派我去 Research 抓取資料。"
+    
+    def __init__(
+        self,
+        response_cache: ResponseCache = None,
+        brain: KnowledgeBase = None,
+        llm=None,
+        context_budget: int = 1500
+    ):
         """
         初始化聊天機器人
         
         - 初始化大腦記憶庫（KnowledgeBase）作為長期記憶
         - 初始化 LLM（ChatGoogleGenerativeAI）作為語音輸出
+        - 初始化語義回應快取（本地 SQLite，重新啟動後仍可沿用）
+        
+        Args:
+            response_cache: 自訂回應快取。預設使用 ./ares_chat_cache.sqlite3。
+            brain: 共用的知識庫實例。預設建立新的 KnowledgeBase。
+            llm: 共用的 LLM 客戶端（需支援 invoke / stream / ainvoke）。預設建立 ChatGoogleGenerativeAI。
+            context_budget: 上下文的 token 預算（本地估算），超出時依問題相關性挑選句子。預設為 1500。
         
         Raises:
-            ValueError: 如果環境變數中缺少 GEMINI_API_KEY。
+            ValueError: 未提供 llm 且環境變數中缺少 GEMINI_API_KEY。
         """
-        # 載入環境變數
-        load_dotenv()
+        if llm is None:
+            # 載入環境變數
+            load_dotenv()
+            
+            # 從環境變數取得 API 金鑰
+            api_key = os.getenv('GEMINI_API_KEY')
+            
+            if not api_key:
+                raise ValueError('錯誤：環境變數中缺少 GEMINI_API_KEY，請在 .env 檔案中設定。')
+            
+            # LLM（語音輸出）
+            # 使用 gemini-flash-latest，與其他模組保持一致
+            llm = ChatGoogleGenerativeAI(
+                model="models/gemini-flash-latest",
+                temperature=0.7,
+                google_api_key=api_key
+            )
+        self.llm = llm
         
-        # 從環境變數取得 API 金鑰
-        api_key = os.getenv('GEMINI_API_KEY')
+        # 大腦記憶庫（長期記憶）
+        self.brain = brain if brain is not None else KnowledgeBase()
         
-        if not api_key:
-            raise ValueError('錯誤：環境變數中缺少 GEMINI_API_KEY，請在 .env 檔案中設定。')
+        # 語義回應快取（換句話說的重複問題直接回傳先前的回答）
+        self.response_cache = response_cache if response_cache is not None else ResponseCache()
         
-        # 大腦記憶庫（長期記憶）
-        self.brain = KnowledgeBase()
-        
-        # LLM（語音輸出）
-        # 使用 gemini-flash-latest，與其他模組保持一致
-        self.llm = ChatGoogleGenerativeAI(
-            model="models/gemini-flash-latest",
-            temperature=0.7,
-            google_api_key=api_key
-        )
+        # 上下文組裝（去除重複段落、控制 token 預算）
+        self.context_budgeter = ContextBudgeter(max_tokens=context_budget)
+    
+    # 串流時先緩衝開頭的字元數，足以判斷並移除不想要的開場白
+    OPENING_BUFFER_CHARS = 24
+    
+    # 不想要的開場白（依序比對，只移除第一個符合者）
+    UNWANTED_PREFIXES = (
+        "我是 Ares，",
+        "我是 Ares ",
+        "Ares 是",
+        "根據我的理解，",
+        "作為一位先進的 AI 研究助理，",
+        "作為 AI 研究助理，",
+    )
     
-    def chat(self, user_query: str, filter_tag: str = None):
+    def chat(self, user_query: str, filter_tag: str = None, conversation: Conversation = None):
         """
         與用戶對話，基於知識庫回答問題
         
         Args:
             user_query: 用戶的問題
             filter_tag: 可選的分類標籤過濾器，用於限制搜索範圍
+            conversation: 可選的對話狀態（見 new_conversation()）。提供時會帶入先前的對話紀錄，
+                          追問同一批論文時沿用上一輪的檢索結果，並在回答後記錄本輪對話。
         
         Returns:
             str: LLM 生成的回答（繁體中文）
         """
-        # 步驟 1: Recall - 從記憶庫中檢索相關論文
-        memories = self.brain.recall(user_query, k=3, filter_tag=filter_tag)
+        return self.chat_with_stats(user_query, filter_tag, conversation)[0]
+    
+    def chat_with_stats(self, user_query: str, filter_tag: str = None, conversation: Conversation = None) -> tuple:
+        """
+        與 chat() 相同，另外回傳本次回答的統計。
+        
+        統計屬於單次呼叫（共用的聊天機器人同時服務多個對話時不會互相覆蓋）；
+        提供 conversation 時也會寫入 conversation.last_stats。
+        
+        Returns:
+            tuple: (回答, 統計)。統計包含 streamed、ttft_s（首個 token 延遲）、total_s（總生成時間）、
+                   cache_hit（是否命中回應快取），以及 prompt_tokens / context_tokens 等估算 token 數；
+                   沒有相關記憶或生成失敗時為空字典。
+        """
+        # 步驟 1: Recall - 從記憶庫中檢索相關論文（並查詢回應快取）
+        memories, cache_key, cached, reused, lookup_s = self._retrieve(user_query, filter_tag, conversation)
         
         # 步驟 2: Context Construction - 構建上下文
         if not memories:
             # 如果沒有找到任何記憶，返回提示訊息
-            return "我腦中沒有相關記憶，請先派我去 Research 抓取資料。"
-        
-        # 將檢索到的文件內容組合成上下文字串，並保存引用資訊
-        context_parts = []
-        references = []  # 用於保存引用資訊
-        
-        for i, doc in enumerate(memories, 1):
-            title = doc.metadata.get('Title', '未知標題')
-            link = doc.metadata.get('Link', '')
-            content = doc.page_content
-            # 將內容分段，以便後續標註具體段落
-            content_lines = content.split('\n')
-            context_parts.append(f"[論文 {i}] {title}\n{content}")
-            
-            # 保存引用資訊
-            references.append({
-                'id': i,
-                'title': title,
-                'link': link,
-                'content': content,
-                'content_lines': content_lines
-            })
+            return self.NO_MEMORY_MESSAGE, self._finish_stats(conversation, {})
+        if cached is not None:
+            self._record_turn(conversation, user_query, cached)
+            return cached, self._finish_stats(conversation, self._cache_hit_stats(lookup_s))
         
-        context_str = "\n\n".join(context_parts)
+        context_str, references, prompt_stats = self._build_context(memories, user_query)
         
         # 步驟 3: Prompting - 創建提示詞
-        prompt = f"""請根據以下檢索到的論文內容直接回答用戶的問題。
+        prompt, prompt_stats = self._prepare_prompt(context_str, user_query, conversation, prompt_stats, reused)
+        
+        # 步驟 4: Generate - 調用 LLM 生成回答
+        try:
+            start = time.perf_counter()
+            response = self.llm.invoke(prompt)
+            elapsed = time.perf_counter() - start
+            stats = {'streamed': False, 'ttft_s': elapsed, 'total_s': elapsed, 'cache_hit': False, **prompt_stats}
+            
+            # 步驟 5: 清理回答並添加參考文獻部分
+            full_response = self._finalize_response(response, references)
+            self._store_response(cache_key, full_response)
+            self._record_turn(conversation, user_query, full_response)
+            return full_response, self._finish_stats(conversation, stats)
+            
+        except Exception as e:
+            # 錯誤處理
+            error_msg = f"生成回答時發生錯誤：{str(e)}"
+            print(f"[警告] {error_msg}")
+            return f"抱歉，處理您的問題時發生錯誤：{str(e)}", self._finish_stats(conversation, {})
+    
+    async def achat(self, user_query: str, filter_tag: str = None, conversation: Conversation = None) -> str:
+        """
+        非同步版本的 chat()，不會阻塞事件迴圈
+        
+        檢索（嵌入呼叫、向量搜索與回應快取查詢）在執行緒池中執行，
+        生成使用 LLM 的原生非同步介面（ainvoke），因此多個對話可在同一事件迴圈中並行。
+        
+        Args:
+            user_query: 用戶的問題
+            filter_tag: 可選的分類標籤過濾器，用於限制搜索範圍
+            conversation: 可選的對話狀態（同 chat()）
+        
+        Returns:
+            str: LLM 生成的回答（繁體中文）
+        """
+        return (await self.achat_with_stats(user_query, filter_tag, conversation))[0]
+    
+    async def achat_with_stats(
+        self, user_query: str, filter_tag: str = None, conversation: Conversation = None
+    ) -> tuple:
+        """非同步版本的 chat_with_stats()，回傳 (回答, 本次回答的統計)。"""
+        memories, cache_key, cached, reused, lookup_s = await asyncio.to_thread(
+            self._retrieve, user_query, filter_tag, conversation
+        )
+        if not memories:
+            return self.NO_MEMORY_MESSAGE, self._finish_stats(conversation, {})
+        if cached is not None:
+            await asyncio.to_thread(self._record_turn, conversation, user_query, cached)
+            return cached, self._finish_stats(conversation, self._cache_hit_stats(lookup_s))
+        
+        context_str, references, prompt_stats = self._build_context(memories, user_query)
+        prompt, prompt_stats = self._prepare_prompt(context_str, user_query, conversation, prompt_stats, reused)
+        
+        try:
+            start = time.perf_counter()
+            response = await self.llm.ainvoke(prompt)
+            elapsed = time.perf_counter() - start
+            stats = {'streamed': False, 'ttft_s': elapsed, 'total_s': elapsed, 'cache_hit': False, **prompt_stats}
+            
+            full_response = self._finalize_response(response, references)
+            await asyncio.to_thread(self._store_response, cache_key, full_response)
+            # 摘要更新可能呼叫 LLM，同樣移到執行緒池
+            await asyncio.to_thread(self._record_turn, conversation, user_query, full_response)
+            return full_response, self._finish_stats(conversation, stats)
+        
+        except Exception as e:
+            error_msg = f"生成回答時發生錯誤：{str(e)}"
+            print(f"[警告] {error_msg}")
+            return f"抱歉，處理您的問題時發生錯誤：{str(e)}", self._finish_stats(conversation, {})
+    
+    def chat_stream(
+        self, user_query: str, filter_tag: str = None, conversation: Conversation = None, stats: dict = None
+    ) -> Iterator[str]:
+        """
+        以串流方式與用戶對話，逐段產出 LLM 生成的文字
+        
+        與 chat() 使用相同的檢索與提示詞；LLM 的 token 一到達就立即產出，
+        生成結束後再產出參考文獻區塊。開頭會先緩衝少量字元以套用開場白清理規則。
+        
+        Args:
+            user_query: 用戶的問題
+            filter_tag: 可選的分類標籤過濾器，用於限制搜索範圍
+            conversation: 可選的對話狀態（同 chat()）
+            stats: 可選的字典，串流結束時填入本次回答的統計（格式同 chat_with_stats()）
+        
+        Yields:
+            str: 回答的文字片段（最後一段為參考文獻區塊，若有引用）
+        """
+        memories, cache_key, cached, reused, lookup_s = self._retrieve(user_query, filter_tag, conversation)
+        if not memories:
+            self._finish_stats(conversation, {}, stats)
+            yield self.NO_MEMORY_MESSAGE
+            return
+        if cached is not None:
+            self._record_turn(conversation, user_query, cached)
+            self._finish_stats(conversation, self._cache_hit_stats(lookup_s), stats)
+            yield cached
+            return
+        
+        context_str, references, prompt_stats = self._build_context(memories, user_query)
+        prompt, prompt_stats = self._prepare_prompt(context_str, user_query, conversation, prompt_stats, reused)
+        
+        start = time.perf_counter()
+        ttft = None
+        parts = []
+        raw_parts = []  # 未經開場白清理的原始片段，用於判斷回應格式是否異常
+        opening = ""
+        opened = False
+        failed = False
+        
+        try:
+            try:
+                for chunk in self.llm.stream(prompt):
+                    text = self._chunk_text(chunk)
+                    if not text:
+                        continue
+                    raw_parts.append(text)
+                    
+                    if opened:
+                        parts.append(text)
+                        yield text
+                        continue
+                    
+                    # 緩衝開頭，直到足以判斷開場白
+                    opening += text
+                    if len(opening) >= self.OPENING_BUFFER_CHARS:
+                        opened = True
+                        ttft = time.perf_counter() - start
+                        # _normalize_opening 會去除尾端空白，需保留給下一個片段銜接
+                        trailing = opening[len(opening.rstrip()):]
+                        opening = self._normalize_opening(opening) + trailing
+                        parts.append(opening)
+                        yield opening
+                
+                if not opened:
+                    opening = self._normalize_opening(opening) if opening.strip() else "抱歉，我無法生成回答。"
+                    ttft = time.perf_counter() - start
+                    parts.append(opening)
+                    yield opening
+            
+            except Exception as e:
+                failed = True
+                error_msg = f"生成回答時發生錯誤：{str(e)}"
+                print(f"[警告] {error_msg}")
+                self._finish_stats(conversation, {}, stats)
+                yield f"抱歉，處理您的問題時發生錯誤：{str(e)}"
+                return
+            
+            self._finish_stats(conversation, {
+                'streamed': True,
+                'ttft_s': ttft,
+                'total_s': time.perf_counter() - start,
+                'cache_hit': False,
+                **prompt_stats
+            }, stats)
+            
+            # 與 chat() 相同的最終檢查；寫入快取的是清理後的回答，之後的 chat() 命中也不會出現技術細節
+            response_text = self._scrub_stream("".join(raw_parts), "".join(parts))
+            reference_section = self._build_reference_section(response_text, references)
+            self._store_response(cache_key, response_text + reference_section)
+            if reference_section:
+                yield reference_section
+        finally:
+            # 放在 finally 中：用戶在串流途中中斷（生成器被關閉）時，已產出的回答仍會記錄到對話中
+            if not failed and parts:
+                self._record_turn(conversation, user_query, self._scrub_stream("".join(raw_parts), "".join(parts)))
+    
+    def _retrieve(self, user_query: str, filter_tag: str = None, conversation: Conversation = None) -> tuple:
+        """
+        從記憶庫檢索相關論文，並查詢回應快取。
+        
+        明確追問上一輪論文的問題（「這篇」、[1] 等）直接沿用對話狀態中的檢索結果；其他問題照常檢索，
+        檢索結果與上一輪的論文大幅重疊時改用上一輪的論文。沿用論文的追問取決於先前內容，不使用回應快取；
+        對話中的新問題本身即為獨立問題，與沒有對話時相同，以問題向量與召回論文 ID 查詢回應快取。
+        
+        Returns:
+            tuple: (memories, cache_key, cached, reused, lookup_s)；不使用回應快取時 cache_key 為 None，
+                   未命中回應快取時 cached 為 None，reused 表示是否沿用上一輪的論文，
+                   lookup_s 為查詢回應快取的秒數
+        """
+        memories, reused = [], False
+        if conversation is not None:
+            version = self.brain.version
+            memories = conversation.reusable_memories(user_query, version, filter_tag)
+            reused = bool(memories)
+        if not memories:
+            memories = self.brain.recall(user_query, k=3, filter_tag=filter_tag)
+            if conversation is not None:
+                previous = conversation.overlapping_memories(memories, version, filter_tag)
+                if previous:
+                    memories, reused = previous, True
+        if not memories:
+            return memories, None, None, False, 0.0
+        
+        if conversation is not None:
+            conversation.remember(memories, version, filter_tag)
+            if reused:
+                return memories, None, None, reused, 0.0
+        
+        cache_key = self._response_cache_key(user_query, memories, filter_tag)
+        start = time.perf_counter()
+        cached = self._lookup_response(cache_key)
+        return memories, cache_key, cached, reused, time.perf_counter() - start
+    
+    def _prepare_prompt(
+        self,
+        context_str: str,
+        user_query: str,
+        conversation: Conversation,
+        prompt_stats: dict,
+        reused: bool
+    ) -> tuple:
+        """建立提示詞（含對話紀錄），並在統計中加入提示詞與對話紀錄的估算 token 數。"""
+        history = conversation.render_history() if conversation is not None else ""
+        prompt = self._build_prompt(context_str, user_query, history)
+        prompt_stats['prompt_tokens'] = estimate_tokens(prompt)
+        prompt_stats['history_tokens'] = estimate_tokens(history)
+        prompt_stats['memories_reused'] = reused
+        return prompt, prompt_stats
+    
+    def _record_turn(self, conversation: Conversation, user_query: str, response: str) -> None:
+        """將成功的一輪對話寫入對話狀態（錯誤訊息不記錄）。"""
+        if conversation is None or not response or response.startswith("抱歉"):
+            return
+        conversation.add_turn(user_query, response)
+    
+    def new_conversation(self, **kwargs) -> Conversation:
+        """
+        建立新的對話狀態，較舊的對話會以 LLM 逐輪併入滾動摘要。
+        
+        Args:
+            **kwargs: 傳給 Conversation 的參數（max_turns、history_budget、summary_budget 等）
+        
+        Returns:
+            Conversation: 新的對話狀態
+        """
+        kwargs.setdefault('summarizer', self._summarize_turn)
+        return Conversation(**kwargs)
+    
+    def _summarize_turn(self, summary: str, turn: Turn, max_tokens: int) -> str:
+        """
+        以 LLM 將被移出的一輪對話併入既有摘要（只處理這一輪，成本固定）。
+        
+        LLM 呼叫失敗時改用不呼叫 LLM 的 extractive_summary。
+        """
+        prompt = f"""請更新以下對話摘要，將新的一輪對話併入，保留討論過的論文、結論與用戶關心的重點。
+請使用繁體中文，摘要不超過 {max_tokens} 字，只輸出摘要本身。
+
+既有摘要：
+{summary or "（無）"}
+
+新的一輪對話：
+{turn.render()}"""
+        try:
+            updated = extract_text(self.llm.invoke(prompt))
+            if updated and not looks_like_repr(updated):
+                return updated
+        except Exception as e:
+            print(f"[警告] 更新對話摘要失敗：{str(e)}")
+        return extractive_summary(summary, turn, max_tokens)
+    
+    def _finalize_response(self, response, references: list) -> str:
+        """從 LLM 回應取出文字、清理開場白與技術細節，並附上參考文獻區塊。"""
+        response_text = extract_text(response)
+        response_text = self._normalize_opening(response_text)
+        response_text = self._scrub_technical_details(response_text)
+        return response_text + self._build_reference_section(response_text, references)
+    
+    def _response_cache_key(self, user_query: str, memories: list, filter_tag: str = None) -> dict:
+        """
+        組成回應快取的查詢條件：查詢向量、召回論文 ID、集合版本與分類過濾條件。
+        
+        查詢向量與 recall 共用 KnowledgeBase 的嵌入快取，不會產生額外的嵌入呼叫。
+        """
+        return {
+            'query': user_query,
+            'embedding': self.brain.embed_query(user_query),
+            'doc_ids': [doc.id or doc.metadata.get('Link', '') for doc in memories],
+            'version': self.brain.version,
+            'filter_tag': filter_tag
+        }
+    
+    def _lookup_response(self, cache_key: dict):
+        """查詢回應快取；命中時回傳回答，否則回傳 None。"""
+        try:
+            return self.response_cache.get(
+                cache_key['embedding'], cache_key['doc_ids'], cache_key['version'], cache_key['filter_tag']
+            )
+        except Exception as e:
+            print(f"[警告] 讀取回應快取失敗：{str(e)}")
+            return None
+    
+    @staticmethod
+    def _cache_hit_stats(lookup_s: float) -> dict:
+        return {'streamed': False, 'ttft_s': lookup_s, 'total_s': lookup_s, 'cache_hit': True}
+    
+    @staticmethod
+    def _finish_stats(conversation: Conversation, stats: dict, target: dict = None) -> dict:
+        """將本次回答的統計寫入呼叫端提供的字典與對話狀態（不存放在共用的聊天機器人上）。"""
+        if target is not None:
+            target.clear()
+            target.update(stats)
+        if conversation is not None:
+            conversation.last_stats = stats
+        return stats
+    
+    def _store_response(self, cache_key: dict, response: str) -> None:
+        """將成功生成的回答寫入回應快取（快取失敗不影響回答）。"""
+        # 錯誤與空回應的預設訊息不寫入快取，下次仍會重新生成
+        if cache_key is None or not response or response.startswith("抱歉"):
+            return
+        try:
+            self.response_cache.put(
+                cache_key['query'], cache_key['embedding'], cache_key['doc_ids'],
+                cache_key['version'], response, cache_key['filter_tag']
+            )
+        except Exception as e:
+            print(f"[警告] 寫入回應快取失敗：{str(e)}")
+    
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        """取出串流片段（AIMessageChunk）中的純文字。"""
+        content = getattr(chunk, 'content', chunk)
+        if isinstance(content, str):
+            return content
+        if isinstance(content, list):
+            return "".join(
+                item if isinstance(item, str) else str(item.get('text') or '')
+                for item in content
+                if isinstance(item, (str, dict))
+            )
+        return str(content or '')
+    
+    def _build_context(self, memories: list, user_query: str = ""):
+        """
+        將檢索到的文件組合成上下文字串，並保存引用資訊
+        
+        近乎重複的段落只保留一份；超出 token 預算時依與問題的相關性挑選句子。
+        
+        Returns:
+            tuple: (上下文字串, 引用資訊列表, 上下文統計)
+        """
+        return self.context_budgeter.assemble(user_query, memories)
+    
+    def _build_prompt(self, context_str: str, user_query: str, history: str = "") -> str:
+        """建立送給 LLM 的提示詞（history 為先前的對話紀錄，有紀錄時才加入）。"""
+        history_section = f"""先前的對話（用於理解追問，事實仍須以上下文為準）：
+{history}
+
+""" if history else ""
+        return f"""請根據以下檢索到的論文內容直接回答用戶的問題。
 
 **回答格式要求：**
 1. 直接回答問題，不要自我介紹或開場白
@@ -106,297 +498,84 @@ class AresChatbot:
 上下文內容（來自記憶庫）：
 {context_str}
 
-問題：{user_query}
+{history_section}問題：{user_query}
 
 請直接回答問題（不要說「我是 Ares」或類似開場白）："""
-        
-        # 步驟 4: Generate - 調用 LLM 生成回答
-        try:
-            response = self.llm.invoke(prompt)
-            
-            # 提取回應內容（只提取純文字，完全忽略技術細節）
-            response_text = None
-            
-            # 情況 1: 回應是列表格式 [{'type': 'text', 'text': '...', 'extras': {...}}]
-            # 這是最常見的格式，優先處理
-            if isinstance(response, list) and len(response) > 0:
-                # 遍歷列表，尋找包含 'text' 的字典
-                for item in response:
-                    if isinstance(item, dict):
-                        # 只提取 'text' 欄位，完全忽略 'extras'、'type' 等其他欄位
-                        text_value = item.get('text')
-                        if text_value is not None:
-                            # 如果 text_value 是字符串，直接使用（這是我們想要的）
-                            if isinstance(text_value, str):
-                                response_text = text_value
-                                break
-                            # 如果 text_value 是其他類型，轉為字符串
-                            elif text_value:
-                                response_text = str(text_value)
-                                break
-                    # 如果列表元素有 content 或 text 屬性
-                    elif hasattr(item, 'content'):
-                        content = item.content
-                        # 如果 content 是字符串，直接使用
-                        if isinstance(content, str):
-                            response_text = content
-                            break
-                        # 如果 content 是列表，遞迴處理
-                        elif isinstance(content, list) and len(content) > 0:
-                            for sub_item in content:
-                                if isinstance(sub_item, dict) and 'text' in sub_item:
-                                    response_text = sub_item['text']
-                                    break
-                            if response_text:
-                                break
-                    elif hasattr(item, 'text'):
-                        text_attr = item.text
-                        if isinstance(text_attr, str):
-                            response_text = text_attr
-                            break
-                
-                # 如果列表處理後仍沒有找到文字，嘗試第一個元素的其他屬性
-                if not response_text and len(response) > 0:
-                    first_item = response[0]
-                    if hasattr(first_item, 'content'):
-                        content = first_item.content
-                        if isinstance(content, str):
-                            response_text = content
-                        elif isinstance(content, list) and len(content) > 0:
-                            for sub_item in content:
-                                if isinstance(sub_item, dict) and 'text' in sub_item:
-                                    response_text = sub_item['text']
-                                    break
-                    elif hasattr(first_item, 'text'):
-                        response_text = first_item.text
-                    # 最後手段：轉為字符串（但這不應該發生）
-                    if not response_text:
-                        response_text = "無法解析回應格式"
-            
-            # 情況 2: 回應有 content 屬性
-            elif hasattr(response, 'content'):
-                content = response.content
-                # 如果 content 是列表，遞迴處理
-                if isinstance(content, list) and len(content) > 0:
-                    for item in content:
-                        if isinstance(item, dict) and 'text' in item:
-                            response_text = item['text']
-                            break
-                        elif isinstance(item, str):
-                            response_text = item
-                            break
-                # 如果 content 是字典，提取 text
-                elif isinstance(content, dict):
-                    response_text = content.get('text')
-                # 如果 content 是字符串，直接使用
-                elif isinstance(content, str):
-                    response_text = content
-                else:
-                    response_text = str(content)
-            
-            # 情況 3: 回應有 text 屬性
-            elif hasattr(response, 'text'):
-                response_text = response.text
-            
-            # 情況 4: 回應是字典格式
-            elif isinstance(response, dict):
-                # 只提取 'text' 欄位，忽略其他所有欄位（包括 'extras'）
-                response_text = response.get('text') or response.get('content')
-            
-            # 情況 5: 回應是字串
-            elif isinstance(response, str):
-                response_text = response
-            
-            # 情況 6: 其他格式，轉為字串
-            else:
-                response_text = str(response)
+    
+    def _normalize_opening(self, response_text: str) -> str:
+        """移除不想要的開場白，並確保回答以「根據…」開頭。"""
+        # 清理回應文字（移除多餘的空白和格式）
+        if response_text:
+            response_text = response_text.strip()
             
-            # 確保是字串類型
-            if not isinstance(response_text, str):
-                response_text = str(response_text)
+            # 移除或替換不想要的開場白
+            for prefix in self.UNWANTED_PREFIXES:
+                if response_text.startswith(prefix):
+                    response_text = response_text[len(prefix):].strip()
+                    break
             
-            # 特殊處理：如果 response_text 看起來像是字典的字符串表示，嘗試提取 text 字段
-            # 這處理類似 {'type': 'text', 'text': '...', 'extras': {...}} 的格式
-            # 但首先檢查是否包含 'extras'，如果包含則說明可能是整個字典的字符串表示
-            if response_text and (
-                "'extras'" in response_text or 
-                '"extras"' in response_text or
-                response_text.strip().startswith("{'type':") or 
-                response_text.strip().startswith('{"type":') or 
-                ("'text'" in response_text and "'extras'" in response_text) or
-                ('"text"' in response_text and '"extras"' in response_text)
-            ):
-                try:
-                    import ast
-                    # 嘗試解析為 Python 字典
-                    parsed_dict = ast.literal_eval(response_text)
-                    if isinstance(parsed_dict, dict) and 'text' in parsed_dict:
-                        response_text = parsed_dict['text']
-                        if not isinstance(response_text, str):
-                            response_text = str(response_text)
-                except (ValueError, SyntaxError):
-                    # 如果 ast.literal_eval 失敗，使用正則提取
-                    import re
-                    # 優先匹配雙引號格式 "text": "..."
-                    pattern1 = r'["\']text["\']\s*:\s*"((?:[^"\\]|\\.|\\n)*)"'
-                    text_match = re.search(pattern1, response_text, re.DOTALL)
-                    
-                    if not text_match:
-                        # 嘗試匹配單引號格式
-                        pattern2 = r'["\']text["\']\s*:\s*\'((?:[^\'\\]|\\.|\\n)*)\''
-                        text_match = re.search(pattern2, response_text, re.DOTALL)
-                    
-                    if not text_match:
-                        # 嘗試更寬鬆的模式（匹配到第一個 'extras' 或結尾）
-                        pattern3 = r'["\']text["\']\s*:\s*["\']((?:[^"\']|\\["\']|\\n)+?)(?:["\']\s*,\s*["\']extras["\']|["\']\s*[,}])'
-                        text_match = re.search(pattern3, response_text, re.DOTALL)
-                    
-                    if text_match:
-                        response_text = text_match.group(1)
-                        # 移除可能的轉義字符
-                        response_text = response_text.replace('\\n', '\n').replace("\\'", "'").replace('\\"', '"')
+            # 如果回答開頭不是「根據…」或「記憶庫中的資料」，添加前綴
+            if not response_text.startswith(("根據", "記憶庫中的資料")):
+                response_text = "根據記憶庫中的資料，" + response_text
+        return response_text
+    
+    def _scrub_technical_details(self, response_text: str) -> str:
+        """最終檢查：確保回答不包含技術細節（如 'extras'、'signature'），並處理空回應。"""
+        if response_text and looks_like_repr(response_text):
+            # extract_text 仍無法取出純文字，代表回應格式異常
+            response_text = "抱歉，無法解析回應格式。"
+        
+        # 如果回應為空，返回預設訊息
+        if not response_text:
+            response_text = "抱歉，我無法生成回答。"
+        return response_text
+    
+    def _scrub_stream(self, raw_text: str, streamed_text: str) -> str:
+        """串流版本的最終檢查：以原始片段判斷格式是否異常（開場白清理會改變開頭），正常時回傳已產出的文字。"""
+        if raw_text and looks_like_repr(raw_text):
+            return self._scrub_technical_details(raw_text)
+        return self._scrub_technical_details(streamed_text)
+    
+    def _build_reference_section(self, response_text: str, references: list) -> str:
+        """
+        解析回答中的引用並生成參考文獻區塊
+        
+        Returns:
+            str: 參考文獻區塊（沒有引用時為空字串）
+        """
+        # 單次掃描回答中的引用（如 [1], [2], [1,2] 等），並在論文的 n-gram 索引中定位來源句子
+        grounder = CitationGrounder([ref['content'] for ref in references])
+        grounded = grounder.ground(response_text, max_spans=2)
+        
+        # 生成參考文獻部分
+        section = ""
+        if grounded:
+            section += "\n\n" + "=" * 60 + "\n"
+            section += "📚 參考文獻與來源段落\n"
+            section += "=" * 60 + "\n\n"
             
-            # 清理回應文字（移除多餘的空白和格式）
-            if response_text:
-                response_text = response_text.strip()
-                
-                # 移除或替換不想要的開場白
-                unwanted_prefixes = [
-                    "我是 Ares，",
-                    "我是 Ares ",
-                    "Ares 是",
-                    "根據我的理解，",
-                    "作為一位先進的 AI 研究助理，",
-                    "作為 AI 研究助理，",
-                ]
+            for ref_id in sorted(grounded):
+                ref = references[ref_id - 1]  # 引用編號從 1 開始
+                section += f"[{ref_id}] {ref['title']}\n"
+                if ref['link']:
+                    section += f"   連結：{ref['link']}\n"
                 
-                for prefix in unwanted_prefixes:
-                    if response_text.startswith(prefix):
-                        response_text = response_text[len(prefix):].strip()
-                        break
-                
-                # 如果回答開頭不是「根據記憶庫」或「根據檢索」，添加前綴
-                if not response_text.startswith(("根據記憶庫", "根據檢索", "根據以下", "記憶庫中的資料")):
-                    # 檢查是否包含「根據」開頭的句子，如果沒有則添加
-                    if not re.match(r'^根據', response_text):
-                        response_text = "根據記憶庫中的資料，" + response_text
-            
-            # 最終檢查：確保 response_text 不包含技術細節（如 'extras'、'signature' 等）
-            if response_text and (
-                "'extras'" in response_text or 
-                '"extras"' in response_text or
-                "'signature'" in response_text or
-                '"signature"' in response_text or
-                response_text.startswith("[{") or
-                response_text.startswith("[{'")
-            ):
-                # 如果仍然包含技術細節，嘗試最後一次提取
-                import re
-                # 嘗試提取最長的純文字段落（不包含字典結構）
-                # 匹配從 'text': '...' 到 'extras' 或結尾的內容
-                pattern = r'["\']text["\']\s*:\s*["\']((?:[^"\']|\\["\']|\\n)+?)(?:["\']\s*,\s*["\']extras["\']|["\']\s*[,}])'
-                text_match = re.search(pattern, response_text, re.DOTALL)
-                if text_match:
-                    response_text = text_match.group(1)
-                    response_text = response_text.replace('\\n', '\n').replace("\\'", "'").replace('\\"', '"').strip()
+                spans = grounded[ref_id]
+                if spans:
+                    section += "   相關段落：\n"
+                    for span in spans:
+                        para = span.text
+                        # 限制段落長度
+                        if len(para) > 300:
+                            para = para[:300] + "..."
+                        section += f"   • {para}\n"
                 else:
-                    # 如果無法提取，返回錯誤訊息
-                    response_text = "抱歉，無法解析回應格式。"
-            
-            # 如果回應為空，返回預設訊息
-            if not response_text or len(response_text) == 0:
-                response_text = "抱歉，我無法生成回答。"
-            
-            # 步驟 5: 添加參考文獻部分
-            # 解析回答中的引用（如 [1], [2], [1,2] 等）
-            import re
-            citation_pattern = r'\[(\d+(?:,\d+)*)\]'
-            citations_found = set()
-            citation_positions = {}  # 記錄每個引用在回答中的位置
-            
-            for match in re.finditer(citation_pattern, response_text):
-                # 提取引用編號（如 "1", "2", "1,2"）
-                citation_ids = match.group(1).split(',')
-                citation_start = match.start()
-                citation_end = match.end()
+                    # 如果找不到相關句子，顯示論文的前 200 字作為預覽
+                    content_preview = ref['content'][:200]
+                    if len(ref['content']) > 200:
+                        content_preview += "..."
+                    section += f"   相關段落：{content_preview}\n"
                 
-                # 找到引用前的句子（最多前 200 字元）
-                context_start = max(0, citation_start - 200)
-                context_text = response_text[context_start:citation_end]
-                
-                for cid in citation_ids:
-                    try:
-                        ref_id = int(cid.strip())
-                        citations_found.add(ref_id)
-                        if ref_id not in citation_positions:
-                            citation_positions[ref_id] = []
-                        citation_positions[ref_id].append(context_text)
-                    except ValueError:
-                        pass
-            
-            # 生成參考文獻部分
-            if citations_found and references:
-                response_text += "\n\n" + "=" * 60 + "\n"
-                response_text += "📚 參考文獻與來源段落\n"
-                response_text += "=" * 60 + "\n\n"
-                
-                for ref_id in sorted(citations_found):
-                    if 1 <= ref_id <= len(references):
-                        ref = references[ref_id - 1]  # 引用編號從 1 開始
-                        response_text += f"[{ref_id}] {ref['title']}\n"
-                        if ref['link']:
-                            response_text += f"   連結：{ref['link']}\n"
-                        
-                        # 找到回答中與此引用相關的內容
-                        if ref_id in citation_positions:
-                            # 從回答的上下文中提取關鍵詞，在論文中找到相關段落
-                            contexts = citation_positions[ref_id]
-                            # 提取關鍵詞（簡單策略：取上下文中的名詞和動詞）
-                            keywords = []
-                            for ctx in contexts:
-                                # 移除引用標記，提取關鍵詞
-                                ctx_clean = re.sub(r'\[\d+(?:,\d+)*\]', '', ctx)
-                                # 提取中文詞彙（2-4 字）
-                                chinese_words = re.findall(r'[\u4e00-\u9fff]{2,4}', ctx_clean)
-                                keywords.extend(chinese_words[:5])  # 每個上下文最多 5 個關鍵詞
-                            
-                            # 在論文中找到包含關鍵詞的段落
-                            relevant_paragraphs = []
-                            content_lines = ref['content_lines']
-                            
-                            for line in content_lines:
-                                if any(keyword in line for keyword in keywords[:3]):  # 只檢查前 3 個關鍵詞
-                                    if len(line.strip()) > 20:  # 只保留有意義的段落
-                                        relevant_paragraphs.append(line.strip())
-                                        if len(relevant_paragraphs) >= 2:  # 最多顯示 2 個段落
-                                            break
-                            
-                            if relevant_paragraphs:
-                                response_text += "   相關段落：\n"
-                                for para in relevant_paragraphs:
-                                    # 限制段落長度
-                                    if len(para) > 300:
-                                        para = para[:300] + "..."
-                                    response_text += f"   • {para}\n"
-                            else:
-                                # 如果找不到相關段落，顯示論文的前 200 字作為預覽
-                                content_preview = ref['content'][:200]
-                                if len(ref['content']) > 200:
-                                    content_preview += "..."
-                                response_text += f"   相關段落：{content_preview}\n"
-                        else:
-                            # 如果沒有找到引用位置，顯示論文的前 200 字
-                            content_preview = ref['content'][:200]
-                            if len(ref['content']) > 200:
-                                content_preview += "..."
-                            response_text += f"   相關段落：{content_preview}\n"
-                        
-                        response_text += "\n"
-            
-            return response_text
-            
-        except Exception as e:
-            # 錯誤處理
-            error_msg = f"生成回答時發生錯誤：{str(e)}"
-            print(f"[警告] {error_msg}")
-            return f"抱歉，處理您的問題時發生錯誤：{str(e)}"
+                section += "\n"
+        
+        return section
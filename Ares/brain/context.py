@@ -0,0 +1,213 @@
+"""
+聊天上下文組裝模組
+
+在送出提示詞之前控制上下文大小，讓 LLM 延遲與成本不會隨 k 或摘要長度線性增加：
+- estimate_tokens：在本地估算 token 數（中文字元約 1 token、英文單字約每 4 字元 1 token）
+- trim_to_tokens：以句子為單位裁切文字到 token 預算內（單句就超出時按字元裁切）
+- 去除近乎重複的段落（特徵集合的 Jaccard 相似度）
+- 超出預算時依與問題的相關性挑選句子，保留原文順序
+"""
+import math
+import re
+from typing import List, Tuple
+
+from .grounding import extract_features, split_sentences
+
+_CJK_CHAR = re.compile(r'[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]')
+_ALNUM_RUN = re.compile(r'[A-Za-z0-9]+')
+_SYMBOL = re.compile(r'[^\sA-Za-z0-9\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]')
+
+# 被略過的句子之間以省略號連接
+_GAP = " … "
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    在本地估算文字的 token 數（不呼叫 API）。
+
+    - 中日韓字元與全形標點：每字約 1 token
+    - 英文單字與數字：每 4 個字元約 1 token（至少 1）
+    - 其他符號：每個約 1 token
+
+    Args:
+        text: 任意文字
+
+    Returns:
+        int: 估算的 token 數
+    """
+    if not text:
+        return 0
+    latin = sum(max(1, math.ceil(len(word) / 4)) for word in _ALNUM_RUN.findall(text))
+    return len(_CJK_CHAR.findall(text)) + latin + len(_SYMBOL.findall(text))
+
+
+def _clip_chars(text: str, max_tokens: int, keep_end: bool = False) -> str:
+    """按字元裁切文字到 token 預算內（二分搜尋最長的開頭或結尾）。"""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        part = text[-middle:] if keep_end else text[:middle]
+        if estimate_tokens(part) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    if not low:
+        return ""
+    return text[-low:] if keep_end else text[:low]
+
+
+def trim_to_tokens(text: str, max_tokens: int, keep_end: bool = False) -> str:
+    """
+    以句子為單位將文字裁切到 token 預算內。
+
+    連第一句（keep_end 時為最後一句）都超出預算時，改為按字元裁切該句，不回傳空字串。
+
+    Args:
+        text: 任意文字
+        max_tokens: token 上限
+        keep_end: 為 True 時保留較新的結尾部分
+
+    Returns:
+        str: 不超過 max_tokens 的文字
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sentences = [text[start:end] for start, end in split_sentences(text, min_chars=1)]
+    if keep_end:
+        sentences.reverse()
+    kept, used = [], 0
+    for sentence in sentences:
+        cost = estimate_tokens(sentence)
+        if used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+    if not kept:
+        return _clip_chars(sentences[0] if sentences else text, max_tokens, keep_end)
+    if keep_end:
+        kept.reverse()
+    return "".join(kept)
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class ContextBudgeter:
+    """
+    上下文預算器 - 將檢索到的論文組成不超過 token 預算的上下文。
+    """
+
+    def __init__(self, max_tokens: int = 1500, dedup_threshold: float = 0.8, min_sentence_chars: int = 8):
+        """
+        Args:
+            max_tokens: 上下文（不含提示詞模板與問題）的 token 預算。預設為 1500。
+            dedup_threshold: 兩段內容的特徵 Jaccard 相似度達到此值時視為重複，只保留排名較前者。
+            min_sentence_chars: 挑選句子時略過少於此長度的片段
+        """
+        self.max_tokens = max_tokens
+        self.dedup_threshold = dedup_threshold
+        self.min_sentence_chars = min_sentence_chars
+
+    def assemble(self, query: str, memories: list) -> Tuple[str, List[dict], dict]:
+        """
+        組裝上下文字串與引用資訊。
+
+        Args:
+            query: 用戶的問題（用於計算句子相關性）
+            memories: recall 回傳的 Document 列表（依相關性排序）
+
+        Returns:
+            tuple: (上下文字串, 引用資訊列表, 統計資訊)
+                引用資訊的 content 為實際放入上下文的文字，引用定位也以此為準；
+                統計資訊包含 context_tokens_raw、context_tokens、duplicates_dropped、compressed。
+        """
+        passages, kept_features = [], []
+        for doc in memories:
+            features = extract_features(doc.page_content)
+            if any(_jaccard(features, kept) >= self.dedup_threshold for kept in kept_features):
+                continue
+            kept_features.append(features)
+            passages.append({
+                'title': doc.metadata.get('Title', '未知標題'),
+                'link': doc.metadata.get('Link', ''),
+                'content': doc.page_content,
+            })
+
+        raw_tokens = sum(self._passage_tokens(i, p['title'], p['content']) for i, p in enumerate(passages, 1))
+        compressed = raw_tokens > self.max_tokens
+        if compressed:
+            passages = self._select_sentences(query, passages)
+
+        context_parts, references = [], []
+        for i, passage in enumerate(passages, 1):
+            context_parts.append(f"[論文 {i}] {passage['title']}\n{passage['content']}")
+            references.append({'id': i, **passage})
+
+        context_str = "\n\n".join(context_parts)
+        stats = {
+            'context_tokens_raw': raw_tokens,
+            'context_tokens': estimate_tokens(context_str),
+            'duplicates_dropped': len(memories) - len(kept_features),
+            'compressed': compressed,
+        }
+        return context_str, references, stats
+
+    @staticmethod
+    def _passage_tokens(index: int, title: str, content: str) -> int:
+        return estimate_tokens(f"[論文 {index}] {title}\n{content}") + 1
+
+    def _select_sentences(self, query: str, passages: list) -> list:
+        """
+        在預算內挑選與問題最相關的句子。
+
+        每個句子以「與問題共有的特徵數 / 問題特徵數」評分，每篇論文的第一句額外加分
+        （通常是結論或摘要），同分時優先排名較前的論文與較前的句子。
+        沒有任何句子入選的論文會從上下文中移除；排名第一的論文一定保留第一句，
+        超出剩餘預算時裁切（至少保留 min_sentence_chars 個 token），避免上下文完全沒有內容。
+        """
+        query_features = extract_features(query)
+        headers = sum(self._passage_tokens(i, p['title'], '') for i, p in enumerate(passages, 1))
+        budget = max(self.max_tokens - headers, 0)
+
+        selected = {}
+        top_content = passages[0]['content'] if passages else ''
+        if top_content:
+            spans = split_sentences(top_content, self.min_sentence_chars)
+            first = top_content[spans[0][0]:spans[0][1]] if spans else top_content
+            if estimate_tokens(first) + 1 > budget:
+                first = trim_to_tokens(first, max(budget - 1, self.min_sentence_chars))
+                print(f"⚠️  [Context] 上下文預算不足，已裁切排名第一的論文：{passages[0]['title']}")
+            selected[0] = [(0, first)]
+            budget = max(budget - estimate_tokens(first) - 1, 0)
+
+        candidates = []
+        for p_idx, passage in enumerate(passages):
+            content = passage['content']
+            for s_idx, (start, end) in enumerate(split_sentences(content, self.min_sentence_chars)):
+                sentence = content[start:end]
+                overlap = len(extract_features(sentence) & query_features) / (len(query_features) or 1)
+                score = overlap + (0.1 if s_idx == 0 else 0.0)
+                candidates.append((-score, p_idx, s_idx, sentence))
+        candidates.sort(key=lambda item: item[:3])
+
+        for _, p_idx, s_idx, sentence in candidates:
+            if p_idx == 0 and s_idx == 0 and 0 in selected:
+                continue
+            cost = estimate_tokens(sentence) + 1
+            if cost <= budget:
+                selected.setdefault(p_idx, []).append((s_idx, sentence))
+                budget -= cost
+
+        compressed = []
+        for p_idx, passage in enumerate(passages):
+            sentences = sorted(selected.get(p_idx, []))
+            if not sentences:
+                continue
+            text = sentences[0][1]
+            for (prev_idx, _), (s_idx, sentence) in zip(sentences, sentences[1:]):
+                text += (" " if s_idx == prev_idx + 1 else _GAP) + sentence
+            compressed.append({**passage, 'content': text})
+        return compressed
@@ -0,0 +1,183 @@
+"""
+多輪對話記憶模組
+
+Conversation 保存一段對話的狀態，讓追問能延續上下文而提示詞大小維持固定：
+- 最近 N 輪對話原文（在 token 預算內）
+- 較舊的對話逐輪併入滾動摘要（每次只摘要被移出的那一輪，不重新摘要整段歷史）
+- 上一輪檢索到的論文：明確指涉先前論文的追問（「這篇」、[1] 等）直接沿用，不重新檢索；
+  其他問題照常檢索，只有檢索結果與上一輪的論文大幅重疊時才沿用上一輪的論文
+"""
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from .context import estimate_tokens, trim_to_tokens
+from .grounding import split_sentences
+
+# 回答中參考文獻區塊的分隔線（只保留回答本文作為對話紀錄）
+_REFERENCE_DIVIDER = "\n\n" + "=" * 60
+
+# 明確指涉先前論文的用語：出現時視為追問。一般代名詞（this、it、這些等）在新問題中也很常見，不納入
+_FOLLOW_UP_PATTERN = re.compile(r'這篇|那篇|此篇|該篇|上述|第[一二三四五六七八九十\d]+篇|\[\d+\]')
+
+
+def _document_key(doc) -> str:
+    return doc.id or doc.metadata.get('Link', '')
+
+
+@dataclass
+class Turn:
+    """一輪對話：用戶問題與 Ares 的回答本文"""
+    user: str
+    assistant: str
+
+    def render(self) -> str:
+        return f"用戶：{self.user}\nAres：{self.assistant}"
+
+
+def strip_references(response: str) -> str:
+    """移除回答尾端的參考文獻區塊。"""
+    return response.split(_REFERENCE_DIVIDER, 1)[0].strip()
+
+
+def extractive_summary(summary: str, turn: Turn, max_tokens: int) -> str:
+    """
+    不呼叫 LLM 的摘要更新：附加該輪問題與回答的第一句，超出預算時捨棄最舊的內容。
+
+    Args:
+        summary: 既有摘要
+        turn: 要併入摘要的對話
+        max_tokens: 摘要的 token 上限
+
+    Returns:
+        str: 更新後的摘要
+    """
+    spans = split_sentences(turn.assistant, min_chars=1)
+    first_sentence = turn.assistant[spans[0][0]:spans[0][1]] if spans else turn.assistant
+    addition = f"用戶問「{turn.user}」，Ares 答：{first_sentence}"
+    if not addition.endswith(("。", "！", "？", ".", "!", "?")):
+        addition += "。"
+    return trim_to_tokens(summary + addition, max_tokens, keep_end=True)
+
+
+class Conversation:
+    """
+    對話狀態 - 最近幾輪原文加上滾動摘要，總長度維持在固定的 token 預算內。
+    """
+
+    def __init__(
+        self,
+        max_turns: int = 4,
+        history_budget: int = 600,
+        summary_budget: int = 200,
+        summarizer: Optional[Callable[[str, Turn, int], str]] = None,
+        reuse_overlap: float = 0.5
+    ):
+        """
+        Args:
+            max_turns: 保留原文的最近對話輪數。預設為 4。
+            history_budget: 摘要加上最近對話的 token 上限。預設為 600。
+            summary_budget: 滾動摘要的 token 上限。預設為 200。
+            summarizer: 摘要更新函式 (既有摘要, 被移出的一輪, token 上限) -> 新摘要。
+                        預設使用不呼叫 LLM 的 extractive_summary。
+            reuse_overlap: 重新檢索的論文有此比例以上屬於上一輪的論文時，視為延續同一批論文的討論。
+        """
+        self.max_turns = max_turns
+        self.history_budget = history_budget
+        self.summary_budget = summary_budget
+        self.summarizer = summarizer or extractive_summary
+        self.reuse_overlap = reuse_overlap
+
+        self.summary = ""
+        self.turns: deque = deque()
+        self.memories: list = []
+        self._memory_ids: set = set()
+        self._memory_key = None
+        # 本對話最近一次回答的統計（由 AresChatbot 寫入；每個對話各自一份，不受其他對話影響）
+        self.last_stats: dict = {}
+        self._lock = threading.Lock()
+
+    @property
+    def has_history(self) -> bool:
+        return bool(self.summary or self.turns)
+
+    def render_history(self) -> str:
+        """回傳要放入提示詞的對話紀錄（摘要 + 最近幾輪），沒有紀錄時為空字串。"""
+        parts = []
+        if self.summary:
+            parts.append(f"先前對話摘要：{self.summary}")
+        parts.extend(turn.render() for turn in self.turns)
+        return "\n\n".join(parts)
+
+    def reusable_memories(self, query: str, version: int, filter_tag: str = None) -> List:
+        """
+        判斷問題是否明確追問上一輪的論文，是的話回傳上一輪檢索到的論文（不必重新檢索）。
+
+        條件：知識庫版本與過濾條件未改變，且問題明確指涉先前的論文（「這篇」、「上述」、「第二篇」、[1] 等）。
+        其他問題應重新檢索，再以 overlapping_memories() 判斷是否延續同一批論文。
+
+        Returns:
+            List: 可沿用的論文；需要重新檢索時為空列表
+        """
+        if not self.memories or self._memory_key != (version, filter_tag):
+            return []
+        if _FOLLOW_UP_PATTERN.search(query):
+            return list(self.memories)
+        return []
+
+    def overlapping_memories(self, recalled: list, version: int, filter_tag: str = None) -> List:
+        """
+        重新檢索的論文與上一輪的論文大幅重疊（至少 reuse_overlap 比例）時，回傳上一輪的論文，
+        讓延續同一主題的問題沿用相同的參考文獻編號。
+
+        Returns:
+            List: 可沿用的論文；檢索到的是另一批論文時為空列表
+        """
+        if not recalled or not self.memories or self._memory_key != (version, filter_tag):
+            return []
+        shared = sum(_document_key(doc) in self._memory_ids for doc in recalled)
+        if shared / len(recalled) >= self.reuse_overlap:
+            return list(self.memories)
+        return []
+
+    def remember(self, memories: list, version: int, filter_tag: str = None) -> None:
+        """記下本輪使用的論文，供下一輪追問沿用。"""
+        self.memories = list(memories)
+        self._memory_key = (version, filter_tag)
+        self._memory_ids = {_document_key(doc) for doc in self.memories}
+
+    def add_turn(self, user_query: str, response: str) -> None:
+        """
+        記錄一輪對話。超過輪數或 token 預算時，將最舊的一輪併入滾動摘要。
+
+        Args:
+            user_query: 用戶的問題
+            response: Ares 的完整回答（參考文獻區塊會被移除）
+        """
+        with self._lock:
+            self.turns.append(Turn(user=user_query, assistant=strip_references(response)))
+            while self.turns and (
+                len(self.turns) > self.max_turns
+                or estimate_tokens(self.render_history()) > self.history_budget
+            ):
+                if len(self.turns) == 1:
+                    # 單輪就超過預算：裁切回答本文，不丟棄最新的一輪
+                    turn = self.turns[0]
+                    budget = max(self.history_budget - self.summary_budget - estimate_tokens(turn.user), 0)
+                    turn.assistant = trim_to_tokens(turn.assistant, budget)
+                    break
+                oldest = self.turns.popleft()
+                self.summary = trim_to_tokens(
+                    self.summarizer(self.summary, oldest, self.summary_budget), self.summary_budget, keep_end=True
+                )
+
+    def clear(self) -> None:
+        """清除對話紀錄與沿用的論文。"""
+        with self._lock:
+            self.summary = ""
+            self.turns.clear()
+            self.memories = []
+            self._memory_ids = set()
+            self._memory_key = None
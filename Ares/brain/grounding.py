@@ -0,0 +1,163 @@
+"""
+引用定位（Citation Grounding）模組
+
+將回答中的引用標記（[1]、[1,2]）對應到檢索論文中的具體句子：
+- 每篇論文只在建立時切句與斷詞一次，並建立 n-gram 反向索引
+- 回答只掃描一次，每個引用的上下文特徵直接查索引累加分數
+- 回傳句子層級的片段（含在原文中的起訖位置），而非整行文字
+"""
+import math
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List
+
+CITATION_PATTERN = re.compile(r'\[(\d+(?:\s*,\s*\d+)*)\]')
+# 句子切分：中英文句號、問號、驚嘆號、分號與換行
+_SENTENCE_PATTERN = re.compile(r'[^。！？!?；;\n]+[。！？!?；;]?')
+_CJK_RUN = re.compile(r'[\u4e00-\u9fff]+')
+_LATIN_WORD = re.compile(r'[A-Za-z][A-Za-z0-9\-]+|\d+(?:\.\d+)?')
+# 上下文回溯到前一個句子邊界或引用標記為止
+_CONTEXT_BOUNDARY = re.compile(r'[。！？!?\n]|\[\d+(?:\s*,\s*\d+)*\]')
+
+_STOPWORDS = frozenset({'the', 'and', 'for', 'with', 'of', 'in', 'to', 'on', 'by', 'an', 'is', 'are', 'we', 'this', 'that'})
+
+
+def extract_features(text: str) -> set:
+    """
+    擷取文字的比對特徵：中文字元 2-gram 與英文單字（小寫）。
+
+    Args:
+        text: 任意文字
+
+    Returns:
+        set: 特徵集合
+    """
+    features = set()
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            features.add(run)
+        features.update(run[i:i + 2] for i in range(len(run) - 1))
+    for word in _LATIN_WORD.findall(text):
+        word = word.lower()
+        if word not in _STOPWORDS:
+            features.add(word)
+    return features
+
+
+def split_sentences(text: str, min_chars: int = 8) -> List[tuple]:
+    """
+    將文字切成句子，回傳每個句子（去除前後空白後）在原文中的 (start, end) 位置。
+
+    Args:
+        text: 任意文字
+        min_chars: 少於此長度的句子會被略過
+
+    Returns:
+        List[tuple]: 依出現順序排列的 (start, end) 列表
+    """
+    spans = []
+    for match in _SENTENCE_PATTERN.finditer(text):
+        sentence = match.group().strip()
+        if len(sentence) < min_chars:
+            continue
+        start = match.start() + match.group().find(sentence)
+        spans.append((start, start + len(sentence)))
+    return spans
+
+
+@dataclass
+class GroundedSpan:
+    """論文中支持某個引用的句子片段"""
+    text: str
+    start: int
+    end: int
+    score: float
+
+
+class CitationGrounder:
+    """
+    引用定位器 - 為每次召回的論文建立小型 n-gram 索引，並為回答中的引用找出來源句子。
+    """
+
+    def __init__(self, contents: List[str], context_chars: int = 200, min_sentence_chars: int = 8):
+        """
+        Args:
+            contents: 依引用編號排列的論文內容（contents[0] 對應 [1]）
+            context_chars: 每個引用往前取的上下文長度上限
+            min_sentence_chars: 句子少於此長度時不列為候選片段
+        """
+        self.contents = contents
+        self.context_chars = context_chars
+        self.sentences: List[List[tuple]] = []  # 每篇論文的 (start, end) 句子位置
+        # 特徵 -> {論文索引: [句子索引]}
+        self.index: Dict[str, Dict[int, List[int]]] = defaultdict(lambda: defaultdict(list))
+
+        for ref_idx, content in enumerate(contents):
+            spans = split_sentences(content, min_sentence_chars)
+            for sentence_idx, (start, end) in enumerate(spans):
+                for feature in extract_features(content[start:end]):
+                    self.index[feature][ref_idx].append(sentence_idx)
+            self.sentences.append(spans)
+
+        total = sum(len(spans) for spans in self.sentences) or 1
+        # 越少句子出現的特徵權重越高（IDF）
+        self.weights = {
+            feature: math.log(1 + total / sum(len(ids) for ids in postings.values()))
+            for feature, postings in self.index.items()
+        }
+
+    def citation_contexts(self, response_text: str) -> Dict[int, List[str]]:
+        """
+        單次掃描回答，回傳每個引用編號對應的上下文文字列表。
+
+        上下文為引用標記之前、到上一個句子邊界或引用標記為止的文字（最多 context_chars 字）。
+        """
+        contexts: Dict[int, List[str]] = {}
+        for match in CITATION_PATTERN.finditer(response_text):
+            window_start = max(0, match.start() - self.context_chars)
+            window = response_text[window_start:match.start()]
+            boundaries = list(_CONTEXT_BOUNDARY.finditer(window.rstrip('。！？!? ')))
+            if boundaries:
+                window = window[boundaries[-1].end():]
+            for cid in match.group(1).split(','):
+                contexts.setdefault(int(cid), []).append(window.strip())
+        return contexts
+
+    def ground(self, response_text: str, max_spans: int = 2) -> Dict[int, List[GroundedSpan]]:
+        """
+        為回答中的每個引用找出最相關的來源句子。
+
+        Args:
+            response_text: LLM 的回答
+            max_spans: 每個引用最多回傳的句子數
+
+        Returns:
+            Dict[int, List[GroundedSpan]]: 引用編號（從 1 開始）-> 依分數排序的句子片段。
+                編號超出論文範圍的引用不會出現；沒有任何重疊特徵時為空列表。
+        """
+        grounded: Dict[int, List[GroundedSpan]] = {}
+        for ref_id, contexts in self.citation_contexts(response_text).items():
+            ref_idx = ref_id - 1
+            if not 0 <= ref_idx < len(self.contents):
+                continue
+
+            scores: Dict[int, float] = defaultdict(float)
+            features = set()
+            for context in contexts:
+                features |= extract_features(context)
+            for feature in features:
+                weight = self.weights.get(feature)
+                if weight is None:
+                    continue
+                for sentence_idx in self.index[feature].get(ref_idx, ()):
+                    scores[sentence_idx] += weight
+
+            best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:max_spans]
+            content = self.contents[ref_idx]
+            grounded[ref_id] = [
+                GroundedSpan(text=content[start:end], start=start, end=end, score=round(score, 4))
+                for sentence_idx, score in best
+                for start, end in [self.sentences[ref_idx][sentence_idx]]
+            ]
+        return grounded
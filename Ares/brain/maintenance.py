@@ -0,0 +1,359 @@
+"""
+知識庫維護模組
+
+提供 ares_knowledge_store 的壓縮、重新索引與冷熱分層：
+- 去除重複向量（同一連結或相同內容只保留一份）
+- 以調整過的 HNSW 參數（M / ef）重建索引
+- 將低分或過舊的論文封存到壓縮的冷儲存層（不參與熱搜索）
+- 回報維護前後的磁碟大小
+"""
+import base64
+import gzip
+import hashlib
+import json
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+
+from .memory import KnowledgeBase
+from .metadata import normalize_metadata, parse_date, parse_score
+
+
+def _directory_size(path: Path) -> int:
+    if not path.exists():
+        return 0
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+class KnowledgeMaintainer:
+    """
+    知識庫維護器 - 負責熱儲存層的去重、封存與重建索引。
+
+    冷儲存層為 gzip 壓縮的 JSONL 檔案（向量以 float16 儲存），
+    不會被 KnowledgeBase.recall 搜索，需要時可透過 restore() 取回。
+    """
+
+    REINDEX_SUFFIX = "_reindex"
+    BACKUP_SUFFIX = "_backup"
+    PAGE_SIZE = 1000
+
+    def __init__(self, kb: KnowledgeBase, cold_directory: str = "./ares_knowledge_cold"):
+        """
+        Args:
+            kb: 要維護的知識庫實例
+            cold_directory: 冷儲存層的目錄。預設為 ./ares_knowledge_cold。
+        """
+        self.kb = kb
+        self.cold_directory = Path(cold_directory)
+
+    @property
+    def collection(self):
+        return self.kb._chroma_collection()
+
+    def size_report(self) -> dict:
+        """回傳目前的熱／冷儲存大小（bytes）與熱儲存中的論文數量。"""
+        return {
+            'documents': self.collection.count(),
+            'hot_bytes': _directory_size(Path(self.kb.persist_directory)),
+            'cold_bytes': _directory_size(self.cold_directory),
+        }
+
+    def _iter_records(self, include_embeddings: bool = False):
+        """分頁讀取集合中的所有記錄，避免一次載入整個資料庫。"""
+        collection = self.collection
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        offset = 0
+        while True:
+            page = collection.get(include=include, limit=self.PAGE_SIZE, offset=offset)
+            ids = page["ids"]
+            if not ids:
+                return
+            embeddings = page["embeddings"] if include_embeddings else [None] * len(ids)
+            for record in zip(ids, page["documents"], page["metadatas"], embeddings):
+                yield record
+            offset += len(ids)
+
+    def dedup(self) -> int:
+        """
+        移除重複的論文向量。
+
+        以 Link 判斷是否為同一篇論文（沒有連結時改用內容雜湊），保留最早寫入的一份。
+
+        Returns:
+            int: 刪除的記錄數量
+        """
+        seen = set()
+        duplicates = []
+        for doc_id, text, metadata, _ in self._iter_records():
+            metadata = metadata or {}
+            key = metadata.get('Link') or hashlib.sha1((text or '').encode('utf-8')).hexdigest()
+            key = (metadata.get('category'), key)
+            if key in seen:
+                duplicates.append(doc_id)
+            else:
+                seen.add(key)
+
+        for start in range(0, len(duplicates), self.PAGE_SIZE):
+            self.collection.delete(ids=duplicates[start:start + self.PAGE_SIZE])
+        if duplicates:
+            self.kb._bump_version()
+        print(f"🧹 [Maintenance] 移除 {len(duplicates)} 筆重複記錄")
+        return len(duplicates)
+
+    @staticmethod
+    def parse_before(before) -> str:
+        """
+        驗證封存日期並轉為 ISO 格式（YYYY-MM-DD），以便與 metadata 中的日期比較。
+
+        Args:
+            before: date 或 ISO 日期字串（例如 "2025-01-01"）
+
+        Raises:
+            ValueError: 日期格式無效時。
+        """
+        if isinstance(before, date):
+            return before.strftime("%Y-%m-%d")
+        try:
+            return datetime.fromisoformat(str(before).strip()).strftime("%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"無效的封存日期：{before!r}（請使用 YYYY-MM-DD）") from None
+
+    def archive(self, min_score: float = None, before: str = None) -> int:
+        """
+        將低分或過舊的論文移到冷儲存層。
+
+        Args:
+            min_score: 評分低於此值的論文會被封存（無法解析評分者不受影響）
+            before: YYYY-MM-DD，日期早於此值的論文會被封存
+
+        Returns:
+            int: 封存的論文數量
+
+        Raises:
+            ValueError: before 不是有效的 ISO 日期時。
+        """
+        if min_score is None and before is None:
+            return 0
+        if before is not None:
+            before = self.parse_before(before)
+
+        selected = []
+        for doc_id, text, metadata, embedding in self._iter_records(include_embeddings=True):
+            metadata = metadata or {}
+            score = parse_score(metadata.get('Score'))
+            iso_date = parse_date(metadata.get('Date'))
+            too_low = min_score is not None and score is not None and score < min_score
+            too_old = before is not None and iso_date is not None and iso_date < before
+            if too_low or too_old:
+                selected.append((doc_id, text, metadata, embedding))
+
+        if not selected:
+            print("🧊 [Maintenance] 沒有符合封存條件的論文")
+            return 0
+
+        self.cold_directory.mkdir(parents=True, exist_ok=True)
+        archive_path = self.cold_directory / f"archive_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl.gz"
+        with gzip.open(archive_path, "wt", encoding="utf-8") as f:
+            for doc_id, text, metadata, embedding in selected:
+                vector = np.asarray(embedding, dtype=np.float16).tobytes()
+                f.write(json.dumps({
+                    'id': doc_id,
+                    'document': text,
+                    'metadata': metadata,
+                    'embedding': base64.b64encode(vector).decode('ascii'),
+                }, ensure_ascii=False) + "\n")
+
+        ids = [record[0] for record in selected]
+        for start in range(0, len(ids), self.PAGE_SIZE):
+            self.collection.delete(ids=ids[start:start + self.PAGE_SIZE])
+        self.kb._bump_version()
+        print(f"🧊 [Maintenance] 已封存 {len(ids)} 篇論文至 {archive_path}")
+        return len(ids)
+
+    def normalize_metadata(self) -> int:
+        """
+        將舊版記錄的 metadata 補正為型別化格式（數字 Score、ISO Date、date_ord）。
+
+        新寫入的論文在 memorize 時已正規化；此方法只用於遷移舊資料，
+        讓評分／日期範圍過濾也能涵蓋這些記錄。
+
+        Returns:
+            int: 更新的記錄數量
+        """
+        ids, metadatas = [], []
+        for doc_id, _, metadata, _ in self._iter_records():
+            metadata = metadata or {}
+            typed = normalize_metadata(metadata, metadata.get('category', 'general'))
+            # 無法解析的欄位設為 None，Chroma 會將其從 metadata 中移除
+            update = {key: typed.get(key) for key in ('Score', 'Date', 'date_ord')}
+            if any(metadata.get(key) != value for key, value in update.items()):
+                ids.append(doc_id)
+                metadatas.append(update)
+
+        for start in range(0, len(ids), self.PAGE_SIZE):
+            self.collection.update(ids=ids[start:start + self.PAGE_SIZE], metadatas=metadatas[start:start + self.PAGE_SIZE])
+        if ids:
+            self.kb._bump_version()
+        print(f"🏷️  [Maintenance] 正規化 {len(ids)} 筆記錄的 metadata")
+        return len(ids)
+
+    def restore(self, archive_path: str) -> int:
+        """
+        將冷儲存檔案中的論文寫回熱儲存層（使用封存時的向量，不重新嵌入）。
+
+        Returns:
+            int: 還原的論文數量
+        """
+        ids, documents, metadatas, embeddings = [], [], [], []
+        with gzip.open(archive_path, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                vector = np.frombuffer(base64.b64decode(record['embedding']), dtype=np.float16)
+                ids.append(record['id'])
+                documents.append(record['document'])
+                metadatas.append(record['metadata'])
+                embeddings.append(vector.astype(np.float32).tolist())
+
+        for start in range(0, len(ids), self.PAGE_SIZE):
+            end = start + self.PAGE_SIZE
+            self.collection.upsert(
+                ids=ids[start:end],
+                documents=documents[start:end],
+                metadatas=metadatas[start:end],
+                embeddings=embeddings[start:end],
+            )
+        if ids:
+            self.kb._bump_version()
+        print(f"♻️  [Maintenance] 已從 {archive_path} 還原 {len(ids)} 篇論文")
+        return len(ids)
+
+    def reindex(self, m: int = 16, ef_construction: int = 200, ef_search: int = 100) -> int:
+        """
+        以新的 HNSW 參數重建索引。
+
+        將所有記錄（含既有向量，不重新嵌入）複製到新集合，再以改名替換：
+        舊集合先改名為備份 → 新集合改名為正式名稱 → 成功後才刪除備份（失敗時改回原名），
+        因此任何一步出錯都不會失去正式的知識庫。舊的 HNSW 區段目錄隨備份一併移除，
+        也能回收刪除記錄所佔的空間。
+
+        注意：只有 self.kb 會重新開啟集合。其他已開啟的 KnowledgeBase 實例
+        （例如儀表板以 st.cache_resource 快取的實例）仍持有舊集合的控制代碼，
+        重建後需重新啟動或重新建立實例才能查詢新集合。
+
+        Args:
+            m: HNSW 每個節點的最大鄰居數（M）
+            ef_construction: 建立索引時的搜尋寬度
+            ef_search: 查詢時的搜尋寬度
+
+        Returns:
+            int: 重建索引的記錄數量
+        """
+        client = self.kb._chroma_client()
+        name = self.kb.COLLECTION_NAME
+        temp_name = name + self.REINDEX_SUFFIX
+
+        try:
+            client.delete_collection(temp_name)
+        except Exception:
+            pass
+        target = client.create_collection(
+            temp_name,
+            configuration={"hnsw": {
+                "space": self.collection.configuration.get("hnsw", {}).get("space", "l2"),
+                "max_neighbors": m,
+                "ef_construction": ef_construction,
+                "ef_search": ef_search,
+            }},
+        )
+
+        batch, copied = [], 0
+        for record in self._iter_records(include_embeddings=True):
+            batch.append(record)
+            if len(batch) >= self.PAGE_SIZE:
+                copied += self._copy_batch(target, batch)
+                batch = []
+        if batch:
+            copied += self._copy_batch(target, batch)
+
+        self._swap_collections(client, name, target)
+        self.kb.vector_db = self.kb._open_collection()
+        self.kb._bump_version()
+        print(f"🔧 [Maintenance] 已以 M={m}, ef_construction={ef_construction}, ef_search={ef_search} 重建 {copied} 筆索引")
+        return copied
+
+    def _swap_collections(self, client, name: str, target) -> None:
+        """以新集合取代正式集合：改名而非先刪除，確保任何時刻都有完整的集合可用。"""
+        backup_name = name + self.BACKUP_SUFFIX
+        try:
+            client.delete_collection(backup_name)
+        except Exception:
+            pass
+        live = client.get_collection(name)
+        live.modify(name=backup_name)
+        try:
+            target.modify(name=name)
+        except Exception:
+            live.modify(name=name)
+            raise
+        try:
+            client.delete_collection(backup_name)
+        except Exception as e:
+            print(f"⚠️  [Maintenance] 無法刪除備份集合 {backup_name}：{str(e)}")
+
+    @staticmethod
+    def _copy_batch(target, batch: list) -> int:
+        ids, documents, metadatas, embeddings = zip(*batch)
+        target.add(
+            ids=list(ids),
+            documents=list(documents),
+            metadatas=[m or {} for m in metadatas],
+            embeddings=[e.tolist() if hasattr(e, "tolist") else list(e) for e in embeddings],
+        )
+        return len(ids)
+
+    def vacuum(self) -> bool:
+        """對 chroma.sqlite3 執行 VACUUM，回收已刪除記錄的頁面。"""
+        db_file = Path(self.kb.persist_directory) / "chroma.sqlite3"
+        if not db_file.exists():
+            return False
+        try:
+            with sqlite3.connect(db_file) as conn:
+                conn.execute("VACUUM")
+            return True
+        except sqlite3.Error as e:
+            print(f"⚠️  [Maintenance] VACUUM 失敗：{str(e)}")
+            return False
+
+    def run(
+        self,
+        dedup: bool = True,
+        min_score: float = None,
+        before: str = None,
+        reindex: bool = True,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 100
+    ) -> dict:
+        """
+        依序執行完整維護流程：metadata 正規化 → 去重 → 封存 → 重建索引 → VACUUM。
+
+        Returns:
+            dict: 包含 'before'、'after' 大小報告與各步驟處理數量
+        """
+        if before is not None:
+            before = self.parse_before(before)  # 在任何修改之前驗證輸入
+        report = {'before': self.size_report()}
+        report['normalized'] = self.normalize_metadata()
+        report['deduplicated'] = self.dedup() if dedup else 0
+        report['archived'] = self.archive(min_score=min_score, before=before)
+        report['reindexed'] = self.reindex(m, ef_construction, ef_search) if reindex else 0
+        self.vacuum()
+        report['after'] = self.size_report()
+
+        before_bytes = report['before']['hot_bytes']
+        after_bytes = report['after']['hot_bytes']
+        print(f"📦 [Maintenance] 熱儲存：{before_bytes / 1024:.1f} KB → {after_bytes / 1024:.1f} KB"
+              f"（冷儲存 {report['after']['cold_bytes'] / 1024:.1f} KB）")
+        return report
@@ -3,44 +3,165 @@ RAG-based Long-Term Memory (Hippocampus) 模組
 使用向量資料庫實現語義搜索功能
 """
 import os
+import json
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 from langchain_chroma import Chroma
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_core.documents import Document
 
+from .cache import RecallCache, normalize_query
+from .metadata import normalize_metadata, build_where
+
 # 載入環境變數
 load_dotenv()
 
 
+def _copy_documents(documents: list) -> list:
+    """複製 Document 列表，避免呼叫端修改結果時污染快取中的內容。"""
+    return [doc.model_copy(deep=True) for doc in documents]
+
+
 class KnowledgeBase:
     """
     知識庫類別，負責論文記憶與語義搜索
     使用 Chroma 向量資料庫和 Google Generative AI Embeddings
     """
     
-    def __init__(self):
+    COLLECTION_NAME = "ares_research_archive"
+    VERSION_FILE = "ares_version.json"
+    
+    def __init__(
+        self,
+        persist_directory: str = "./ares_knowledge_store",
+        embeddings=None,
+        cache_size: int = 128,
+        cache_ttl: float = 600.0,
+        version_check_interval: float = 1.0
+    ):
         """
         初始化知識庫
         - 設定 Google Generative AI Embeddings
         - 初始化 Chroma 向量資料庫
         - 持久化目錄：./ares_knowledge_store（與 ML 記憶路徑分離）
         - Collection 名稱：ares_research_archive
+        - 建立召回快取（以集合版本號失效）
+        
+        Args:
+            persist_directory: 向量資料庫的持久化目錄。預設為 ./ares_knowledge_store。
+            embeddings: 自訂嵌入模型（LangChain Embeddings）。預設使用 Google text-embedding-004。
+            cache_size: 召回快取最多保留的查詢數量，設為 0 則停用快取。預設為 128。
+            cache_ttl: 召回快取項目的存活秒數。預設為 600 秒。
+            version_check_interval: 檢查版本檔是否被其他行程更新的最短間隔（秒）。
+                                    間隔內直接使用記憶體中的版本號，不做檔案 I/O。預設為 1 秒。
         """
         # 初始化嵌入模型
-        self.embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
+        if embeddings is None:
+            embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
+        self.embeddings = embeddings
         
         # 初始化向量資料庫
-        # persist_directory 設為 ./ares_knowledge_store（與 brain_memory/ 分離）
+        # persist_directory 預設為 ./ares_knowledge_store（與 brain_memory/ 分離）
         # collection_name 設為 ares_research_archive
-        self.persist_directory = "./ares_knowledge_store"
-        self.vector_db = Chroma(
+        self.persist_directory = persist_directory
+        self.vector_db = self._open_collection()
+        
+        # 召回快取：key 為 (正規化查詢, k, 過濾條件, 集合版本)
+        self.recall_cache = RecallCache(maxsize=cache_size, ttl=cache_ttl)
+        # 查詢向量快取：與集合版本無關，讓 recall 與聊天回應快取共用同一次嵌入呼叫
+        self.embedding_cache = RecallCache(maxsize=cache_size, ttl=None)
+        self._version = 0
+        self._version_mtime = None
+        self._version_checked_at = None
+        self.version_check_interval = version_check_interval
+        self._load_version()
+    
+    def _open_collection(self) -> Chroma:
+        """開啟（或建立）持久化的 Chroma 集合。"""
+        return Chroma(
             persist_directory=self.persist_directory,
             embedding_function=self.embeddings,
-            collection_name="ares_research_archive"
+            collection_name=self.COLLECTION_NAME
         )
     
+    @property
+    def _version_path(self) -> Path:
+        return Path(self.persist_directory) / self.VERSION_FILE
+    
+    def _load_version(self) -> None:
+        """從版本檔讀取集合版本號（檔案不存在時維持目前的值；只有修改時間改變時才讀取內容）。"""
+        self._version_checked_at = time.monotonic()
+        try:
+            mtime = self._version_path.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._version_mtime:
+            return
+        try:
+            stored = int(json.loads(self._version_path.read_text(encoding='utf-8')).get('version', 0))
+        except (OSError, ValueError, AttributeError):
+            return
+        self._version = max(self._version, stored)
+        self._version_mtime = mtime
+    
+    @property
+    def version(self) -> int:
+        """
+        集合版本號，每次 memorize 或 clear 都會遞增。
+        
+        版本號寫入持久化目錄，因此其他行程（例如 CLI 的 research 流程）
+        寫入資料後，儀表板的快取也會一併失效（最多延遲 version_check_interval 秒）。
+        """
+        checked_at = self._version_checked_at
+        if checked_at is None or time.monotonic() - checked_at >= self.version_check_interval:
+            self._load_version()
+        return self._version
+    
+    def _bump_version(self) -> int:
+        """遞增集合版本號並清空召回快取。"""
+        self._load_version()
+        self._version += 1
+        try:
+            self._version_path.parent.mkdir(parents=True, exist_ok=True)
+            self._version_path.write_text(json.dumps({'version': self._version}), encoding='utf-8')
+            self._version_mtime = self._version_path.stat().st_mtime_ns
+        except OSError as e:
+            print(f"⚠️  [Hippocampus] 無法寫入版本檔：{str(e)}")
+        self.recall_cache.clear()
+        return self._version
+    
+    def _embed_query(self, query: str) -> list:
+        """將查詢字串轉為向量。"""
+        return self.embeddings.embed_query(query)
+    
+    def embed_query(self, query: str) -> list:
+        """
+        將查詢字串轉為向量（同一個查詢只呼叫一次嵌入模型）。
+        
+        Args:
+            query: 查詢字串
+        
+        Returns:
+            list: 查詢向量
+        """
+        key = normalize_query(query)
+        cached = self.embedding_cache.get(key)
+        if cached is not None:
+            return cached
+        embedding = self._embed_query(query)
+        self.embedding_cache.put(key, embedding)
+        return embedding
+    
+    def _embed_queries(self, queries: list) -> list:
+        """以單一批次請求將多個查詢字串轉為向量。"""
+        if isinstance(self.embeddings, GoogleGenerativeAIEmbeddings):
+            # embed_documents 預設使用文件任務類型，查詢需改為 RETRIEVAL_QUERY 才與 embed_query 一致
+            return self.embeddings.embed_documents(queries, task_type="RETRIEVAL_QUERY")
+        return self.embeddings.embed_documents(queries)
+    
     def memorize(self, papers: list, tag: str = "general"):
         """
         將論文列表存入向量資料庫
@@ -61,14 +182,9 @@ class KnowledgeBase:
             # 組合 page_content：Title + TLDR + Innovation
             page_content = f"{paper.get('Title', '')}\n\n{paper.get('TLDR', '')}\n\n{paper.get('Innovation', '')}"
             
-            # 設定 metadata：Title, Link, Score, Date, category
-            metadata = {
-                'Title': paper.get('Title', ''),
-                'Link': paper.get('Link', ''),
-                'Score': paper.get('Score', ''),
-                'Date': paper.get('Date', ''),
-                'category': tag
-            }
+            # 設定 metadata：Title, Link, Score（數字）, Date（ISO）, date_ord, category
+            # 只在寫入時正規化一次，recall 時即可直接下推範圍過濾
+            metadata = normalize_metadata(paper, tag)
             
             # 建立 Document 對象
             doc = Document(page_content=page_content, metadata=metadata)
@@ -76,9 +192,19 @@ class KnowledgeBase:
         
         # 存入向量資料庫
         self.vector_db.add_documents(documents)
+        self._bump_version()
         print(f"🧠 [Hippocampus] stored {len(documents)} papers with tag '{tag}'")
     
-    def recall(self, query: str, k=3, filter_tag: str = None):
+    def recall(
+        self,
+        query: str,
+        k=3,
+        filter_tag: str = None,
+        min_score: float = None,
+        max_score: float = None,
+        since: str = None,
+        until: str = None
+    ):
         """
         從向量資料庫中進行語義搜索，召回最相關的論文
         
@@ -87,24 +213,160 @@ class KnowledgeBase:
             k: 返回最相關的 k 篇論文（預設為 3）
             filter_tag: 分類標籤過濾器。如果提供，只搜索該標籤的論文（如 "AI", "Biology", "PM"）。
                         如果為 None，則搜索整個知識庫（跨領域搜索）。預設為 None。
+            min_score / max_score: 評分範圍（含端點），例如 min_score=7。
+            since / until: 日期範圍（含端點），接受 "2026-01-15" 或 "2026-01"。
         
         Returns:
             最相關的 k 個 Document 對象列表
+        
+        Note:
+            過濾條件會在向量搜索之前套用（Chroma where 子句），因此一定回傳符合條件的前 k 篇。
+            相同的（正規化後）查詢、k 與過濾條件在集合版本未變動前會直接命中快取，
+            同時跳過嵌入呼叫與向量搜索。
         """
-        # 根據 filter_tag 決定是否使用過濾器
-        if filter_tag is not None:
-            # 使用分類標籤過濾器進行搜索
-            results = self.vector_db.similarity_search(
-                query, 
-                k=k, 
-                filter={"category": filter_tag}
-            )
+        where = build_where(filter_tag, min_score, max_score, since, until)
+        cache_key = (normalize_query(query), k, repr(where), self.version)
+        cached = self.recall_cache.get(cache_key)
+        if cached is not None:
+            return _copy_documents(cached)
+        
+        query_embedding = self.embed_query(query)
+        
+        # 有過濾條件時下推到向量搜索；否則搜索整個知識庫（跨領域搜索）
+        if where is not None:
+            results = self.vector_db.similarity_search_by_vector(query_embedding, k=k, filter=where)
         else:
-            # 搜索整個知識庫（跨領域搜索）
-            results = self.vector_db.similarity_search(query, k=k)
+            results = self.vector_db.similarity_search_by_vector(query_embedding, k=k)
         
+        self.recall_cache.put(cache_key, _copy_documents(results))
         return results
     
+    def recall_many(
+        self,
+        queries: list,
+        k=3,
+        filter_tag=None,
+        min_score: float = None,
+        max_score: float = None,
+        since: str = None,
+        until: str = None
+    ) -> list:
+        """
+        批次語義搜索：一次召回多個查詢的最相關論文
+        
+        未命中召回快取的查詢先查詢向量快取（與 recall 共用），其餘只發出一次批次嵌入請求，並依 filter_tag 分組，
+        每組以單一集合查詢完成向量搜索；多個分組時會平行執行。
+        
+        Args:
+            queries: 查詢字串列表
+            k: 每個查詢返回最相關的 k 篇論文（預設為 3）
+            filter_tag: 分類標籤過濾器。可為單一標籤（套用到所有查詢）、None（跨領域搜索），
+                        或與 queries 等長的標籤列表（逐一對應每個查詢）。
+            min_score / max_score / since / until: 與 recall 相同的範圍過濾，套用到所有查詢。
+        
+        Returns:
+            與 queries 順序對齊的列表，每個元素為該查詢的 Document 對象列表
+        """
+        queries = list(queries)
+        if isinstance(filter_tag, (list, tuple)):
+            if len(filter_tag) != len(queries):
+                raise ValueError("filter_tag 列表長度必須與 queries 相同")
+            tags = list(filter_tag)
+        else:
+            tags = [filter_tag] * len(queries)
+        
+        version = self.version
+        results = [None] * len(queries)
+        wheres = {tag: build_where(tag, min_score, max_score, since, until) for tag in set(tags)}
+        
+        # 步驟 1: 查詢快取，並合併批次內重複的查詢
+        pending = {}  # cache_key -> (原始查詢, filter_tag, [結果位置])
+        for i, (query, tag) in enumerate(zip(queries, tags)):
+            cache_key = (normalize_query(query), k, repr(wheres[tag]), version)
+            if cache_key in pending:
+                pending[cache_key][2].append(i)
+                continue
+            cached = self.recall_cache.get(cache_key)
+            if cached is not None:
+                results[i] = _copy_documents(cached)
+            else:
+                pending[cache_key] = (query, tag, [i])
+        
+        if not pending:
+            return results
+        
+        # 步驟 2: 查詢向量快取，未命中的查詢以單一批次嵌入請求補齊
+        keys = list(pending)
+        embeddings = [self.embedding_cache.get(key[0]) for key in keys]
+        missing = [n for n, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            fresh = self._embed_queries([pending[keys[n]][0] for n in missing])
+            for n, embedding in zip(missing, fresh):
+                embeddings[n] = embedding
+                self.embedding_cache.put(keys[n][0], embedding)
+        
+        # 步驟 3: 依 filter_tag 分組，每組一次集合查詢
+        groups = {}
+        for key, embedding in zip(keys, embeddings):
+            groups.setdefault(pending[key][1], []).append((key, embedding))
+        
+        def search_group(tag, items):
+            return tag, self._query_collection([emb for _, emb in items], k, wheres[tag])
+        
+        if len(groups) == 1:
+            group_results = [search_group(tag, items) for tag, items in groups.items()]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(groups), 8)) as executor:
+                group_results = list(executor.map(lambda item: search_group(*item), groups.items()))
+        
+        # 步驟 4: 寫回快取並依原始順序組裝結果
+        for tag, docs_per_query in group_results:
+            for (key, _), docs in zip(groups[tag], docs_per_query):
+                self.recall_cache.put(key, _copy_documents(docs))
+                for i in pending[key][2]:
+                    results[i] = _copy_documents(docs)
+        
+        return results
+    
+    def _chroma_collection(self):
+        """
+        取得底層的 chromadb Collection。
+        
+        langchain_chroma（1.1.0）沒有公開「一次查詢多個向量」與集合維護（分頁讀取、批次更新）的 API，
+        只能透過私有屬性 Chroma._collection；私有 API 的存取集中在此處與 _chroma_client()，升級時只需檢查這裡。
+        """
+        return self.vector_db._collection
+    
+    def _chroma_client(self):
+        """
+        取得底層的 chromadb Client（重建索引時建立、改名與刪除集合使用）。
+        
+        同 _chroma_collection()，langchain_chroma（1.1.0）只能透過私有屬性 Chroma._client 取得。
+        """
+        return self.vector_db._client
+    
+    def _query_collection(self, query_embeddings: list, k: int, where: dict = None) -> list:
+        """
+        以單一集合查詢執行多個向量搜索。
+        
+        Returns:
+            每個查詢向量對應的 Document 對象列表
+        """
+        raw = self._chroma_collection().query(
+            query_embeddings=query_embeddings,
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas"]
+        )
+        
+        batches = []
+        for ids, texts, metadatas in zip(raw["ids"], raw["documents"], raw["metadatas"]):
+            batches.append([
+                Document(id=doc_id, page_content=text or "", metadata=metadata or {})
+                for doc_id, text, metadata in zip(ids, texts, metadatas)
+            ])
+        return batches
+    
     def clear(self):
         """
         清除所有已存儲的論文記憶
@@ -117,6 +379,7 @@ class KnowledgeBase:
             if hasattr(self.vector_db, 'reset_collection'):
                 try:
                     self.vector_db.reset_collection()
+                    self._bump_version()
                     print(f"🧠 [Hippocampus] 已清除所有論文記憶（使用 reset_collection）")
                     return True
                 except Exception as reset_error:
@@ -127,11 +390,8 @@ class KnowledgeBase:
                 try:
                     self.vector_db.delete_collection()
                     # 重新初始化空的資料庫
-                    self.vector_db = Chroma(
-                        persist_directory=self.persist_directory,
-                        embedding_function=self.embeddings,
-                        collection_name="ares_research_archive"
-                    )
+                    self.vector_db = self._open_collection()
+                    self._bump_version()
                     print(f"🧠 [Hippocampus] 已清除所有論文記憶（使用 delete_collection）")
                     return True
                 except Exception as delete_error:
@@ -153,12 +413,10 @@ class KnowledgeBase:
                     shutil.rmtree(db_path)
                     print(f"🧠 [Hippocampus] 已清除所有論文記憶（手動刪除目錄）")
                     
-                    # 重新初始化空的資料庫
-                    self.vector_db = Chroma(
-                        persist_directory=self.persist_directory,
-                        embedding_function=self.embeddings,
-                        collection_name="ares_research_archive"
-                    )
+                    # 重新初始化空的資料庫（版本號沿用記憶體中的值遞增，避免與舊快取衝突）
+                    self.vector_db = self._open_collection()
+                    self._version_mtime = None
+                    self._bump_version()
                     return True
                 else:
                     print(f"ℹ️  [Hippocampus] 資料庫不存在，無需清除")
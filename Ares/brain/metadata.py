@@ -0,0 +1,121 @@
+"""
+論文 metadata 正規化與過濾條件模組
+
+在 memorize 時一次性將 metadata 轉為固定型別（數字評分、ISO 日期、分類），
+讓 recall 能把評分／日期範圍條件直接下推到 Chroma 的 where 過濾，
+不需要多抓 k 筆再後過濾。
+"""
+import re
+from datetime import datetime
+from typing import Optional
+
+# 評分可能是 8、"8"、"8/10"、"評分：8 分" 等格式
+_SCORE_PATTERN = re.compile(r'-?\d+(?:\.\d+)?')
+_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y%m%d", "%Y-%m", "%Y/%m", "%Y")
+
+
+def parse_score(value) -> Optional[float]:
+    """將 LLM 回傳的評分轉為數字，無法解析時回傳 None。"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _SCORE_PATTERN.search(str(value or ''))
+    return float(match.group()) if match else None
+
+
+def parse_date(value) -> Optional[str]:
+    """
+    將日期轉為 ISO 格式（YYYY-MM-DD），只有年月時補為該月 1 日。
+
+    Returns:
+        Optional[str]: ISO 日期字串，無法解析時回傳 None
+    """
+    text = str(value or '').strip()[:10]
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def date_ordinal(iso_date: str) -> int:
+    """將 ISO 日期轉為 YYYYMMDD 整數（Chroma 的範圍運算子只支援數字）。"""
+    return int(iso_date.replace('-', ''))
+
+
+def normalize_metadata(paper: dict, tag: str) -> dict:
+    """
+    建立論文的型別化 metadata。
+
+    - Score：float（無法解析時省略，範圍過濾不會誤選）
+    - Date：ISO 日期字串；date_ord：對應的 YYYYMMDD 整數
+    - category：分類標籤
+
+    Args:
+        paper: memorize 收到的論文字典
+        tag: 分類標籤
+
+    Returns:
+        dict: 可直接寫入 Chroma 的 metadata
+    """
+    metadata = {
+        'Title': paper.get('Title', ''),
+        'Link': paper.get('Link', ''),
+        'category': tag
+    }
+
+    score = parse_score(paper.get('Score'))
+    if score is not None:
+        metadata['Score'] = score
+
+    iso_date = parse_date(paper.get('Date'))
+    if iso_date is not None:
+        metadata['Date'] = iso_date
+        metadata['date_ord'] = date_ordinal(iso_date)
+
+    return metadata
+
+
+def build_where(
+    filter_tag: str = None,
+    min_score: float = None,
+    max_score: float = None,
+    since: str = None,
+    until: str = None
+) -> Optional[dict]:
+    """
+    將過濾條件組成 Chroma where 子句。
+
+    Args:
+        filter_tag: 分類標籤（等值比對）
+        min_score / max_score: 評分範圍（含端點）
+        since / until: 日期範圍（含端點），接受 YYYY-MM-DD 或 YYYY-MM
+
+    Returns:
+        Optional[dict]: where 子句；沒有任何條件時回傳 None
+
+    Raises:
+        ValueError: 日期格式無法解析時。
+    """
+    clauses = []
+    if filter_tag is not None:
+        clauses.append({'category': {'$eq': filter_tag}})
+    if min_score is not None:
+        clauses.append({'Score': {'$gte': float(min_score)}})
+    if max_score is not None:
+        clauses.append({'Score': {'$lte': float(max_score)}})
+    for bound, operator in ((since, '$gte'), (until, '$lte')):
+        if bound is None:
+            continue
+        iso_date = parse_date(bound)
+        if iso_date is None:
+            raise ValueError(f"無法解析日期：{bound}")
+        clauses.append({'date_ord': {operator: date_ordinal(iso_date)}})
+
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {'$and': clauses}
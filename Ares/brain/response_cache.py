@@ -0,0 +1,170 @@
+"""
+語義回應快取模組
+
+放在 AresChatbot.chat 之前的本地 SQLite 快取，讓換句話說的重複問題
+不必再次呼叫 LLM：
+- 快取鍵：查詢向量 + 召回論文的 ID + 集合版本號（+ 分類過濾條件）
+- 只有召回結果與集合版本完全相同、且查詢向量的餘弦相似度達到門檻時才命中
+- 超過存活時間的項目會被清除，超過容量時淘汰最久未使用的項目（LRU）
+
+資料寫入本地檔案，因此 Streamlit 重新啟動後仍可沿用。
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+
+def _documents_key(doc_ids: list, filter_tag: Optional[str]) -> str:
+    """將召回論文的 ID（排序後）與分類過濾條件組成固定長度的雜湊鍵。"""
+    raw = "\x1f".join(sorted(str(doc_id) for doc_id in doc_ids)) + "\x1e" + (filter_tag or "")
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _as_unit_vector(embedding) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class ResponseCache:
+    """
+    語義回應快取 - 以查詢向量相似度命中先前生成的回答。
+
+    候選項目先以 (召回論文雜湊, 集合版本) 精確篩選，通常只剩少數幾筆，
+    再以餘弦相似度比對查詢向量，因此查詢成本與快取大小幾乎無關。
+    """
+
+    def __init__(
+        self,
+        path: str = "./ares_chat_cache.sqlite3",
+        threshold: float = 0.95,
+        max_entries: int = 500,
+        ttl: Optional[float] = 7 * 24 * 3600
+    ):
+        """
+        Args:
+            path: SQLite 檔案路徑。預設為 ./ares_chat_cache.sqlite3。
+            threshold: 命中所需的最低餘弦相似度（0–1）。預設為 0.95。
+            max_entries: 最多保留的回答數量，超過時淘汰最久未使用者；設為 0 則停用快取。
+            ttl: 項目存活秒數；None 表示不依時間過期。預設為 7 天。
+        """
+        self.path = Path(path)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Streamlit 會在不同執行緒中重新執行腳本，因此共用連線並以鎖保護
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    docs_key TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    query TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_key ON responses (docs_key, version)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_used ON responses (last_used)")
+
+    def get(self, embedding, doc_ids: list, version: int, filter_tag: str = None) -> Optional[str]:
+        """
+        查詢快取的回答。
+
+        Args:
+            embedding: 查詢向量
+            doc_ids: 本次召回的論文 ID
+            version: 知識庫集合版本號
+            filter_tag: 分類過濾條件
+
+        Returns:
+            Optional[str]: 命中時回傳先前的完整回答（含參考文獻），否則為 None
+        """
+        if self.max_entries <= 0:
+            return None
+
+        query_vector = _as_unit_vector(embedding)
+        docs_key = _documents_key(doc_ids, filter_tag)
+        now = time.time()
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, embedding, response, created_at FROM responses WHERE docs_key = ? AND version = ?",
+                (docs_key, version)
+            ).fetchall()
+
+            best_id, best_response, best_similarity = None, None, self.threshold
+            for row_id, blob, response, created_at in rows:
+                if self.ttl is not None and now - created_at > self.ttl:
+                    continue
+                cached_vector = np.frombuffer(blob, dtype=np.float32)
+                if cached_vector.shape != query_vector.shape:
+                    continue
+                similarity = float(np.dot(query_vector, cached_vector))
+                if similarity >= best_similarity:
+                    best_id, best_response, best_similarity = row_id, response, similarity
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            with self._conn:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE id = ?", (now, best_id))
+            self.hits += 1
+            return best_response
+
+    def put(self, query: str, embedding, doc_ids: list, version: int, response: str, filter_tag: str = None) -> None:
+        """寫入回答，並清除過期項目、淘汰超出容量的最久未使用項目。"""
+        if self.max_entries <= 0:
+            return
+
+        blob = _as_unit_vector(embedding).tobytes()
+        docs_key = _documents_key(doc_ids, filter_tag)
+        now = time.time()
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO responses (docs_key, version, query, embedding, response, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (docs_key, version, query, blob, response, now, now)
+            )
+            # 舊版本的項目永遠不會再命中，一併清除
+            self._conn.execute("DELETE FROM responses WHERE version < ?", (version,))
+            if self.ttl is not None:
+                self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE id IN ("
+                "SELECT id FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self) -> None:
+        """清空所有快取的回答（統計數字保留）。"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @property
+    def stats(self) -> dict:
+        """回傳命中統計：hits、misses、size。"""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self)}
+
+    def close(self) -> None:
+        self._conn.close()
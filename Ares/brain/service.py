@@ -0,0 +1,105 @@
+"""
+Ares 聊天服務模組
+
+讓所有對話（瀏覽器分頁、CLI、批次請求）共用同一組重量級資源：
+- 一個 KnowledgeBase（單一 Chroma 客戶端與嵌入客戶端）
+- 一個 LLM 客戶端（內部連線池由所有對話共用）
+- 一個語義回應快取
+
+非同步介面 achat() 以信號量限制同時進行的 LLM 呼叫數量，
+檢索在執行緒池中執行，不會阻塞事件迴圈。
+"""
+import asyncio
+import threading
+import time
+import weakref
+from typing import Iterator, List
+
+from Ares.brain.chat import AresChatbot
+from Ares.brain.conversation import Conversation
+
+
+class ChatService:
+    """
+    共用的聊天服務 - 以單一 AresChatbot 服務多個並行的對話。
+    """
+
+    def __init__(self, chatbot: AresChatbot = None, max_concurrency: int = 8):
+        """
+        Args:
+            chatbot: 共用的聊天機器人。預設建立新的 AresChatbot（需要 GEMINI_API_KEY）。
+            max_concurrency: 同時進行的 achat 請求上限。預設為 8。
+        """
+        self.chatbot = chatbot if chatbot is not None else AresChatbot()
+        self.max_concurrency = max_concurrency
+        # asyncio.Semaphore 綁定建立時的事件迴圈，因此每個事件迴圈各自建立一個
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+            return semaphore
+
+    async def achat(self, user_query: str, filter_tag: str = None, conversation: Conversation = None) -> str:
+        """
+        非同步回答單一問題（超過 max_concurrency 時排隊等候）。
+
+        Args:
+            user_query: 用戶的問題
+            filter_tag: 可選的分類標籤過濾器
+            conversation: 可選的對話狀態（每個對話各自一個，見 new_conversation()）
+
+        Returns:
+            str: 回答文字（含參考文獻區塊）
+        """
+        return (await self.achat_with_stats(user_query, filter_tag=filter_tag, conversation=conversation))[0]
+
+    async def achat_with_stats(
+        self, user_query: str, filter_tag: str = None, conversation: Conversation = None
+    ) -> tuple:
+        """
+        與 achat() 相同，另外回傳本次請求的統計（TTFT、提示詞大小等，每個請求各自一份）。
+
+        Returns:
+            tuple: (回答文字, 統計字典)
+        """
+        async with self._semaphore():
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                return await self.chatbot.achat_with_stats(user_query, filter_tag=filter_tag, conversation=conversation)
+            finally:
+                self.in_flight -= 1
+                self.requests += 1
+                self.total_seconds += time.perf_counter() - start
+
+    async def achat_many(self, queries: List[str], filter_tag: str = None) -> List[str]:
+        """並行回答多個問題，回傳與 queries 順序對齊的回答列表。"""
+        return list(await asyncio.gather(*(self.achat(query, filter_tag=filter_tag) for query in queries)))
+
+    def chat_stream(
+        self, user_query: str, filter_tag: str = None, conversation: Conversation = None, stats: dict = None
+    ) -> Iterator[str]:
+        """同步串流介面（供 Streamlit 使用），直接委派給共用的聊天機器人；stats 於串流結束時填入本次統計。"""
+        return self.chatbot.chat_stream(user_query, filter_tag=filter_tag, conversation=conversation, stats=stats)
+
+    def new_conversation(self, **kwargs) -> Conversation:
+        """建立新的對話狀態（對話狀態屬於單一對話，不在 session 之間共用）。"""
+        return self.chatbot.new_conversation(**kwargs)
+
+    @property
+    def stats(self) -> dict:
+        """回傳服務統計：requests、in_flight、avg_latency_s 與回應快取命中情況。"""
+        return {
+            'requests': self.requests,
+            'in_flight': self.in_flight,
+            'avg_latency_s': self.total_seconds / self.requests if self.requests else 0.0,
+            'response_cache': self.chatbot.response_cache.stats,
+        }
@@ -7,7 +7,8 @@
 from .scout import ResearchScout, PubMedScout
 from .editor import ResearchEditor
 from .daily_brief import ResearchPublisher
+from .review_cache import ReviewCache
 from .manager import ResearchPipeline
 
 
-__all__ = ["ResearchScout", "PubMedScout", "ResearchEditor", "ResearchPublisher", "ResearchPipeline"]
+__all__ = ["ResearchScout", "PubMedScout", "ResearchEditor", "ResearchPublisher", "ResearchPipeline", "ReviewCache"]
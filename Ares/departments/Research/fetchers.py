@@ -0,0 +1,643 @@
+"""
+PubMed 抓取後端模組
+
+PubMedScout 透過可替換的抓取後端取得論文：
+- EUtilsFetcher：直接呼叫 NCBI E-utilities（ESearch / EFetch XML），使用連線池化的 HTTP session，
+  每次 EFetch 最多批次取得 200 篇，不需啟動瀏覽器
+- SeleniumFetcher：原本的瀏覽器自動化流程，作為 E-utilities 無法使用時的備援（瀏覽器延遲啟動）
+
+所有後端回傳相同格式的論文字典：title、link、snippet，以及可取得時的 pmid、date。
+"""
+
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from Ares.spider.cache import PageCache, cache_key
+from Ares.spider.core import page_transfer_bytes
+from Ares.spider.pool import DriverPool, shared_pool
+from Ares.spider.resilience import CircuitBreakerRegistry, RetryPolicy, circuit_breakers, resilient
+from Ares.spider.waits import WaitStrategy
+from Ares.utils.throttle import HostRateLimiter
+
+from .parsing import NO_ABSTRACT, PUBMED_URL, SNIPPET_MAX_CHARS, extract_abstract, parse_search_results
+
+
+_MONTHS = {name: i for i, name in enumerate(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], 1)}
+_YEAR_PATTERN = re.compile(r'\d{4}')
+# 與 setup_driver 相同的瀏覽器識別字串
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0 Safari/537.36"
+
+
+def format_entrez_date(value: Union[str, date, datetime]) -> str:
+    """
+    將日期轉為 E-utilities 的 YYYY/MM/DD 格式。
+
+    Args:
+        value: date / datetime，或 "YYYY-MM-DD"、"YYYY/MM/DD"、"YYYY/MM"、"YYYY" 字串
+
+    Raises:
+        ValueError: 字串格式無法辨識時。
+    """
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y/%m/%d")
+    text = str(value).strip().replace("-", "/")
+    if not re.fullmatch(r"\d{4}(/\d{1,2}){0,2}", text):
+        raise ValueError(f"無法辨識的日期：{value}（請使用 YYYY-MM-DD）")
+    return text
+
+
+def pubmed_link(pmid: str) -> str:
+    """回傳 PMID 對應的 PubMed 論文頁面網址。"""
+    return f"{PUBMED_URL}/{pmid}/"
+
+
+def _element_text(elem: Optional[ET.Element]) -> str:
+    """取出元素（含 <i>、<sup> 等行內標記）的完整文字。"""
+    if elem is None:
+        return ""
+    return " ".join("".join(elem.itertext()).split())
+
+
+def _parse_pub_date(article: ET.Element) -> str:
+    """
+    從 PubDate（或 ArticleDate）取出出版日期。
+
+    Returns:
+        str: YYYY-MM-DD、YYYY-MM 或 YYYY；無法取得時為空字串
+    """
+    pub_date = article.find("Journal/JournalIssue/PubDate")
+    if pub_date is None or pub_date.find("Year") is None:
+        medline_date = pub_date.findtext("MedlineDate") if pub_date is not None else None
+        if medline_date:
+            year = _YEAR_PATTERN.search(medline_date)
+            month = _MONTHS.get(medline_date[5:8]) if year else None
+            if year and month:
+                return f"{year.group()}-{month:02d}"
+            return year.group() if year else ""
+        pub_date = article.find("ArticleDate")
+        if pub_date is None:
+            return ""
+
+    year = pub_date.findtext("Year", "")
+    month_text = pub_date.findtext("Month", "")
+    month = _MONTHS.get(month_text[:3]) or (int(month_text) if month_text.isdigit() else None)
+    day = pub_date.findtext("Day", "")
+    if not month:
+        return year
+    if not day.isdigit():
+        return f"{year}-{month:02d}"
+    return f"{year}-{month:02d}-{int(day):02d}"
+
+
+def parse_efetch_xml(content: bytes) -> List[Dict[str, str]]:
+    """
+    解析 EFetch 回傳的 PubmedArticleSet XML。
+
+    結構化摘要（BACKGROUND / METHODS …）會以「標籤: 內容」的形式串接。
+
+    Args:
+        content: EFetch 回應內容
+
+    Returns:
+        List[Dict[str, str]]: 論文字典列表（title、link、snippet、pmid、date）
+    """
+    papers = []
+    for article_elem in ET.fromstring(content).iter("PubmedArticle"):
+        citation = article_elem.find("MedlineCitation")
+        if citation is None:
+            continue
+        pmid = citation.findtext("PMID", "").strip()
+        article = citation.find("Article")
+        if not pmid or article is None:
+            continue
+
+        sections = []
+        for abstract_text in article.findall("Abstract/AbstractText"):
+            text = _element_text(abstract_text)
+            label = abstract_text.get("Label")
+            if text:
+                sections.append(f"{label.capitalize()}: {text}" if label else text)
+        snippet = " ".join(sections)[:SNIPPET_MAX_CHARS] or NO_ABSTRACT
+
+        papers.append({
+            'title': _element_text(article.find("ArticleTitle")) or "無標題",
+            'link': pubmed_link(pmid),
+            'snippet': snippet,
+            'pmid': pmid,
+            'date': _parse_pub_date(article),
+        })
+    return papers
+
+
+def parse_esearch_xml(content: bytes) -> Tuple[List[str], int]:
+    """
+    解析 ESearch 回傳的 XML。
+
+    Returns:
+        Tuple[List[str], int]: (PMID 列表, 符合條件的總筆數)
+
+    Raises:
+        RuntimeError: 回應包含 ERROR 元素時。
+    """
+    root = ET.fromstring(content)
+    error = root.findtext("ERROR")
+    if error:
+        raise RuntimeError(f"ESearch 錯誤：{error}")
+    ids = [elem.text.strip() for elem in root.findall("IdList/Id") if elem.text]
+    return ids, int(root.findtext("Count", "0") or 0)
+
+
+class PaperFetcher:
+    """抓取後端的共同介面。"""
+
+    name = "base"
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, str]]:
+        raise NotImplementedError
+
+    def iter_search(
+        self, query: str, limit: Optional[int] = None, page_size: int = 100, since=None
+    ) -> Iterator[Dict[str, str]]:
+        """
+        逐篇產生搜尋結果。預設實作不分頁：只呼叫一次 search()（limit 未指定時取 page_size 篇），
+        不會再往後抓取；支援分頁的後端（例如 EUtilsFetcher）應覆寫此方法。
+
+        since 在本地依 'date' 欄位過濾；沒有日期的論文無法判斷是否符合條件，因此一律排除並印出警告
+        （例如 Selenium 後端的結果沒有日期，指定 since 時不會產生任何論文）。
+        """
+        papers = self.search(query, limit=limit or page_size)
+        cutoff = format_entrez_date(since).replace("/", "-") if since else None
+        undated = 0
+        for paper in papers:
+            if cutoff:
+                if not paper.get('date'):
+                    undated += 1
+                    continue
+                if paper['date'] < cutoff[:len(paper['date'])]:
+                    continue
+            yield paper
+        if undated:
+            print(f"[警告] {self.name} 有 {undated} 篇論文沒有日期，無法套用 since={since}，已排除")
+
+    def close(self) -> None:
+        """釋放後端持有的資源（連線、瀏覽器）。"""
+
+
+class EUtilsFetcher(PaperFetcher):
+    """
+    NCBI E-utilities 抓取後端 - 以 ESearch 取得 PMID，再以 EFetch 批次取得標題與摘要。
+
+    使用單一 requests.Session（連線池化、keep-alive），每次 EFetch 最多 200 個 PMID。
+    設定環境變數 NCBI_API_KEY 可提高 NCBI 的速率上限。
+    """
+
+    name = "eutils"
+    BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+    MAX_BATCH_SIZE = 200
+
+    def __init__(
+        self,
+        base_url: str = None,
+        api_key: str = None,
+        batch_size: int = MAX_BATCH_SIZE,
+        timeout: float = 15.0,
+        pool_size: int = 10,
+        tool: str = "ares",
+        email: str = None,
+        rate_limiter: HostRateLimiter = None,
+        retry_policy: RetryPolicy = None,
+        breakers: CircuitBreakerRegistry = None,
+        cache: PageCache = None
+    ):
+        """
+        Args:
+            base_url: E-utilities 根網址（測試時可指向本地 stub 伺服器）。預設為 NCBI 正式網址。
+            api_key: NCBI API 金鑰。預設讀取環境變數 NCBI_API_KEY。
+            batch_size: 每次 EFetch 的 PMID 數量（最多 200）。
+            timeout: 單次請求逾時秒數。
+            pool_size: 連線池大小。
+            tool / email: NCBI 建議附上的工具名稱與聯絡信箱。
+            rate_limiter: 共用的主機速率限制器。預設依 NCBI 規定：有 API 金鑰每秒 10 次，否則每秒 3 次。
+            retry_policy: 暫時性錯誤（連線、逾時、429、5xx）的重試策略。預設最多 3 次、指數退避。
+            breakers: 主機斷路器。預設為行程共用的 circuit_breakers；NCBI 故障時直接失敗並改用備援後端。
+            cache: 頁面快取。提供時 ESearch 結果以 ETag / Last-Modified 驗證沿用，
+                   EFetch 依 PMID 快取，只下載尚未快取的論文。預設不快取。
+        """
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self.api_key = api_key if api_key is not None else os.getenv("NCBI_API_KEY")
+        self.batch_size = max(1, min(batch_size, self.MAX_BATCH_SIZE))
+        self.timeout = timeout
+        self.tool = tool
+        self.email = email if email is not None else os.getenv("NCBI_EMAIL")
+        self.rate_limiter = rate_limiter or HostRateLimiter(default_rate=10.0 if self.api_key else 3.0)
+        self.cache = cache
+        self._send = resilient(
+            policy=retry_policy or RetryPolicy(max_attempts=3, base_delay=0.5),
+            host=self.base_url,
+            breakers=breakers or circuit_breakers
+        )(self._send_once)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _params(self, **params) -> dict:
+        params = {'db': 'pubmed', 'tool': self.tool, **params}
+        if self.api_key:
+            params['api_key'] = self.api_key
+        if self.email:
+            params['email'] = self.email
+        return params
+
+    def _request(self, endpoint: str, params: dict, post: bool = False, kind: str = None) -> bytes:
+        """
+        送出請求（暫時性錯誤依 retry_policy 重試，主機故障時斷路器直接拒絕）。
+
+        Args:
+            kind: 頁面快取類型；有設定快取且提供 kind 時經由快取取得。
+        """
+        url = f"{self.base_url}/{endpoint}"
+        if self.cache is not None and kind:
+            return self.cache.fetch(cache_key(url, params), kind, lambda headers: self._send(url, params, post, headers))
+        response = self._send(url, params, post)
+        response.raise_for_status()
+        return response.content
+
+    def _send_once(self, url: str, params: dict, post: bool, headers: dict = None) -> requests.Response:
+        self.rate_limiter.acquire(url)
+        if post:
+            response = self.session.post(url, data=params, headers=headers, timeout=self.timeout)
+        else:
+            response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def esearch(
+        self, query: str, retmax: int = 20, retstart: int = 0, since=None, datetype: str = "edat"
+    ) -> Tuple[List[str], int]:
+        """
+        以 ESearch 搜尋 PMID（依相關性排序，與 PubMed 網站的 Best match 相同）。
+
+        Args:
+            since: 只搜尋此日期（含）之後的論文
+            datetype: since 比對的日期類型。預設 "edat"（收錄進 PubMed 的日期，適合每日增量抓取）；
+                      "pdat" 為出版日期。
+
+        Returns:
+            Tuple[List[str], int]: (PMID 列表, 符合條件的總筆數)
+        """
+        params = dict(term=query, retmax=retmax, retstart=retstart, sort="relevance")
+        if since:
+            # ESearch 的日期範圍必須同時提供 mindate 與 maxdate
+            params.update(datetype=datetype, mindate=format_entrez_date(since), maxdate="3000")
+        content = self._request("esearch.fcgi", self._params(**params), kind="search")
+        return parse_esearch_xml(content)
+
+    def efetch(self, pmids: List[str]) -> List[Dict[str, str]]:
+        """
+        以 EFetch 批次取得論文的標題、摘要與出版日期（每批最多 batch_size 個 PMID）。
+
+        Returns:
+            List[Dict[str, str]]: 依 pmids 順序排列的論文字典（查無資料的 PMID 會被略過）
+        """
+        papers = {}
+        if self.cache is not None:
+            for pmid in pmids:
+                cached = self.cache.get_fresh(f"pubmed:{pmid}")
+                if cached is not None:
+                    papers[pmid] = json.loads(cached)
+        missing = [pmid for pmid in pmids if pmid not in papers]
+
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            # 大量 ID 使用 POST，避免網址過長
+            content = self._request("efetch.fcgi", self._params(id=",".join(batch), retmode="xml"), post=True)
+            for paper in parse_efetch_xml(content):
+                papers[paper['pmid']] = paper
+                if self.cache is not None:
+                    self.cache.put(f"pubmed:{paper['pmid']}", json.dumps(paper, ensure_ascii=False).encode("utf-8"), kind="paper")
+        return [papers[pmid] for pmid in pmids if pmid in papers]
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, str]]:
+        """搜尋論文並取得前 limit 篇的標題與摘要。"""
+        print(f"正在透過 E-utilities 搜尋：{query}")
+        pmids, total = self.esearch(query, retmax=limit)
+        papers = self.efetch(pmids)
+        print(f"成功提取 {len(papers)} 筆結果（共 {total} 筆符合）")
+        return papers
+
+    def iter_search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        page_size: int = 100,
+        since=None,
+        datetype: str = "edat"
+    ) -> Iterator[Dict[str, str]]:
+        """
+        分頁搜尋並逐篇產生論文；處理目前頁面時，下一頁（ESearch + EFetch）已在背景預先抓取。
+
+        Args:
+            query: 搜尋關鍵字
+            limit: 最多產生的論文數；None 表示全部符合的論文
+            page_size: 每頁的 PMID 數量（每頁再依 batch_size 分批 EFetch）
+            since: 只取此日期（含）之後的論文，用於每日增量抓取
+            datetype: since 比對的日期類型（"edat" 或 "pdat"）
+
+        Yields:
+            Dict[str, str]: 與 search 相同格式的論文字典
+        """
+        page_size = max(1, page_size)
+
+        def fetch_page(start: int, count: int):
+            pmids, total = self.esearch(query, retmax=count, retstart=start, since=since, datetype=datetype)
+            return self.efetch(pmids), len(pmids), total
+
+        print(f"正在透過 E-utilities 分頁搜尋：{query}" + (f"（{format_entrez_date(since)} 之後）" if since else ""))
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(fetch_page, 0, page_size if limit is None else min(page_size, limit))
+        start = yielded = 0
+        try:
+            while future is not None:
+                papers, count, total = future.result()
+                start += count
+                wanted = total if limit is None else min(limit, total)
+                # 先排程下一頁，再產生目前頁面的論文
+                future = None
+                if count and start < wanted:
+                    future = executor.submit(fetch_page, start, min(page_size, wanted - start))
+                for paper in papers:
+                    if yielded >= wanted:
+                        break
+                    yielded += 1
+                    yield paper
+            print(f"分頁搜尋完成：共產生 {yielded} 篇論文")
+        finally:
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class DetailFetcher:
+    """
+    論文詳細頁面抓取器 - 以有上限的執行緒池並行取得缺少的摘要。
+
+    使用 HTTP 直接下載詳細頁面（不操作瀏覽器、不離開結果頁面），
+    並依主機名稱限速，避免對 PubMed 發出過多請求。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        rate_limiter: HostRateLimiter = None,
+        timeout: float = 15.0,
+        retry_policy: RetryPolicy = None,
+        breakers: CircuitBreakerRegistry = None,
+        cache: PageCache = None
+    ):
+        """
+        Args:
+            max_workers: 同時進行的請求數上限。預設為 4。
+            rate_limiter: 主機速率限制器。預設每個主機每秒 3 次請求。
+            timeout: 單次請求逾時秒數。
+            retry_policy: 暫時性錯誤的重試策略。預設最多 2 次、指數退避。
+            breakers: 主機斷路器。預設為行程共用的 circuit_breakers。
+            cache: 頁面快取。提供時詳細頁面依網址快取，過期後以 ETag / Last-Modified 驗證。預設不快取。
+        """
+        self.max_workers = max(1, max_workers)
+        self.cache = cache
+        self.rate_limiter = rate_limiter or HostRateLimiter(default_rate=3.0)
+        self.timeout = timeout
+        self._get = resilient(
+            policy=retry_policy or RetryPolicy(max_attempts=2, base_delay=0.5),
+            host_from=lambda link, headers=None: link,
+            breakers=breakers or circuit_breakers
+        )(self._get_once)
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch_abstract(self, link: str) -> str:
+        """下載單篇論文的詳細頁面並取出摘要（失敗時回傳空字串）。"""
+        try:
+            if self.cache is not None:
+                body = self.cache.fetch(link, "detail", lambda headers: self._get(link, headers))
+            else:
+                body = self._get(link).content
+            return extract_abstract(body.decode("utf-8", errors="replace"))
+        except Exception as e:
+            print(f"   [警告] 無法從詳細頁面提取摘要：{str(e)}")
+            return ""
+
+    def _get_once(self, link: str, headers: dict = None) -> requests.Response:
+        self.rate_limiter.acquire(link)
+        response = self.session.get(link, headers=headers, timeout=self.timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def fetch_abstracts(self, links: List[str]) -> Dict[str, str]:
+        """
+        並行取得多篇論文的摘要。
+
+        Returns:
+            Dict[str, str]: 連結 -> 摘要（取得失敗的連結對應空字串）
+        """
+        links = list(dict.fromkeys(link for link in links if link))
+        if not links:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(links))) as executor:
+            return dict(zip(links, executor.map(self.fetch_abstract, links)))
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class SeleniumFetcher(PaperFetcher):
+    """
+    瀏覽器抓取後端 - 以 Selenium 操作 PubMed 網站並解析結果頁面。
+
+    瀏覽器從 DriverPool 借出，搜尋結束即歸還；預設使用行程共用的池，
+    多次 pipeline 執行不必重複冷啟動 Chrome。只作為 E-utilities 的備援時不會產生啟動成本。
+    """
+
+    name = "selenium"
+
+    def __init__(
+        self,
+        headless: bool = True,
+        detail_fetcher: DetailFetcher = None,
+        waits: WaitStrategy = None,
+        pool: DriverPool = None
+    ):
+        """
+        Args:
+            headless: 是否使用無頭模式執行瀏覽器。預設為 True。
+            detail_fetcher: 缺少摘要時使用的詳細頁面抓取器。預設建立 4 個並行請求的 DetailFetcher。
+            waits: 頁面等待策略。PubMed 為可信任的來源，預設使用 "fast" 設定檔（不模擬真人延遲）。
+            pool: 瀏覽器池。預設在第一次搜尋時取得 shared_pool(headless, profile="lean", prewarm=1)，
+                  封鎖字型、樣式表、圖片與分析腳本以減少傳輸量與記憶體用量；
+                  建立池時即在背景啟動一個瀏覽器，之後的 pipeline 執行直接沿用。
+        """
+        self.headless = headless
+        self.driver = None  # 搜尋期間借出的瀏覽器
+        self.pool = pool
+        self.last_page_bytes = {'bytes': 0, 'requests': 0}
+        self.detail_fetcher = detail_fetcher or DetailFetcher()
+        self.waits = waits or WaitStrategy(profile="fast")
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, str]]:
+        """
+        從瀏覽器池借出瀏覽器，在 PubMed 網站上搜尋論文並提取結果。
+
+        Raises:
+            RuntimeError: 當無法取得瀏覽器或搜尋過程發生錯誤時。
+        """
+        if self.pool is None:
+            self.pool = shared_pool(headless=self.headless, profile="lean", prewarm=1)
+        try:
+            with self.pool.checkout() as driver:
+                self.driver = driver
+                try:
+                    return self._search(query, limit)
+                finally:
+                    self.driver = None
+        except RuntimeError:
+            raise
+        except Exception as e:
+            # _search 的錯誤都已包裝為 RuntimeError，其餘來自借出／啟動瀏覽器
+            raise RuntimeError(f"無法初始化瀏覽器驅動程式：{str(e)}") from e
+
+    def _search(self, query: str, limit: int) -> List[Dict[str, str]]:
+        try:
+            # 步驟 1: 前往 PubMed 首頁
+            print(f"正在前往 PubMed 網站...")
+            self.driver.get(f"{PUBMED_URL}/")
+            self.waits.dom_ready(self.driver, key="pubmed_home")
+
+            # 確認頁面已載入
+            page_title = self.driver.title
+            print(f"頁面標題：{page_title}")
+
+            # 步驟 2: 找到搜尋框並輸入查詢（使用多種選擇器策略）
+            print(f"正在尋找搜尋框並輸入關鍵字：{query}")
+            search_box = None
+
+            # 嘗試多種可能的搜尋框選擇器
+            selectors = [
+                (By.ID, "id_term"),
+                (By.NAME, "term"),
+                (By.CSS_SELECTOR, "input[name='term']"),
+                (By.CSS_SELECTOR, "input[id='id_term']"),
+                (By.CSS_SELECTOR, "input[type='search']"),
+                (By.CSS_SELECTOR, "input[placeholder*='Search']"),
+                (By.CSS_SELECTOR, "#search-input"),
+            ]
+
+            for by, value in selectors:
+                try:
+                    search_box = WebDriverWait(self.driver, 3).until(
+                        EC.presence_of_element_located((by, value))
+                    )
+                    print(f"成功找到搜尋框（使用選擇器：{by}={value}）")
+                    break
+                except TimeoutException:
+                    continue
+
+            if not search_box:
+                # 如果所有選擇器都失敗，截圖並拋出錯誤
+                self.driver.save_screenshot('debug_error.png')
+                raise RuntimeError("無法找到搜尋框，已儲存截圖至 debug_error.png")
+
+            search_box.clear()
+            self.waits.type_text(search_box, query)
+            self.waits.pause()
+
+            # 步驟 3: 點擊搜尋按鈕或按 Enter
+            print("正在執行搜尋...")
+            try:
+                # 嘗試找到搜尋按鈕
+                search_button = WebDriverWait(self.driver, 5).until(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, "button.search-btn, input[type='submit'], button[type='submit']"))
+                )
+                search_button.click()
+            except TimeoutException:
+                # 如果找不到按鈕，嘗試按 Enter
+                search_box.send_keys(Keys.RETURN)
+
+            # 步驟 4: 等待結果載入
+            print("等待搜尋結果載入...")
+            try:
+                # 嘗試多種可能的結果選擇器
+                WebDriverWait(self.driver, 15).until(
+                    EC.any_of(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, ".results-article")),
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "article.full-docsum")),
+                        EC.presence_of_element_located((By.CSS_SELECTOR, ".docsum-content")),
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "#search-results"))
+                    )
+                )
+            except TimeoutException:
+                # 如果找不到特定元素，至少等待頁面載入完成
+                self.waits.dom_ready(self.driver, key="pubmed_results_fallback", raise_on_timeout=False)
+            # 等待非同步載入的請求結束，確保內容完全載入
+            self.waits.network_idle(self.driver, key="pubmed_results", raise_on_timeout=False)
+            self.last_page_bytes = page_transfer_bytes(self.driver)
+            print(f"結果頁面傳輸量：{self.last_page_bytes['bytes'] / 1024:.1f} KB（{self.last_page_bytes['requests']} 個請求）")
+
+            # 步驟 5: 解析結果頁面
+            print(f"正在提取前 {limit} 筆結果...")
+            results = parse_search_results(self.driver.page_source, limit=limit)
+
+            # 摘要仍然太短的論文：並行抓取詳細頁面（不離開結果頁面）
+            missing = [paper for paper in results
+                       if paper['link'] and (not paper['snippet'] or paper['snippet'] == NO_ABSTRACT or len(paper['snippet']) < 20)]
+            if missing:
+                print(f"正在並行抓取 {len(missing)} 篇論文的詳細頁面摘要...")
+                abstracts = self.detail_fetcher.fetch_abstracts([paper['link'] for paper in missing])
+                for paper in missing:
+                    if abstracts.get(paper['link']):
+                        paper['snippet'] = abstracts[paper['link']]
+
+            print(f"成功提取 {len(results)} 筆結果")
+            return results
+
+        except TimeoutException as e:
+            self._save_debug_screenshot()
+            raise RuntimeError(f"搜尋超時：{str(e)}") from e
+        except Exception as e:
+            self._save_debug_screenshot()
+            raise RuntimeError(f"搜尋過程發生錯誤：{str(e)}") from e
+
+    def _save_debug_screenshot(self) -> None:
+        """儲存截圖以便調試。"""
+        try:
+            self.driver.save_screenshot('debug_error.png')
+            print("已儲存錯誤截圖至 debug_error.png")
+        except Exception as screenshot_error:
+            print(f"無法儲存截圖：{screenshot_error}")
+
+    def close(self) -> None:
+        """關閉詳細頁面的 HTTP 連線。瀏覽器屬於瀏覽器池，由池負責關閉。"""
+        self.detail_fetcher.close()
@@ -5,13 +5,18 @@
 """
 
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Iterator, Optional
 
 from .scout import PubMedScout
 from .editor import ResearchEditor
 from .daily_brief import ResearchPublisher
+from .review_cache import ReviewCache
 from Ares.brain import KnowledgeBase
+from Ares.utils.streaming import Stage, StreamingPipeline
+from Ares.utils.throttle import TokenBucket
 
 
 class ResearchPipeline:
@@ -22,7 +27,25 @@ class ResearchPipeline:
     使用 AI 分析每篇論文，最後生成格式化的 Markdown 日報。
     """
     
-    def __init__(self, headless: bool = True):
+    # 串流搜尋時每頁的論文數（較小的頁面讓第一批論文更快進入審查）
+    STREAM_PAGE_SIZE = 20
+    
+    def __init__(
+        self,
+        headless: bool = True,
+        backend: str = "auto",
+        review_concurrency: int = 4,
+        review_rate: Optional[float] = 2.0,
+        batch_reviews: bool = True,
+        review_cache: ReviewCache = None,
+        use_review_cache: bool = True,
+        queue_size: int = 8,
+        memory_workers: int = 1,
+        scout: PubMedScout = None,
+        editor: ResearchEditor = None,
+        publisher: ResearchPublisher = None,
+        brain: KnowledgeBase = None
+    ):
         """
         初始化研究處理流程。
         
@@ -30,11 +53,37 @@ class ResearchPipeline:
         
         Args:
             headless: 是否使用無頭模式執行瀏覽器。預設為 True。
+            backend: PubMedScout 的抓取後端（"auto"、"eutils" 或 "selenium"）。預設為 "auto"。
+            review_concurrency: 同時進行的 AI 審查數量上限。預設為 4；設為 1 即逐篇審查。
+            review_rate: 每秒最多送出的審查請求數（權杖桶限速，避免超過 Gemini 的速率上限）。
+                         預設為 2；None 表示不限速。
+            batch_reviews: 編輯器支援 review_batch 時，依其 token 預算將多篇論文合併為一次請求。預設為 True。
+            review_cache: 自訂審查快取。預設在使用內建編輯器時建立 ./ares_review_cache.sqlite3。
+            use_review_cache: 是否在排程審查前先查詢審查快取。預設為 True。
+            queue_size: 串流管線中各階段之間的佇列容量（背壓上限）。預設為 8。
+            memory_workers: 存入大腦記憶庫的工作執行緒數量。預設為 1。
+            scout / editor / publisher / brain: 自訂元件（測試或共用實例時使用）。預設自動建立。
         """
-        self.scout = PubMedScout(headless=headless)
-        self.editor = ResearchEditor()
-        self.publisher = ResearchPublisher()
-        self.brain = KnowledgeBase()
+        self.scout = scout or PubMedScout(headless=headless, backend=backend)
+        self.editor = editor or ResearchEditor()
+        self.publisher = publisher or ResearchPublisher()
+        self.brain = brain if brain is not None else KnowledgeBase()
+        self.review_concurrency = max(1, review_concurrency)
+        self.review_limiter = TokenBucket(review_rate, capacity=self.review_concurrency) if review_rate else None
+        self.batch_reviews = batch_reviews and hasattr(self.editor, 'review_batch')
+        
+        # 審查快取鍵包含提示詞版本與模型名稱；編輯器未提供時不使用快取
+        self.review_identity = (getattr(self.editor, 'PROMPT_VERSION', None), getattr(self.editor, 'MODEL_NAME', None))
+        if not use_review_cache or None in self.review_identity:
+            review_cache = None
+        elif review_cache is None and editor is None:
+            review_cache = ReviewCache()
+        self.review_cache = review_cache
+        
+        self.queue_size = max(1, queue_size)
+        self.memory_workers = max(1, memory_workers)
+        self.last_run_stats: Dict[str, Dict[str, Any]] = {}
+        self._counts_lock = threading.Lock()
     
     def run_daily_brief(
         self, 
@@ -47,6 +96,11 @@ class ResearchPipeline:
         執行完整的日報生成流程。
         
         從 PubMed 搜尋論文，使用 AI 分析每篇論文，並生成格式化的 Markdown 日報。
+        搜尋、審查與存入記憶庫以串流管線同時進行：每篇論文抓到後立即送審，不必等待整個搜尋完成；
+        各階段的吞吐量與延遲記錄在 last_run_stats。某個階段處理失敗的論文仍會以預設結果出現在日報中。
+        
+        日報不是串流階段：Publisher 依搜尋順序一次寫出完整的 Markdown 檔案，因此在管線結束後才執行。
+        搜尋中途失敗時，仍會以已處理的論文發布部分日報，之後才拋出錯誤。
         
         Args:
             query: 搜尋關鍵字。
@@ -55,110 +109,64 @@ class ResearchPipeline:
             save_to_brain: 是否將論文存入大腦記憶庫。預設為 True。
             
         Raises:
-            RuntimeError: 當流程執行過程中發生錯誤時。
+            RuntimeError: 當流程執行過程中發生錯誤時（搜尋中途失敗時在部分日報發布後拋出）。
         """
         try:
-            # 步驟 1: Scout 搜尋論文
-            print(f"正在搜尋論文：{query} ...")
-            papers = self.scout.search(query, limit=limit)
-            print(f"成功找到 {len(papers)} 篇論文\n")
+            # 串流處理：Scout 逐篇產生論文 → Editor 審查 → 大腦記憶庫，三者同時進行；
+            # 階段之間以有界佇列連接，下游忙碌時上游自動放慢（背壓）
+            print(f"正在搜尋論文：{query} ...（搜尋、審查與存入記憶庫同時進行）")
+            memory_counts = {'stored': 0, 'skipped': 0}
+            stages = [Stage(
+                "editor",
+                lambda batch: self.review_papers(batch, concurrency=1),
+                workers=self.review_concurrency,
+                queue_size=self.queue_size,
+                batch_size=getattr(self.editor, 'max_batch_size', 1) if self.batch_reviews else 1,
+                on_error=self._failed_review
+            )]
+            if save_to_brain:
+                # 存入失敗時論文原樣傳出（Stage 未提供 on_error 的預設行為），仍會出現在日報中
+                stages.append(Stage(
+                    "brain",
+                    lambda batch: self._memorize(batch, query, memory_counts),
+                    workers=self.memory_workers,
+                    queue_size=self.queue_size,
+                    batch_size=self.queue_size
+                ))
+            stream = StreamingPipeline(stages, source_name="scout")
+            papers_with_analysis = stream.run(self._search_stream(query, limit))
+            self.last_run_stats = stream.stats
+            search_error = stream.source_error
             
-            if not papers:
+            if not papers_with_analysis:
+                if search_error is not None:
+                    raise search_error
                 print("未找到任何論文，無法生成日報")
                 return
+            if search_error is not None:
+                print(f"⚠️  搜尋中途失敗，僅以已取得的 {len(papers_with_analysis)} 篇論文生成日報：{search_error}")
+            print(f"\n完成 {len(papers_with_analysis)} 篇論文的搜尋與分析\n")
+            self._print_stage_stats(stream.stats)
             
-            # 步驟 2: Editor 審查每篇論文
-            print("開始進行 AI 審查...")
-            papers_with_analysis: List[Dict[str, Any]] = []
-            
-            for i, paper in enumerate(papers, 1):
-                try:
-                    print(f"正在分析論文 {i}/{len(papers)}: {paper.get('title', '無標題')[:50]}...")
-                    
-                    # 調試資訊：檢查論文資料
-                    snippet = paper.get('snippet', '')
-                    snippet_len = len(snippet) if snippet else 0
-                    if snippet_len < 10:
-                        print(f"  [!] 警告：摘要長度僅 {snippet_len} 字元，可能無法分析")
-                    
-                    # 呼叫 Editor 進行分析
-                    analysis = self.editor.review(paper)
-                    
-                    # 將分析結果添加到論文字典中
-                    paper_with_analysis = paper.copy()
-                    paper_with_analysis['analysis'] = analysis
-                    papers_with_analysis.append(paper_with_analysis)
-                    
-                    # 顯示分析結果摘要
-                    score = analysis.get('score', 0)
-                    if score == 0 and 'error' in analysis:
-                        error_msg = analysis.get('error', '未知錯誤')
-                        print(f"  [X] 分析失敗：{error_msg}")
-                        # 如果錯誤包含 JSON 解析問題，顯示前 100 字元以便調試
-                        if 'JSON' in error_msg or 'json' in error_msg:
-                            print(f"     [調試] 錯誤詳情已記錄在日報中")
-                    else:
-                        print(f"  [OK] 分析完成，評分：{score}/10")
-                        
-                except Exception as e:
-                    print(f"  [X] 分析失敗：{str(e)}")
-                    # 即使分析失敗，也將論文加入列表（使用預設分析結果）
-                    paper_with_analysis = paper.copy()
-                    paper_with_analysis['analysis'] = {
-                        'score': 0,
-                        'tldr': '分析失敗',
-                        'innovation': '無法分析',
-                        'recommendation': '無法提供建議',
-                        'error': str(e)
-                    }
-                    papers_with_analysis.append(paper_with_analysis)
-            
-            print(f"\n完成 {len(papers_with_analysis)} 篇論文的分析\n")
-            
-            # 步驟 3: 將論文存入大腦記憶庫（僅存入成功分析的論文）
             if save_to_brain:
-                # 過濾出成功分析的論文（沒有 error 且 score > 0）
-                papers_for_memory = []
-                skipped_count = 0
-                
-                for paper in papers_with_analysis:
-                    analysis = paper.get('analysis', {})
-                    
-                    # 檢查是否分析成功：沒有 error 且 score > 0
-                    has_error = 'error' in analysis
-                    score = analysis.get('score', 0)
-                    is_valid = not has_error and score > 0
-                    
-                    if is_valid:
-                        paper_dict = {
-                            'Title': paper.get('title', ''),
-                            'Link': paper.get('link', ''),
-                            'TLDR': analysis.get('tldr', ''),
-                            'Innovation': analysis.get('innovation', ''),
-                            'Score': analysis.get('score', 0),
-                            'Date': datetime.now().strftime('%Y-%m-%d')
-                        }
-                        papers_for_memory.append(paper_dict)
-                    else:
-                        skipped_count += 1
-                        error_reason = analysis.get('error', '評分為 0')
-                        print(f"  [跳過] 論文「{paper.get('title', '無標題')[:50]}...」未存入資料庫（原因：{error_reason}）")
-                
-                # 只有成功分析的論文才存入資料庫
-                if papers_for_memory:
-                    self.brain.memorize(papers_for_memory, tag=query)
-                    print(f"✅ {len(papers_for_memory)} 篇論文已存入大腦記憶庫（標籤：{query}）")
-                    if skipped_count > 0:
-                        print(f"   ⚠️  {skipped_count} 篇論文因分析失敗未存入資料庫（僅生成報告）")
+                if memory_counts['stored']:
+                    print(f"✅ {memory_counts['stored']} 篇論文已存入大腦記憶庫（標籤：{query}）")
+                    if memory_counts['skipped']:
+                        print(f"   ⚠️  {memory_counts['skipped']} 篇論文因分析失敗未存入資料庫（僅生成報告）")
                 else:
                     print(f"⚠️  沒有成功分析的論文，跳過存入資料庫（僅生成報告）")
                 print()
             
-            # 步驟 4: Publisher 保存報告
+            # Publisher 保存報告（依搜尋順序排列）
             print(f"正在生成日報：{output_file} ...")
             self.publisher.publish(papers_with_analysis, output_file)
             print("日報生成完成！")
             
+            if search_error is not None:
+                raise RuntimeError(
+                    f"搜尋未完成，已發布 {len(papers_with_analysis)} 篇論文的部分日報：{search_error}"
+                ) from search_error
+            
         except Exception as e:
             raise RuntimeError(f"日報生成流程發生錯誤：{str(e)}") from e
         finally:
@@ -169,6 +177,192 @@ class ResearchPipeline:
             except Exception as e:
                 print(f"關閉瀏覽器時發生錯誤：{str(e)}")
     
+    def _search_stream(self, query: str, limit: int) -> Iterator[Dict[str, str]]:
+        """逐篇產生搜尋結果；偵察兵不支援分頁串流時一次取回全部結果。"""
+        iter_search = getattr(self.scout, 'iter_search', None)
+        if iter_search is None:
+            yield from self.scout.search(query, limit=limit)
+            return
+        yield from iter_search(query, limit=limit, page_size=max(1, min(limit, self.STREAM_PAGE_SIZE)))
+    
+    def _memorize(self, papers: List[Dict[str, Any]], query: str, counts: Dict[str, int]) -> List[Dict[str, Any]]:
+        """
+        將成功分析的論文存入大腦記憶庫（串流管線的 brain 階段），原樣回傳輸入的論文。
+        
+        存入失敗只記錄錯誤，論文仍會出現在日報中。
+        """
+        # 過濾出成功分析的論文（沒有 error 且 score > 0）
+        papers_for_memory = []
+        skipped_count = 0
+        
+        for paper in papers:
+            analysis = paper.get('analysis', {})
+            
+            # 檢查是否分析成功：沒有 error 且 score > 0
+            has_error = 'error' in analysis
+            score = analysis.get('score', 0)
+            is_valid = not has_error and score > 0
+            
+            if is_valid:
+                paper_dict = {
+                    'Title': paper.get('title', ''),
+                    'Link': paper.get('link', ''),
+                    'TLDR': analysis.get('tldr', ''),
+                    'Innovation': analysis.get('innovation', ''),
+                    'Score': analysis.get('score', 0),
+                    'Date': datetime.now().strftime('%Y-%m-%d')
+                }
+                papers_for_memory.append(paper_dict)
+            else:
+                skipped_count += 1
+                error_reason = analysis.get('error', '評分為 0')
+                print(f"  [跳過] 論文「{paper.get('title', '無標題')[:50]}...」未存入資料庫（原因：{error_reason}）")
+        
+        # 只有成功分析的論文才存入資料庫
+        stored = 0
+        if papers_for_memory:
+            try:
+                self.brain.memorize(papers_for_memory, tag=query)
+                stored = len(papers_for_memory)
+            except Exception as e:
+                print(f"  [X] 存入大腦記憶庫失敗：{str(e)}")
+                skipped_count += len(papers_for_memory)
+        with self._counts_lock:
+            counts['stored'] += stored
+            counts['skipped'] += skipped_count
+        return papers
+    
+    @staticmethod
+    def _print_stage_stats(stats: Dict[str, Dict[str, Any]]) -> None:
+        """顯示各階段的處理筆數、吞吐量與延遲。"""
+        total = stats.get('total', {})
+        print(f"[Pipeline] 總耗時 {total.get('elapsed_s', 0):.1f} 秒")
+        for name, stage in stats.items():
+            if name == 'total':
+                continue
+            first = stage['first_output_s']
+            print(
+                f"  {name:<8} 工作數 {stage['workers']}，{stage['items']} 筆（錯誤 {stage['errors']}），"
+                f"{stage['throughput']:.2f} 筆/秒，平均延遲 {stage['avg_latency_s']:.2f} 秒，"
+                f"首筆完成於 {'-' if first is None else f'{first:.2f}'} 秒"
+            )
+        print()
+    
+    def review_papers(self, papers: List[Dict[str, str]], concurrency: int = None) -> List[Dict[str, Any]]:
+        """
+        並行審查論文，回傳依輸入順序排列、附上 'analysis' 的論文列表。
+        
+        同時進行的審查請求數不超過 review_concurrency，送出速率受 review_rate 限制；
+        啟用 batch_reviews 時每個請求包含一組論文（由 editor.plan_batches 依 token 預算分組）。
+        排程前先查詢審查快取，命中的論文不再送出請求；成功的新審查結果會寫回快取。
+        單篇論文失敗只影響該篇（以預設分析結果標記錯誤）；整組批次失敗時改為逐篇審查。
+        
+        Args:
+            papers: 論文字典列表。
+            concurrency: 本次呼叫的並行請求數上限。預設為 review_concurrency。
+            
+        Returns:
+            List[Dict[str, Any]]: 每篇論文的副本，包含 'analysis' 鍵。
+        """
+        if not papers:
+            return []
+        total = len(papers)
+        results: List[Optional[Dict[str, Any]]] = [None] * total
+        if self.review_cache is not None:
+            for index, paper in enumerate(papers):
+                analysis = self.review_cache.get(paper, *self.review_identity)
+                if analysis is not None:
+                    results[index] = {**paper, 'analysis': analysis}
+            cached = total - results.count(None)
+            if cached:
+                print(f"審查快取命中 {cached}/{total} 篇，略過 AI 審查")
+        
+        pending = [index for index, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        if self.batch_reviews:
+            groups = [[pending[i] for i in group] for group in self.editor.plan_batches([papers[i] for i in pending])]
+        else:
+            groups = [[index] for index in pending]
+        workers = min(concurrency or self.review_concurrency, len(groups))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ares-review") as executor:
+            reviewed = list(executor.map(lambda group: self._review_group(group, papers), groups))
+        for group, group_results in zip(groups, reviewed):
+            for index, paper_with_analysis in zip(group, group_results):
+                results[index] = paper_with_analysis
+                if self.review_cache is not None:
+                    self.review_cache.put(papers[index], paper_with_analysis['analysis'], *self.review_identity)
+        print(f"AI 審查耗時 {time.perf_counter() - start:.1f} 秒（{len(pending)} 篇，{len(groups)} 次請求，並行 {workers}）")
+        return results
+    
+    def _review_group(self, group: List[int], papers: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """以一次批次請求審查一組論文；只有一篇或批次請求失敗時逐篇審查。"""
+        total = len(papers)
+        if len(group) == 1:
+            return [self._review_one(group[0] + 1, total, papers[group[0]])]
+        try:
+            print(f"正在批次分析論文 {group[0] + 1}–{group[-1] + 1}/{total}（{len(group)} 篇）...")
+            # 批次請求與批次內的逐篇補審都由 editor 先向限速器取得權杖
+            analyses = self.editor.review_batch([papers[i] for i in group], limiter=self.review_limiter)
+        except Exception as e:
+            print(f"  [X] 批次分析失敗，改為逐篇分析：{str(e)}")
+            return [self._review_one(i + 1, total, papers[i]) for i in group]
+        return [self._attach_analysis(papers[i], analysis) for i, analysis in zip(group, analyses)]
+    
+    def _attach_analysis(self, paper: Dict[str, str], analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """將分析結果附加到論文副本，並顯示分析結果摘要。"""
+        # 將分析結果添加到論文字典中
+        paper_with_analysis = paper.copy()
+        paper_with_analysis['analysis'] = analysis
+        
+        # 顯示分析結果摘要
+        score = analysis.get('score', 0)
+        if score == 0 and 'error' in analysis:
+            error_msg = analysis.get('error', '未知錯誤')
+            print(f"  [X] 分析失敗：{error_msg}")
+            # 如果錯誤包含 JSON 解析問題，顯示前 100 字元以便調試
+            if 'JSON' in error_msg or 'json' in error_msg:
+                print(f"     [調試] 錯誤詳情已記錄在日報中")
+        else:
+            print(f"  [OK] 分析完成，評分：{score}/10")
+        return paper_with_analysis
+    
+    def _review_one(self, i: int, total: int, paper: Dict[str, str]) -> Dict[str, Any]:
+        """審查單篇論文；任何例外都轉為帶有 error 的預設分析結果。"""
+        try:
+            print(f"正在分析論文 {i}/{total}: {paper.get('title', '無標題')[:50]}...")
+            
+            # 調試資訊：檢查論文資料
+            snippet = paper.get('snippet', '')
+            snippet_len = len(snippet) if snippet else 0
+            if snippet_len < 10:
+                print(f"  [!] 警告：摘要長度僅 {snippet_len} 字元，可能無法分析")
+            
+            # 呼叫 Editor 進行分析（先取得限速權杖）
+            if self.review_limiter is not None:
+                self.review_limiter.acquire()
+            analysis = self.editor.review(paper)
+            return self._attach_analysis(paper, analysis)
+                
+        except Exception as e:
+            print(f"  [X] 分析失敗：{str(e)}")
+            # 即使分析失敗，也將論文加入列表（使用預設分析結果）
+            return self._failed_review(paper, e)
+    
+    @staticmethod
+    def _failed_review(paper: Dict[str, str], error: BaseException) -> Dict[str, Any]:
+        """回傳附上預設分析結果（包含 error）的論文副本。"""
+        paper_with_analysis = paper.copy()
+        paper_with_analysis['analysis'] = {
+            'score': 0,
+            'tldr': '分析失敗',
+            'innovation': '無法分析',
+            'recommendation': '無法提供建議',
+            'error': str(error)
+        }
+        return paper_with_analysis
+    
     def __enter__(self):
         """支援 context manager 的進入方法。"""
         return self
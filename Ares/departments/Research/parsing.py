@@ -0,0 +1,199 @@
+"""
+PubMed 頁面解析模組
+
+以 lxml（C 實作的 HTML 解析器）搭配預先編譯的 XPath 取出搜尋結果與摘要：
+- 只解析需要的區塊：搜尋結果頁從第一篇結果開始、到第 limit 篇結束；詳細頁面從摘要區塊開始
+- 選擇器在模組載入時編譯一次，不再對每個元素執行 Python lambda 比對
+
+解析結果與原本 BeautifulSoup（html.parser）的版本相同：title、link、snippet。
+"""
+import re
+from typing import Dict, List, Optional
+
+import lxml.html
+from lxml import etree
+
+PUBMED_URL = "https://pubmed.ncbi.nlm.nih.gov"
+NO_ABSTRACT = "無摘要"
+# 摘要長度上限（與瀏覽器詳細頁面擷取的上限一致）
+SNIPPET_MAX_CHARS = 1000
+_ABSTRACT_KEYWORDS = ('background', 'objective', 'method', 'result', 'conclusion')
+
+
+def _has_class(name: str) -> str:
+    """XPath 條件：class 屬性包含完整的 name（與 CSS 的 .name 相同）。"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _class_contains(fragment: str) -> str:
+    """XPath 條件：class 屬性（不分大小寫）包含 fragment 子字串。"""
+    return f"contains(translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{fragment}')"
+
+
+def _id_contains(fragment: str) -> str:
+    return f"contains(translate(@id, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{fragment}')"
+
+
+# 搜尋結果項目（依序嘗試）
+_RESULT_ITEMS = [
+    etree.XPath(f"//article[{_has_class('full-docsum')}]"),
+    etree.XPath(f"//div[{_has_class('docsum-content')}]"),
+]
+_TITLE_LINK = etree.XPath(f".//a[{_has_class('docsum-title')}]")
+_ANY_LINK = etree.XPath(".//a[@href]")
+# 摘要片段選擇器（依優先順序）
+_SNIPPETS = [
+    etree.XPath(f".//div[{_has_class('full-view-snippet')}]"),
+    etree.XPath(f".//p[{_has_class('docsum-snippet')}]"),
+    etree.XPath(f".//div[{_has_class('snippet')}]"),
+    etree.XPath(f".//div[{_has_class('abstract')}]"),
+    etree.XPath(f".//p[{_has_class('abstract')}]"),
+    etree.XPath(f".//div[{_class_contains('snippet')}]"),
+    etree.XPath(f".//p[{_class_contains('snippet')}]"),
+]
+# 詳細頁面的摘要區塊（依優先順序）
+_ABSTRACTS = [
+    etree.XPath("//div[@id='abstract']"),
+    etree.XPath(f"//div[{_has_class('abstract')}]"),
+    etree.XPath(f"//section[{_has_class('abstract')}]"),
+    etree.XPath(f"//div[{_class_contains('abstract')}]"),
+    etree.XPath(f"//div[{_id_contains('abstract')}]"),
+]
+_PARAGRAPHS = etree.XPath("//p | //div")
+
+# 切出需要解析的區塊用的起始標記（純字串搜尋，不建立 DOM；順序與 _RESULT_ITEMS 相同）
+_RESULT_STARTS = [
+    re.compile(r"<article\b[^>]*\bfull-docsum\b", re.IGNORECASE),
+    re.compile(r"<div\b[^>]*\bdocsum-content\b", re.IGNORECASE),
+]
+_ABSTRACT_START = re.compile(r"<(?:div|section)\b[^>]*\b(?:id|class)=[\"'][^\"']*abstract", re.IGNORECASE)
+
+
+def _text(element, separator: str = "") -> str:
+    """等同 BeautifulSoup 的 get_text(separator, strip=True)：各文字片段去除空白後以 separator 連接。"""
+    return separator.join(part.strip() for part in element.itertext(etree.Element) if part.strip())
+
+
+def _parse_fragment(html: str):
+    return lxml.html.document_fromstring(html) if html.strip() else None
+
+
+def _results_subtree(html: str, limit: int) -> str:
+    """
+    切出搜尋結果區塊：從第一篇結果開始，到第 limit + 1 篇之前結束。
+
+    找不到結果標記時回傳完整 HTML。
+    """
+    starts = []
+    for pattern in _RESULT_STARTS:
+        for match in pattern.finditer(html):
+            starts.append(match.start())
+            if len(starts) > limit:
+                break
+        if starts:
+            break
+    if not starts:
+        return html
+    end = starts[limit] if len(starts) > limit else len(html)
+    return html[starts[0]:end]
+
+
+def _result_items(html: str, limit: int) -> list:
+    root = _parse_fragment(_results_subtree(html, limit))
+    if root is None:
+        return []
+    for xpath in _RESULT_ITEMS:
+        items = xpath(root)
+        if items:
+            return items[:limit]
+    return []
+
+
+def _parse_item(item) -> Dict[str, str]:
+    title_links = _TITLE_LINK(item) or _ANY_LINK(item)
+    title_elem = title_links[0] if title_links else None
+    title = _text(title_elem) if title_elem is not None else ""
+    title = title or "無標題"
+
+    href = title_elem.get('href') if title_elem is not None else None
+    if href:
+        link = href if href.startswith('http') else f"{PUBMED_URL}{href}"
+    else:
+        link = ""
+
+    snippet = NO_ABSTRACT
+    for xpath in _SNIPPETS:
+        found = xpath(item)
+        if found:
+            snippet = _text(found[0])
+            if snippet and len(snippet) > 10:
+                break
+
+    # 找不到摘要時，取標題之後的文字
+    if not snippet or snippet == NO_ABSTRACT or len(snippet) < 10:
+        all_text = _text(item, separator=' ')
+        if title and title in all_text:
+            potential_snippet = all_text.split(title, 1)[1].strip()
+            if 20 < len(potential_snippet) < 1000:
+                snippet = potential_snippet[:500]
+
+    return {'title': title, 'link': link, 'snippet': snippet}
+
+
+def parse_search_results(html: str, limit: int = 5) -> List[Dict[str, str]]:
+    """
+    解析 PubMed 搜尋結果頁面。
+
+    Args:
+        html: 結果頁面的 HTML（driver.page_source）
+        limit: 最多解析的結果數量
+
+    Returns:
+        List[Dict[str, str]]: 每筆包含 'title'、'link'、'snippet'
+    """
+    results = []
+    for item in _result_items(html, limit):
+        try:
+            results.append(_parse_item(item))
+        except Exception as e:
+            print(f"警告：提取結果時發生錯誤：{str(e)}")
+    return results
+
+
+def _find_abstract(root) -> Optional[str]:
+    for xpath in _ABSTRACTS:
+        found = xpath(root)
+        if found:
+            abstract_text = _text(found[0], separator=' ')
+            if abstract_text and len(abstract_text) > 20:
+                return abstract_text[:SNIPPET_MAX_CHARS]
+    return None
+
+
+def extract_abstract(html: str) -> str:
+    """
+    從 PubMed 論文詳細頁面的 HTML 中取出摘要。
+
+    先只解析摘要區塊之後的內容；找不到時才解析整頁，改找包含 Background / Objective 等關鍵字的段落。
+
+    Returns:
+        str: 摘要（最多 SNIPPET_MAX_CHARS 字元）；找不到時為空字串
+    """
+    match = _ABSTRACT_START.search(html)
+    if match:
+        subtree = _parse_fragment(html[match.start():])
+        abstract = _find_abstract(subtree) if subtree is not None else None
+        if abstract:
+            return abstract
+
+    root = _parse_fragment(html)
+    if root is None:
+        return ""
+    abstract = _find_abstract(root)
+    if abstract:
+        return abstract
+    for para in _PARAGRAPHS(root):
+        text = _text(para)
+        if text and len(text) > 50 and any(keyword in text.lower() for keyword in _ABSTRACT_KEYWORDS):
+            return text[:SNIPPET_MAX_CHARS]
+    return ""
@@ -0,0 +1,158 @@
+"""
+論文審查快取模組
+
+同一篇論文常在不同天、不同但重疊的搜尋中再次出現。ReviewCache 以內容定址儲存解析後的審查結果：
+- 快取鍵：sha256(標題 + 摘要 + 提示詞版本 + 模型名稱)，內容或提示詞改變即自動失效
+- 只儲存成功的審查結果（沒有 error），暫時性的失敗下次會重新審查
+- 可依提示詞版本清除（main.py review-cache --purge <版本> / --purge-outdated）
+
+資料寫入本地檔案，因此每天的日報流程都能沿用先前的審查結果。
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+
+def review_key(paper: Dict[str, str], prompt_version: str, model: str) -> str:
+    """以論文標題、摘要、提示詞版本與模型名稱組成固定長度的雜湊鍵。"""
+    raw = "\x1f".join([
+        (paper.get('title') or '').strip(),
+        (paper.get('snippet') or '').strip(),
+        str(prompt_version),
+        str(model),
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ReviewCache:
+    """
+    審查結果快取 - 以論文內容與提示詞版本定址，命中時不必再次呼叫 LLM。
+    """
+
+    def __init__(self, path: str = "./ares_review_cache.sqlite3"):
+        """
+        Args:
+            path: SQLite 檔案路徑。預設為 ./ares_review_cache.sqlite3。
+        """
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 審查在多個執行緒中並行進行，因此共用連線並以鎖保護
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS reviews (
+                    key TEXT PRIMARY KEY,
+                    prompt_version TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    analysis TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_version ON reviews (prompt_version)")
+
+    def get(self, paper: Dict[str, str], prompt_version: str, model: str) -> Optional[Dict[str, Any]]:
+        """
+        查詢論文的審查結果。
+
+        Args:
+            paper: 論文字典（使用 'title' 與 'snippet'）
+            prompt_version: 審查提示詞版本
+            model: 審查使用的模型名稱
+
+        Returns:
+            Optional[Dict[str, Any]]: 命中時回傳先前的審查結果，否則為 None
+        """
+        key = review_key(paper, prompt_version, model)
+        with self._lock:
+            row = self._conn.execute("SELECT analysis FROM reviews WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE reviews SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, paper: Dict[str, str], analysis: Dict[str, Any], prompt_version: str, model: str) -> bool:
+        """
+        儲存審查結果；失敗的結果（包含 error 或評分為 0）不儲存。
+
+        Returns:
+            bool: 是否已寫入
+        """
+        if not isinstance(analysis, dict) or 'error' in analysis or not analysis.get('score'):
+            return False
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (review_key(paper, prompt_version, model), str(prompt_version), str(model),
+                 (paper.get('title') or '').strip(), json.dumps(analysis, ensure_ascii=False), now, now)
+            )
+            self.stored += 1
+        return True
+
+    def purge(self, prompt_versions: Iterable[str] = None, keep: str = None) -> int:
+        """
+        清除指定提示詞版本的審查結果。
+
+        Args:
+            prompt_versions: 要清除的版本；None 表示所有版本
+            keep: 保留的版本（例如目前的版本），其餘全部清除；與 prompt_versions 同時指定時以兩者交集為準
+
+        Returns:
+            int: 刪除筆數
+        """
+        conditions, params = [], []
+        if prompt_versions is not None:
+            versions = [str(version) for version in prompt_versions]
+            if not versions:
+                return 0
+            conditions.append(f"prompt_version IN ({', '.join('?' * len(versions))})")
+            params.extend(versions)
+        if keep is not None:
+            conditions.append("prompt_version != ?")
+            params.append(str(keep))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock, self._conn:
+            return self._conn.execute(f"DELETE FROM reviews{where}", params).rowcount
+
+    def versions(self) -> Dict[str, int]:
+        """各提示詞版本的快取筆數。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT prompt_version, COUNT(*) FROM reviews GROUP BY prompt_version ORDER BY prompt_version"
+            ).fetchall()
+        return dict(rows)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """命中、未命中與寫入次數，以及命中率。"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stored': self.stored,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,3 +1,7 @@
 from .core import setup_driver, retry
 from .actions import safe_click, safe_type
+from .waits import WaitStrategy, TimingProfile
+from .pool import DriverPool, shared_pool
+from .resilience import RetryPolicy, CircuitOpenError, resilient
+from .cache import PageCache, shared_page_cache
 from .extraction import get_text, get_attribute
\ No newline at end of file
@@ -1,32 +1,37 @@
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time
-import random
 from .core import retry  # 從同一資料夾的 core 引用 retry
+from .waits import default_waits
 
 @retry(times=3)
-def safe_click(driver, by, value, timeout=10):
-    """安全點擊"""
+def safe_click(driver, by, value, timeout=10, waits=None):
+    """安全點擊（捲動到畫面中央後，等元素位置穩定才點擊）"""
+    waits = waits or default_waits()
     element = WebDriverWait(driver, timeout).until(
         EC.element_to_be_clickable((by, value))
     )
     driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
-    time.sleep(0.5) 
+    waits.element_stable(driver, element, key="scroll_into_view", raise_on_timeout=False)
     element.click()
+    waits.pause()
 
-def safe_type(driver, by, value, text, timeout=10):
-    """模擬真人輸入"""
+def safe_type(driver, by, value, text, timeout=10, waits=None):
+    """輸入文字（human 設定檔模擬真人逐字輸入，fast 設定檔一次送出）"""
+    waits = waits or default_waits()
     element = WebDriverWait(driver, timeout).until(
         EC.presence_of_element_located((by, value))
     )
     element.clear()
-    for char in str(text):
-        element.send_keys(char)
-        time.sleep(random.uniform(0.05, 0.2))
+    waits.type_text(element, text)
 
-def nuclear_scroll(driver, times=3, wait=1.5):
-    """核彈級捲動"""
+def nuclear_scroll(driver, times=3, wait=1.5, waits=None):
+    """
+    核彈級捲動
+
+    每次捲動後等待頁面高度不再變化（延遲載入完成）即繼續，wait 為每次等待的上限秒數。
+    """
+    waits = waits or default_waits()
     js_scroll_all = """
         window.scrollTo(0, document.body.scrollHeight);
         var elements = document.querySelectorAll('*');
@@ -38,4 +43,4 @@ def nuclear_scroll(driver, times=3, wait=1.5):
     """
     for _ in range(times):
         driver.execute_script(js_scroll_all)
-        time.sleep(wait)
\ No newline at end of file
+        waits.content_stable(driver, key="scroll_load", timeout=wait, raise_on_timeout=False)
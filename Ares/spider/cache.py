@@ -0,0 +1,247 @@
+"""
+頁面內容快取模組
+
+所有偵察器共用的本地 SQLite 快取，避免每天重新下載昨天已看過的論文：
+- 以網址或 PMID 為鍵，內容以 zlib 壓縮後儲存
+- 依頁面類型設定存活時間（搜尋結果很快過期，單篇論文內容可保存較久）
+- 過期的 HTTP 內容以 ETag / Last-Modified 向伺服器驗證，未變更（304）時直接沿用
+
+資料寫入本地檔案，因此重新執行 pipeline 與 all 例行任務時大多可直接命中。
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import urlencode
+
+import requests
+
+# 各頁面類型的存活秒數；未列出的類型使用 "default"
+DEFAULT_TTLS: Dict[str, float] = {
+    'search': 6 * 3600,         # 搜尋結果（ESearch、結果頁面）會隨新論文出現而變動
+    'paper': 30 * 24 * 3600,    # 單篇論文的標題與摘要（EFetch）幾乎不會改變
+    'detail': 30 * 24 * 3600,   # 論文詳細頁面
+    'default': 24 * 3600,
+}
+
+
+def cache_key(url: str, params: dict = None, exclude: Iterable[str] = ("api_key", "email", "tool")) -> str:
+    """
+    以網址與排序後的參數組成快取鍵（排除 API 金鑰等不影響內容的參數）。
+
+    Args:
+        url: 請求網址
+        params: 查詢參數
+        exclude: 不納入快取鍵的參數名稱
+    """
+    if not params:
+        return url
+    kept = sorted((key, str(value)) for key, value in params.items() if key not in exclude)
+    return f"{url}?{urlencode(kept)}"
+
+
+@dataclass
+class CachedPage:
+    """快取中的頁面內容"""
+    body: bytes
+    kind: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """向伺服器驗證內容是否變更的條件式請求標頭。"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    頁面內容快取 - 壓縮儲存、依類型過期，並支援 HTTP 條件式驗證。
+    """
+
+    def __init__(
+        self,
+        path: str = "./ares_page_cache.sqlite3",
+        ttls: Dict[str, float] = None,
+        keep_stale: float = 30 * 24 * 3600,
+        compress_level: int = 6
+    ):
+        """
+        Args:
+            path: SQLite 檔案路徑。預設為 ./ares_page_cache.sqlite3。
+            ttls: 各頁面類型的存活秒數，會覆蓋 DEFAULT_TTLS 中的同名項目。
+            keep_stale: 過期後仍保留多久（秒），供條件式驗證使用；超過後由 prune() 刪除。
+            compress_level: zlib 壓縮等級（1–9）。
+        """
+        self.path = Path(path)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.keep_stale = keep_stale
+        self.compress_level = compress_level
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0}
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 抓取器以多執行緒並行下載，因此共用連線並以鎖保護
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS pages (
+                    key_hash TEXT PRIMARY KEY,
+                    key TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_expires ON pages(expires_at)")
+
+    @staticmethod
+    def _hash(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, kind: str) -> float:
+        return self.ttls.get(kind, self.ttls['default'])
+
+    def get(self, key: str) -> Optional[CachedPage]:
+        """
+        取得快取內容（包含已過期、可供條件式驗證的內容）。
+
+        Returns:
+            CachedPage 或 None（沒有快取時）
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, kind, etag, last_modified, fetched_at, expires_at FROM pages WHERE key_hash = ?",
+                (self._hash(key),)
+            ).fetchone()
+        if row is None:
+            return None
+        body, kind, etag, last_modified, fetched_at, expires_at = row
+        return CachedPage(zlib.decompress(body), kind, etag, last_modified, fetched_at, expires_at)
+
+    def get_fresh(self, key: str) -> Optional[bytes]:
+        """只回傳尚未過期的內容並計入命中統計；沒有或已過期時回傳 None。"""
+        page = self.get(key)
+        with self._lock:
+            if page is not None and page.fresh:
+                self._stats['hits'] += 1
+                return page.body
+            self._stats['misses'] += 1
+        return None
+
+    def put(self, key: str, body: bytes, kind: str = "default", etag: str = None, last_modified: str = None) -> None:
+        """儲存內容（壓縮後寫入），存活時間依 kind 決定。"""
+        now = time.time()
+        compressed = zlib.compress(body, self.compress_level)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._hash(key), key, kind, compressed, etag, last_modified, now, now + self.ttl_for(kind))
+            )
+            self._stats['stored'] += 1
+
+    def touch(self, key: str, kind: str) -> None:
+        """伺服器確認內容未變更（304）時延長存活時間。"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, expires_at = ? WHERE key_hash = ?",
+                (now, now + self.ttl_for(kind), self._hash(key))
+            )
+
+    def fetch(self, key: str, kind: str, send: Callable[[Dict[str, str]], requests.Response]) -> bytes:
+        """
+        取得內容：未過期時直接回傳快取；過期時以條件式請求驗證；沒有快取時下載並儲存。
+
+        Args:
+            key: 快取鍵（網址或 PMID，可用 cache_key() 產生）
+            kind: 頁面類型（決定存活時間）
+            send: 接收額外請求標頭、回傳 requests.Response 的函式
+
+        Returns:
+            bytes: 頁面內容
+
+        Raises:
+            requests.HTTPError: 伺服器回傳錯誤狀態時（由 raise_for_status 拋出）。
+        """
+        page = self.get(key)
+        if page is not None and page.fresh:
+            with self._lock:
+                self._stats['hits'] += 1
+            return page.body
+
+        response = send(page.conditional_headers() if page is not None else {})
+        if response.status_code == 304 and page is not None:
+            self.touch(key, kind)
+            with self._lock:
+                self._stats['revalidated'] += 1
+            return page.body
+
+        response.raise_for_status()
+        with self._lock:
+            self._stats['misses'] += 1
+        self.put(key, response.content, kind,
+                 etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'))
+        return response.content
+
+    def prune(self) -> int:
+        """刪除過期超過 keep_stale 秒的內容，回傳刪除筆數。"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM pages WHERE expires_at < ?", (time.time() - self.keep_stale,))
+            return cursor.rowcount
+
+    def clear(self, kind: str = None) -> None:
+        """清除所有（或指定類型的）快取內容。"""
+        with self._lock, self._conn:
+            if kind is None:
+                self._conn.execute("DELETE FROM pages")
+            else:
+                self._conn.execute("DELETE FROM pages WHERE kind = ?", (kind,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """命中、未命中、條件式驗證成功與寫入次數，以及命中率。"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses'] + stats['revalidated']
+        stats['hit_rate'] = (stats['hits'] + stats['revalidated']) / lookups if lookups else 0.0
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_shared_cache: Optional[PageCache] = None
+_shared_lock = threading.Lock()
+
+
+def shared_page_cache() -> PageCache:
+    """取得行程共用的頁面快取（./ares_page_cache.sqlite3），供所有偵察器使用。"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = PageCache()
+        return _shared_cache
@@ -2,14 +2,141 @@ from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from functools import wraps
+import inspect
+import os
+import threading
 import time
 
-def setup_driver(headless=False, off_screen=True, load_images=True):
-    """通用瀏覽器啟動器"""
+from .resilience import RetryPolicy, resilient
+
+# ChromeDriverManager().install() 每次都會查詢版本並檢查下載，結果快取在記憶體與磁碟上
+DRIVER_PATH_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "ares", "chromedriver_path")
+DRIVER_PATH_TTL = 7 * 24 * 3600  # 一週後重新向 webdriver-manager 查詢
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+def resolve_driver_path(refresh=False):
+    """
+    取得 chromedriver 執行檔路徑（快取結果，避免每次啟動都呼叫 webdriver-manager）
+
+    優先順序：環境變數 ARES_CHROMEDRIVER → 記憶體快取 → 磁碟快取（一週內有效）→ ChromeDriverManager().install()
+
+    Args:
+        refresh: 忽略快取重新向 webdriver-manager 查詢（例如 Chrome 更新後版本不符）
+    """
+    global _driver_path
+    override = os.environ.get("ARES_CHROMEDRIVER")
+    if override:
+        return override
+
+    with _driver_path_lock:
+        if not refresh and _driver_path and os.path.exists(_driver_path):
+            return _driver_path
+
+        if not refresh:
+            try:
+                if time.time() - os.path.getmtime(DRIVER_PATH_CACHE) < DRIVER_PATH_TTL:
+                    with open(DRIVER_PATH_CACHE, encoding="utf-8") as f:
+                        cached = f.read().strip()
+                    if cached and os.path.exists(cached):
+                        _driver_path = cached
+                        return _driver_path
+            except OSError:
+                pass
+
+        _driver_path = ChromeDriverManager().install()
+        try:
+            os.makedirs(os.path.dirname(DRIVER_PATH_CACHE), exist_ok=True)
+            with open(DRIVER_PATH_CACHE, "w", encoding="utf-8") as f:
+                f.write(_driver_path)
+        except OSError as e:
+            print(f"[Driver] 無法寫入 chromedriver 路徑快取: {e}")
+        return _driver_path
+
+# 精簡模式（profile="lean"）封鎖的資源：字型、樣式表、圖片、影音與常見的分析／廣告腳本
+LEAN_BLOCKED_URLS = [
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.css",
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*newrelic.com*", "*nr-data.net*",
+    "*/stat?*", "*siteimprove*",
+]
+
+# 精簡模式關閉的瀏覽器功能
+LEAN_DISABLED_FEATURES = [
+    "Translate", "OptimizationHints", "MediaRouter", "InterestFeedContentSuggestions",
+    "CalculateNativeWinOcclusion", "BackForwardCache", "AutofillServerCommunication",
+]
+
+LEAN_ARGUMENTS = [
+    "--disable-extensions",
+    "--disable-gpu",
+    "--disable-background-networking",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-component-update",
+    "--mute-audio",
+    "--no-first-run",
+    "--blink-settings=imagesEnabled=false",
+    "--disable-features=" + ",".join(LEAN_DISABLED_FEATURES),
+]
+
+PROFILES = ("default", "lean")
+
+# 瀏覽器端計算本頁（導覽 + 所有資源）實際傳輸的位元組數
+_TRANSFER_JS = """
+    var entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+    var total = 0;
+    for (var i = 0; i < entries.length; i++) { total += entries[i].transferSize || 0; }
+    return [total, entries.length];
+"""
+
+def page_transfer_bytes(driver):
+    """
+    回報目前頁面實際透過網路傳輸的位元組數（快取命中與被封鎖的資源不計入）
+
+    Returns:
+        dict: {'bytes': 傳輸位元組數, 'requests': 導覽與資源請求數}
+    """
+    try:
+        total, count = driver.execute_script(_TRANSFER_JS)
+        return {'bytes': int(total or 0), 'requests': int(count or 0)}
+    except Exception:
+        return {'bytes': 0, 'requests': 0}
+
+def setup_driver(headless=False, off_screen=True, load_images=True, profile="default",
+                 blocked_urls=None, memory_cap_mb=512):
+    """
+    通用瀏覽器啟動器
+
+    Args:
+        headless: 是否使用無頭模式
+        off_screen: 是否將視窗移到螢幕外
+        load_images: 是否載入圖片（lean 設定檔一律不載入）
+        profile: "default" 為原本的完整瀏覽器；"lean" 透過 DevTools Protocol 封鎖字型、樣式表、
+                 影音與分析腳本，關閉不需要的功能並限制 renderer 記憶體，適合大量平行抓取
+        blocked_urls: lean 設定檔封鎖的網址樣式。預設為 LEAN_BLOCKED_URLS。
+        memory_cap_mb: lean 設定檔中 V8 heap 的上限（MB）
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"未知的瀏覽器設定檔：{profile}（可用：{', '.join(PROFILES)}）")
+    lean = profile == "lean"
+
     options = webdriver.ChromeOptions()
     options.add_argument("--disable-blink-features=AutomationControlled")
     options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0 Safari/537.36")
-    options.add_argument("--start-maximized")
+    if lean:
+        for argument in LEAN_ARGUMENTS:
+            options.add_argument(argument)
+        options.add_argument(f"--js-flags=--max-old-space-size={int(memory_cap_mb)}")
+        options.add_argument("--renderer-process-limit=2")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--window-size=1280,800")
+        load_images = False
+    else:
+        options.add_argument("--start-maximized")
     
     if off_screen:
         options.add_argument("--window-position=-10000,0")
@@ -26,22 +153,51 @@ def setup_driver(headless=False, off_screen=True, load_images=True):
         prefs = {"profile.managed_default_content_settings.images": 2}
         options.add_experimental_option("prefs", prefs)
     
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
+    try:
+        driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=options)
+    except Exception:
+        # 快取的 chromedriver 可能已與更新後的 Chrome 版本不符，重新解析一次
+        if os.environ.get("ARES_CHROMEDRIVER"):
+            raise
+        driver = webdriver.Chrome(service=Service(resolve_driver_path(refresh=True)), options=options)
+
+    if lean:
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(blocked_urls or LEAN_BLOCKED_URLS)})
+        except Exception as e:
+            print(f"[Driver] 無法透過 DevTools Protocol 封鎖資源，改用完整載入: {e}")
     return driver
 
 def retry(times=3, delay=2):
-    """重試裝飾器"""
-    def decorator(func): 
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            for i in range(times):
+    """
+    重試裝飾器（保留舊介面：最終失敗時印出訊息並回傳 None）
+
+    改用 resilience 模組的指數退避 + jitter：delay 為第一次重試的退避上限，之後每次加倍；
+    程式錯誤（ValueError、KeyError 等）不重試。支援 async 函式。
+    需要例外往外傳、斷路器或自訂策略時請直接使用 Ares.spider.resilience.resilient。
+    """
+    policy = RetryPolicy(max_attempts=times, base_delay=delay, max_delay=max(delay * 8, delay))
+
+    def decorator(func):
+        guarded = resilient(policy=policy)(func)
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
                 try:
-                    return func(*args, **kwargs)
+                    return await guarded(*args, **kwargs)
                 except Exception as e:
-                    print(f"[Retry {i+1}/{times}] {func.__name__} 發生錯誤: {e}")
-                    time.sleep(delay)
-            print(f"{func.__name__} 最終失敗")
-            return None
+                    print(f"{func.__name__} 最終失敗: {e}")
+                    return None
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return guarded(*args, **kwargs)
+            except Exception as e:
+                print(f"{func.__name__} 最終失敗: {e}")
+                return None
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
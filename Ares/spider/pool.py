@@ -0,0 +1,282 @@
+"""
+瀏覽器驅動程式池模組
+
+Chrome 冷啟動每次需要 2–5 秒。DriverPool 預先啟動（預熱）數個瀏覽器並重複使用：
+- checkout()：以 context manager 借出瀏覽器，結束時自動歸還
+- 健康檢查：借出前執行一段 JavaScript，失去回應的瀏覽器直接汰換
+- 回收：使用超過 max_pages 次，或 JS heap 成長超過 max_memory_growth_mb 時關閉並重新啟動
+  （heap 一律在導向 about:blank 後量測，基準與歸還時的數值在相同的空白頁面下比較）
+
+shared_pool() 提供行程層級共用的池，讓多次 pipeline 執行共用同一批瀏覽器。
+"""
+import atexit
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from .core import setup_driver
+
+_HEAP_JS = "return (window.performance && performance.memory) ? performance.memory.usedJSHeapSize : 0;"
+_BLANK_URL = "about:blank"
+
+
+class _PooledDriver:
+    """池中的瀏覽器與其使用紀錄"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.baseline_heap = None
+        self.created_at = time.monotonic()
+
+
+class DriverPool:
+    """
+    瀏覽器驅動程式池 - 預熱、健康檢查與回收。
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        headless: bool = True,
+        max_pages: int = 50,
+        max_memory_growth_mb: float = 300.0,
+        prewarm: int = 0,
+        factory: Optional[Callable] = None,
+        **driver_options
+    ):
+        """
+        Args:
+            size: 同時存在的瀏覽器數量上限
+            headless: 是否使用無頭模式。預設為 True。
+            max_pages: 每個瀏覽器借出幾次（頁面工作）後回收
+            max_memory_growth_mb: JS heap 相對啟動時成長超過此值（MB）即回收
+            prewarm: 建立時在背景預先啟動的瀏覽器數量（不超過 size）
+            factory: 建立瀏覽器的函式。預設為 setup_driver(headless=..., **driver_options)。
+            **driver_options: 傳給 setup_driver 的其他參數
+        """
+        if size < 1:
+            raise ValueError("size 必須至少為 1")
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_growth_mb = max_memory_growth_mb
+        self.factory = factory or (lambda: setup_driver(headless=headless, **driver_options))
+
+        self._idle: List[_PooledDriver] = []
+        self._total = 0  # 已啟動（包含借出中與啟動中）的瀏覽器數
+        self._warming = 0  # 預熱中、尚未放入閒置池的瀏覽器數
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats = {'created': 0, 'recycled': 0, 'unhealthy': 0, 'checkouts': 0, 'wait_s': 0.0, 'startup_s': 0.0}
+
+        if prewarm:
+            # 先登記預熱名額，背景執行緒尚未開始前借出的請求也會等待預熱中的瀏覽器
+            count = self._reserve_warm(prewarm)
+            if count:
+                threading.Thread(target=self._warm, args=(count,), daemon=True).start()
+
+    def _launch(self) -> _PooledDriver:
+        start = time.perf_counter()
+        try:
+            entry = _PooledDriver(self.factory())
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['created'] += 1
+            self._stats['startup_s'] += time.perf_counter() - start
+        entry.baseline_heap = self._blank_heap_bytes(entry)
+        return entry
+
+    def prewarm(self, count: int = None) -> int:
+        """
+        並行啟動瀏覽器放入閒置池；每個瀏覽器啟動完成即可借出。
+
+        預熱期間借出瀏覽器時會等待預熱中的瀏覽器，而不是另外冷啟動一個。
+
+        Args:
+            count: 要預熱的數量。預設補滿到 size。
+
+        Returns:
+            int: 實際啟動的瀏覽器數量
+        """
+        count = self._reserve_warm(count)
+        return self._warm(count) if count else 0
+
+    def _reserve_warm(self, count: Optional[int]) -> int:
+        with self._cond:
+            count = min(count or self.size, self.size - self._total)
+            if self._closed or count <= 0:
+                return 0
+            self._total += count
+            self._warming += count
+            return count
+
+    def _warm(self, count: int) -> int:
+        def launch(_):
+            try:
+                entry = self._launch()
+            except Exception as e:
+                print(f"[DriverPool] 預熱瀏覽器失敗: {e}")
+                with self._cond:
+                    self._warming -= 1
+                    self._cond.notify_all()
+                return False
+            with self._cond:
+                self._warming -= 1
+                if not self._closed:
+                    self._idle.append(entry)
+                    self._cond.notify_all()
+                    return True
+                self._total -= 1
+            self._quit(entry)
+            return False
+
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            launched = sum(executor.map(launch, range(count)))
+        if launched:
+            print(f"[DriverPool] 已預熱 {launched} 個瀏覽器")
+        return launched
+
+    def _blank_heap_bytes(self, entry: _PooledDriver) -> int:
+        """導向 about:blank 後量測 JS heap，避免把目前頁面本身的記憶體算成成長量。"""
+        try:
+            entry.driver.get(_BLANK_URL)
+            return int(entry.driver.execute_script(_HEAP_JS) or 0)
+        except Exception:
+            return 0
+
+    def _healthy(self, entry: _PooledDriver) -> bool:
+        try:
+            return entry.driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    def _should_recycle(self, entry: _PooledDriver) -> bool:
+        if entry.pages >= self.max_pages:
+            return True
+        if entry.baseline_heap is not None and self.max_memory_growth_mb:
+            growth = (self._blank_heap_bytes(entry) - entry.baseline_heap) / (1024 * 1024)
+            return growth > self.max_memory_growth_mb
+        return False
+
+    def _quit(self, entry: _PooledDriver) -> None:
+        try:
+            entry.driver.quit()
+        except Exception as e:
+            print(f"[DriverPool] 關閉瀏覽器時發生錯誤: {e}")
+
+    def _discard(self, entry: _PooledDriver, reason: str) -> None:
+        self._quit(entry)
+        with self._cond:
+            self._total -= 1
+            self._stats[reason] += 1
+            self._cond.notify()
+
+    def _acquire(self, timeout: Optional[float]) -> _PooledDriver:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        start = time.perf_counter()
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("DriverPool 已關閉")
+                    if self._idle:
+                        entry, launch = self._idle.pop(), False
+                        break
+                    if self._total < self.size and not self._warming:
+                        self._total += 1
+                        entry, launch = None, True
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"等待瀏覽器逾時（{timeout} 秒，池大小 {self.size}）")
+                    self._cond.wait(remaining)
+                self._stats['wait_s'] += time.perf_counter() - start
+
+            if launch:
+                return self._launch()
+            if self._healthy(entry):
+                return entry
+            print("[DriverPool] 瀏覽器失去回應，已汰換")
+            self._discard(entry, 'unhealthy')
+
+    def _release(self, entry: _PooledDriver) -> None:
+        entry.pages += 1
+        if self._closed or self._should_recycle(entry):
+            self._discard(entry, 'recycled')
+            return
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None):
+        """
+        借出一個健康的瀏覽器，離開 with 區塊時歸還（或依使用量回收）。
+
+        Args:
+            timeout: 所有瀏覽器都在使用中時最長等待秒數；None 表示一直等待
+
+        Yields:
+            WebDriver
+
+        Raises:
+            TimeoutError: 在時限內沒有可用的瀏覽器時。
+            RuntimeError: 池已關閉時。
+        """
+        entry = self._acquire(timeout)
+        with self._cond:
+            self._stats['checkouts'] += 1
+        try:
+            yield entry.driver
+        finally:
+            self._release(entry)
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """啟動、回收、汰換與借出次數，以及累計等待／啟動秒數。"""
+        with self._cond:
+            return {**self._stats, 'idle': len(self._idle), 'total': self._total}
+
+    def close(self) -> None:
+        """關閉所有閒置的瀏覽器；借出中的瀏覽器在歸還時關閉。"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._quit(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+_shared_pools: Dict[tuple, DriverPool] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_pool(headless: bool = True, profile: str = "default", **kwargs) -> DriverPool:
+    """
+    取得行程層級共用的瀏覽器池（依 headless 與瀏覽器設定檔區分），程式結束時自動關閉。
+
+    Args:
+        headless: 是否使用無頭模式
+        profile: setup_driver 的瀏覽器設定檔（"default" / "lean"）
+        **kwargs: 第一次建立時傳給 DriverPool 的參數
+    """
+    key = (headless, profile)
+    with _shared_lock:
+        pool = _shared_pools.get(key)
+        if pool is None or pool._closed:
+            pool = _shared_pools[key] = DriverPool(headless=headless, profile=profile, **kwargs)
+            atexit.register(pool.close)
+        return pool
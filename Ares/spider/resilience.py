@@ -0,0 +1,344 @@
+"""
+重試與容錯模組
+
+- RetryPolicy：指數退避 + full jitter，並依例外類型判斷是否值得重試
+  （程式錯誤與 4xx 不重試；連線錯誤、逾時、429 與 5xx 重試，並尊重 Retry-After）
+- CircuitBreaker：同一主機連續失敗達門檻即「斷路」，在冷卻時間內直接失敗而不再打擾對方網站；
+  冷卻後放行一次試探請求（half-open），成功才恢復
+- resilient()：同時支援同步與 async 函式的裝飾器，並記錄重試次數與退避時間
+"""
+import asyncio
+import functools
+import inspect
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, Type
+from urllib.parse import urlparse
+
+import requests
+
+
+class CircuitOpenError(RuntimeError):
+    """斷路器開啟中，請求未送出即失敗。"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} 暫時停止請求（斷路器開啟，{retry_in:.1f} 秒後重試）")
+        self.host = host
+        self.retry_in = retry_in
+
+
+# 重試也不會成功的例外：程式錯誤與斷路器本身
+NON_RETRYABLE: Tuple[Type[BaseException], ...] = (
+    CircuitOpenError, ValueError, TypeError, KeyError, AttributeError, NotImplementedError, AssertionError,
+)
+# 暫時性的 HTTP 狀態碼
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    預設的例外分類。
+
+    HTTP 錯誤只重試 408／425／429 與 5xx；程式錯誤（ValueError、KeyError 等）與斷路器不重試；
+    其餘例外（連線、逾時、瀏覽器錯誤等）視為暫時性錯誤，與舊版 retry 相同會重試。
+
+    Returns:
+        bool: True 表示值得重試
+    """
+    if isinstance(exc, requests.HTTPError):
+        status = _status_code(exc)
+        return status is None or status in RETRYABLE_STATUS
+    return not isinstance(exc, NON_RETRYABLE)
+
+
+def is_host_failure(exc: BaseException) -> bool:
+    """是否代表對方主機異常（計入斷路器）：連線失敗、逾時與 429／5xx。"""
+    if isinstance(exc, requests.HTTPError):
+        status = _status_code(exc)
+        return status is None or status >= 500 or status == 429
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError))
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    重試策略 - 指數退避加上 full jitter（在 0 到上限之間隨機），避免大量請求同時重試。
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        multiplier: float = 2.0,
+        jitter: bool = True,
+        retry_on: Callable[[BaseException], bool] = is_retryable
+    ):
+        """
+        Args:
+            max_attempts: 最多嘗試次數（包含第一次）
+            base_delay: 第一次重試前的退避上限（秒）
+            max_delay: 單次退避的上限（秒）
+            multiplier: 每次重試退避上限的倍數
+            jitter: 是否在 0 到上限之間隨機退避。False 時使用固定的指數退避。
+            retry_on: 判斷例外是否值得重試的函式
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts 必須至少為 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retry_on = retry_on
+
+    def backoff(self, attempt: int, exc: BaseException = None) -> float:
+        """
+        第 attempt 次失敗（從 1 起算）後應退避的秒數。
+
+        伺服器回傳 Retry-After 時至少等待該秒數（仍受 max_delay 限制）。
+        """
+        ceiling = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        delay = random.uniform(0, ceiling) if self.jitter else ceiling
+        retry_after = _retry_after(exc) if exc is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def should_retry(self, exc: BaseException, attempt: int) -> bool:
+        return attempt < self.max_attempts and self.retry_on(exc)
+
+
+class CircuitBreaker:
+    """
+    斷路器 - closed（正常）→ 連續失敗 failure_threshold 次 → open（直接失敗）
+    → 經過 recovery_timeout 秒 → half_open（放行一個試探請求）→ 成功則 closed，失敗則再次 open。
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, name: str = ""):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.name = name
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = self.CLOSED
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """
+        請求前檢查斷路器。
+
+        Raises:
+            CircuitOpenError: 斷路器開啟中（或試探請求尚未完成）時。
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed >= self.recovery_timeout and not self._probe_in_flight:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = True
+                return
+            raise CircuitOpenError(self.name, max(0.0, self.recovery_timeout - elapsed))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                print(f"[Circuit] {self.name} 已恢復")
+            self._state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"[Circuit] {self.name} 連續失敗 {self.failures} 次，暫停請求 {self.recovery_timeout:.0f} 秒")
+                self._state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class CircuitBreakerRegistry:
+    """依主機名稱分別管理斷路器"""
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url_or_host: str) -> CircuitBreaker:
+        """回傳網址（或主機名稱）對應的斷路器。"""
+        host = urlparse(url_or_host).hostname or url_or_host
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.recovery_timeout, name=host)
+            return breaker
+
+    @property
+    def states(self) -> Dict[str, str]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.state for host, breaker in breakers.items()}
+
+
+class RetryMetrics:
+    """重試統計：呼叫、重試、最終失敗與斷路器拒絕次數，以及累計退避秒數。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {'calls': 0, 'retries': 0, 'failures': 0, 'circuit_rejections': 0, 'backoff_s': 0.0}
+
+    def add(self, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self._counts[key] += amount
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self) -> None:
+        with self._lock:
+            for key in self._counts:
+                self._counts[key] = 0
+
+
+# 行程共用的斷路器與統計
+circuit_breakers = CircuitBreakerRegistry()
+retry_metrics = RetryMetrics()
+
+
+class _Attempts:
+    """同步與 async 版本共用的重試流程狀態"""
+
+    def __init__(self, policy, breaker, metrics, name):
+        self.policy = policy
+        self.breaker = breaker
+        self.metrics = metrics
+        self.name = name
+        self.attempt = 0
+
+    def start(self) -> None:
+        self.attempt += 1
+        if self.attempt == 1:
+            self.metrics.add('calls')
+        if self.breaker is not None:
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self.metrics.add('circuit_rejections')
+                self.metrics.add('failures')
+                raise
+
+    def succeeded(self) -> None:
+        if self.breaker is not None:
+            self.breaker.record_success()
+
+    def failed(self, exc: BaseException) -> Optional[float]:
+        """記錄失敗；回傳重試前應退避的秒數，不再重試時回傳 None。"""
+        if self.breaker is not None and is_host_failure(exc):
+            self.breaker.record_failure()
+        elif self.breaker is not None:
+            self.breaker.record_success()  # 主機有回應（例如 404），不計入斷路器
+        if not self.policy.should_retry(exc, self.attempt):
+            self.metrics.add('failures')
+            return None
+        delay = self.policy.backoff(self.attempt, exc)
+        self.metrics.add('retries')
+        self.metrics.add('backoff_s', delay)
+        print(f"[Retry {self.attempt}/{self.policy.max_attempts}] {self.name} 發生錯誤: {exc}（{delay:.2f} 秒後重試）")
+        return delay
+
+
+def resilient(
+    policy: RetryPolicy = None,
+    host: str = None,
+    host_from: Callable[..., str] = None,
+    breakers: CircuitBreakerRegistry = None,
+    metrics: RetryMetrics = None
+):
+    """
+    重試 + 斷路器裝飾器，支援同步與 async 函式。
+
+    Args:
+        policy: 重試策略。預設為 RetryPolicy()。
+        host: 固定的主機名稱或網址（套用該主機的斷路器）
+        host_from: 由呼叫參數取得主機／網址的函式，例如 lambda self, url, **kw: url
+        breakers: 斷路器註冊表。預設為行程共用的 circuit_breakers。
+        metrics: 統計物件。預設為行程共用的 retry_metrics。
+
+    Raises:
+        最後一次嘗試的例外；斷路器開啟時為 CircuitOpenError。
+    """
+    policy = policy or RetryPolicy()
+    breakers = breakers or circuit_breakers
+    metrics = metrics or retry_metrics
+
+    def breaker_for(args, kwargs):
+        target = host_from(*args, **kwargs) if host_from else host
+        return breakers.get(target) if target else None
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                attempts = _Attempts(policy, breaker_for(args, kwargs), metrics, func.__name__)
+                while True:
+                    attempts.start()
+                    try:
+                        result = await func(*args, **kwargs)
+                    except Exception as e:
+                        delay = attempts.failed(e)
+                        if delay is None:
+                            raise
+                        await asyncio.sleep(delay)
+                        continue
+                    attempts.succeeded()
+                    return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            attempts = _Attempts(policy, breaker_for(args, kwargs), metrics, func.__name__)
+            while True:
+                attempts.start()
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    delay = attempts.failed(e)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+                    continue
+                attempts.succeeded()
+                return result
+        return wrapper
+
+    return decorator
@@ -0,0 +1,299 @@
+"""
+等待策略模組
+
+以「條件成立就繼續」取代固定秒數的 sleep：
+- dom_ready：document.readyState 為 complete
+- network_idle：一段時間內沒有新的資源請求
+- element_stable：元素存在且位置／大小不再變動（例如捲動動畫結束）
+- content_stable：頁面高度不再增加（無限捲動載入完成）
+
+逾時時間依實際觀察到的頁面耗時自動調整（EWMA，與 TCP RTO 相同的估算方式），
+每次等待實際花費的時間都會寫入 ares_logger。
+
+TimingProfile 控制模擬真人的延遲：可信任的來源（例如 PubMed）使用 "fast" 設定檔，
+完全不加入人為延遲。
+"""
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from Ares.utils.logger import ares_logger
+
+# 瀏覽器端目前已發出的資源請求數
+_RESOURCE_COUNT_JS = "return performance.getEntriesByType('resource').length;"
+_READY_STATE_JS = "return document.readyState;"
+_SCROLL_HEIGHT_JS = "return document.body ? document.body.scrollHeight : 0;"
+
+
+@dataclass(frozen=True)
+class TimingProfile:
+    """
+    模擬真人操作的延遲設定
+
+    Attributes:
+        name: 設定檔名稱
+        type_delay: 逐字輸入時每個字元的隨機延遲範圍（秒）；None 表示一次輸入整段文字
+        action_pause: 點擊、輸入等動作之後的隨機停頓範圍（秒）
+    """
+    name: str
+    type_delay: Optional[Tuple[float, float]] = None
+    action_pause: Tuple[float, float] = (0.0, 0.0)
+
+    @property
+    def human(self) -> bool:
+        return self.type_delay is not None or self.action_pause[1] > 0
+
+
+PROFILES: Dict[str, TimingProfile] = {
+    # 原本的行為：逐字輸入並在動作之間短暫停頓
+    "human": TimingProfile("human", type_delay=(0.05, 0.2), action_pause=(0.2, 0.6)),
+    # 可信任的來源：不加入任何人為延遲
+    "fast": TimingProfile("fast"),
+}
+
+
+def get_profile(profile) -> TimingProfile:
+    """
+    取得時間設定檔。
+
+    Args:
+        profile: 設定檔名稱（"human" / "fast"）或 TimingProfile 實例
+
+    Raises:
+        ValueError: 名稱不存在時。
+    """
+    if isinstance(profile, TimingProfile):
+        return profile
+    if profile not in PROFILES:
+        raise ValueError(f"未知的時間設定檔：{profile}（可用：{', '.join(PROFILES)}）")
+    return PROFILES[profile]
+
+
+class AdaptiveTimeout:
+    """
+    依觀察到的耗時自動調整的逾時估算器
+
+    timeout = 平均耗時 + 4 × 平均偏差（EWMA），並限制在 [min_timeout, max_timeout] 之間。
+    尚無觀察資料時使用 max_timeout。
+    """
+
+    def __init__(self, min_timeout: float = 2.0, max_timeout: float = 30.0, alpha: float = 0.125, beta: float = 0.25):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.alpha = alpha
+        self.beta = beta
+        self.mean: Optional[float] = None
+        self.deviation = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """記錄一次成功等待的耗時。"""
+        if self.mean is None:
+            self.mean, self.deviation = seconds, seconds / 2
+            return
+        self.deviation = (1 - self.beta) * self.deviation + self.beta * abs(seconds - self.mean)
+        self.mean = (1 - self.alpha) * self.mean + self.alpha * seconds
+
+    @property
+    def timeout(self) -> float:
+        if self.mean is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.mean + 4 * self.deviation))
+
+
+class WaitStrategy:
+    """
+    條件式等待策略 - 每種等待（以 key 區分）各自學習逾時時間，並統計實際耗時。
+    """
+
+    def __init__(
+        self,
+        profile="human",
+        min_timeout: float = 2.0,
+        max_timeout: float = 30.0,
+        poll_frequency: float = 0.1,
+        logger=None
+    ):
+        """
+        Args:
+            profile: 時間設定檔名稱或 TimingProfile。預設為 "human"（保留原本的真人模擬延遲）。
+            min_timeout / max_timeout: 自動調整逾時的上下限（秒）
+            poll_frequency: 檢查條件的間隔（秒）
+            logger: 記錄等待耗時的 logger。預設為 ares_logger。
+        """
+        self.profile = get_profile(profile)
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.poll_frequency = poll_frequency
+        self.logger = logger or ares_logger
+        self._timeouts: Dict[str, AdaptiveTimeout] = {}
+        self._stats: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def timeout_for(self, key: str) -> float:
+        """目前對該等待使用的逾時秒數。"""
+        with self._lock:
+            estimator = self._timeouts.get(key)
+            if estimator is None:
+                estimator = self._timeouts[key] = AdaptiveTimeout(self.min_timeout, self.max_timeout)
+            return estimator.timeout
+
+    def _record(self, key: str, elapsed: float, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                self._timeouts[key].observe(elapsed)
+            entry = self._stats.setdefault(key, {'count': 0, 'timeouts': 0, 'total_s': 0.0})
+            entry['count'] += 1
+            entry['timeouts'] += 0 if ok else 1
+            entry['total_s'] += elapsed
+
+    def until(self, driver, condition: Callable, key: str, timeout: float = None, raise_on_timeout: bool = True):
+        """
+        等待條件成立並記錄耗時。
+
+        Args:
+            driver: WebDriver
+            condition: 接收 driver 的條件函式（與 WebDriverWait.until 相同）
+            key: 等待類型名稱（各自學習逾時時間與統計）
+            timeout: 指定逾時秒數；None 表示使用自動調整的值
+            raise_on_timeout: 逾時時是否拋出 TimeoutException；False 時回傳 None
+
+        Returns:
+            條件函式最後回傳的真值
+        """
+        limit = timeout if timeout is not None else self.timeout_for(key)
+        start = time.perf_counter()
+        try:
+            result = WebDriverWait(driver, limit, poll_frequency=self.poll_frequency).until(condition)
+        except TimeoutException:
+            elapsed = time.perf_counter() - start
+            if timeout is None:
+                self._record(key, elapsed, ok=False)
+            self.logger.info(f"⏱️ [Wait] {key} 逾時：{elapsed:.2f}s（上限 {limit:.1f}s）")
+            if raise_on_timeout:
+                raise
+            return None
+
+        elapsed = time.perf_counter() - start
+        if timeout is None:
+            self._record(key, elapsed, ok=True)
+        else:
+            with self._lock:
+                entry = self._stats.setdefault(key, {'count': 0, 'timeouts': 0, 'total_s': 0.0})
+                entry['count'] += 1
+                entry['total_s'] += elapsed
+        self.logger.info(f"⏱️ [Wait] {key}：{elapsed:.2f}s（上限 {limit:.1f}s）")
+        return result
+
+    def dom_ready(self, driver, key: str = "dom_ready", **kwargs):
+        """等待 document.readyState 為 complete。"""
+        return self.until(driver, lambda d: d.execute_script(_READY_STATE_JS) == "complete", key, **kwargs)
+
+    def network_idle(self, driver, idle_time: float = 0.5, key: str = "network_idle", **kwargs):
+        """等待頁面載入完成，且 idle_time 秒內沒有新的資源請求。"""
+        state = {'count': -1, 'since': time.monotonic()}
+
+        def idle(d):
+            if d.execute_script(_READY_STATE_JS) != "complete":
+                state['since'] = time.monotonic()
+                return False
+            count = d.execute_script(_RESOURCE_COUNT_JS)
+            now = time.monotonic()
+            if count != state['count']:
+                state['count'], state['since'] = count, now
+                return False
+            return now - state['since'] >= idle_time
+
+        return self.until(driver, idle, key, **kwargs)
+
+    def element_stable(self, driver, locator_or_element, stable_time: float = 0.2, key: str = "element_stable", **kwargs):
+        """
+        等待元素存在，且位置與大小在 stable_time 秒內沒有變動。
+
+        Args:
+            locator_or_element: (By, value) 定位器或 WebElement
+
+        Returns:
+            WebElement: 穩定後的元素
+        """
+        state = {'rect': None, 'since': time.monotonic()}
+
+        def stable(d):
+            try:
+                if isinstance(locator_or_element, tuple):
+                    element = EC.presence_of_element_located(locator_or_element)(d)
+                else:
+                    element = locator_or_element
+                rect = element.rect
+            except StaleElementReferenceException:
+                return False
+            now = time.monotonic()
+            if rect != state['rect']:
+                state['rect'], state['since'] = rect, now
+                return False
+            return element if now - state['since'] >= stable_time else False
+
+        return self.until(driver, stable, key, **kwargs)
+
+    def content_stable(self, driver, stable_time: float = 0.3, key: str = "content_stable", **kwargs):
+        """等待頁面高度在 stable_time 秒內不再增加（例如捲動觸發的延遲載入完成）。"""
+        state = {'height': None, 'since': time.monotonic()}
+
+        def stable(d):
+            height = d.execute_script(_SCROLL_HEIGHT_JS)
+            now = time.monotonic()
+            if height != state['height']:
+                state['height'], state['since'] = height, now
+                return False
+            return now - state['since'] >= stable_time
+
+        return self.until(driver, stable, key, **kwargs)
+
+    def pause(self) -> float:
+        """依設定檔加入動作之間的真人停頓（fast 設定檔不停頓），回傳停頓秒數。"""
+        low, high = self.profile.action_pause
+        if high <= 0:
+            return 0.0
+        seconds = random.uniform(low, high)
+        time.sleep(seconds)
+        return seconds
+
+    def type_text(self, element, text: str) -> None:
+        """依設定檔輸入文字：human 逐字輸入並隨機延遲，fast 一次送出整段文字。"""
+        if self.profile.type_delay is None:
+            element.send_keys(str(text))
+            return
+        low, high = self.profile.type_delay
+        for char in str(text):
+            element.send_keys(char)
+            time.sleep(random.uniform(low, high))
+
+    @property
+    def stats(self) -> Dict[str, dict]:
+        """每種等待的次數、逾時次數、累計秒數與目前的逾時上限。"""
+        with self._lock:
+            return {
+                key: {**entry, 'timeout_s': self._timeouts[key].timeout if key in self._timeouts else None}
+                for key, entry in self._stats.items()
+            }
+
+    def total_seconds(self) -> float:
+        """所有等待累計花費的秒數。"""
+        with self._lock:
+            return sum(entry['total_s'] for entry in self._stats.values())
+
+
+_default_strategy = None
+
+
+def default_waits() -> WaitStrategy:
+    """Spider 動作共用的預設等待策略（human 設定檔）。"""
+    global _default_strategy
+    if _default_strategy is None:
+        _default_strategy = WaitStrategy()
+    return _default_strategy
@@ -0,0 +1,199 @@
+"""
+LLM 回應正規化模組
+
+AresChatbot 與 ResearchEditor 共用的單次回應解析器：
+- extract_text：從 AIMessage / 列表 / 字典 / 字串中取出純文字，
+  常見的 AIMessage.content 字串與 parts 列表走快速路徑，不做任何正則掃描
+- parse_json：解析結構化輸出（JSON 模式），失敗時才依序嘗試修復
+
+所有正則表達式都在模組載入時預先編譯。
+"""
+import ast
+import json
+import re
+from typing import Any, Union
+
+# 只有這些 part 類型會被視為回答文字（忽略 thinking、extras、signature 等）
+_TEXT_PART_TYPES = (None, 'text')
+
+# 看起來像是「字典／列表的字串表示」的回應（例如 "{'type': 'text', 'text': '...', 'extras': {...}}"）
+_REPR_PREFIX = re.compile(r"""^\s*[\[{]\s*[{'"]""")
+_REPR_MARKERS = ("'extras'", '"extras"', "'signature'", '"signature"', "'type':", '"type":')
+
+# 從無法 literal_eval 的字串表示中擷取 text 欄位（雙引號、單引號、寬鬆模式）
+_TEXT_FIELD_PATTERNS = (
+    re.compile(r'["\']text["\']\s*:\s*"((?:[^"\\]|\\.)*)"', re.DOTALL),
+    re.compile(r'["\']text["\']\s*:\s*\'((?:[^\'\\]|\\.)*)\'', re.DOTALL),
+    re.compile(r'["\']text["\']\s*:\s*["\']((?:[^"\']|\\["\'])+?)(?:["\']\s*,\s*["\']extras["\']|["\']\s*[,}])', re.DOTALL),
+)
+_ESCAPES = {'\\n': '\n', "\\'": "'", '\\"': '"'}
+_ESCAPE_PATTERN = re.compile(r"""\\n|\\'|\\\"""")
+
+# JSON 修復用
+_CODE_FENCE = re.compile(r'```(?:json|JSON)?\s*')
+_SINGLE_QUOTED_KEY = re.compile(r"'([^']+)'(\s*):")
+_SINGLE_QUOTED_VALUE = re.compile(r"(:\s*|,\s*)'([^']*)'(\s*[,}\]])")
+_TRAILING_COMMA = re.compile(r',(\s*[}\]])')
+
+
+def _unescape(text: str) -> str:
+    return _ESCAPE_PATTERN.sub(lambda m: _ESCAPES[m.group()], text)
+
+
+def _text_from_parts(parts: list) -> str:
+    """合併 content parts 列表中的文字片段。"""
+    texts = []
+    for part in parts:
+        if isinstance(part, str):
+            texts.append(part)
+        elif isinstance(part, dict):
+            if part.get('type') in _TEXT_PART_TYPES and isinstance(part.get('text'), str):
+                texts.append(part['text'])
+        else:
+            texts.append(extract_text(part))
+    return "".join(texts)
+
+
+def _unwrap_repr(text: str) -> str:
+    """處理被轉成字串的字典／列表表示，取出其中的 text 欄位。"""
+    try:
+        parsed = ast.literal_eval(text.strip())
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        parsed = None
+
+    if isinstance(parsed, (dict, list)):
+        unwrapped = extract_text(parsed)
+        if unwrapped:
+            return unwrapped
+
+    for pattern in _TEXT_FIELD_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return _unescape(match.group(1))
+    return text
+
+
+def looks_like_repr(text: str) -> bool:
+    """判斷字串是否為字典／列表的字串表示（而非一般回答或 JSON 結果）。"""
+    return bool(_REPR_PREFIX.match(text)) and any(marker in text for marker in _REPR_MARKERS)
+
+
+def extract_text(response: Any) -> str:
+    """
+    從 LLM 回應中取出純文字。
+
+    支援的形狀：
+        - AIMessage / AIMessageChunk（content 為字串或 parts 列表）
+        - parts 列表：[{'type': 'text', 'text': '...', 'extras': {...}}, ...]
+        - 字典：{'text': ...} 或 {'content': ...}
+        - 字串（包含被轉成字串的字典表示）
+
+    Args:
+        response: LLM 回傳的任意物件
+
+    Returns:
+        str: 去除前後空白的純文字（無法取出時為空字串）
+    """
+    # 快速路徑：AIMessage.content 為字串
+    content = getattr(response, 'content', response)
+    if isinstance(content, str):
+        text = content
+    elif isinstance(content, list):
+        text = _text_from_parts(content)
+    elif isinstance(content, dict):
+        value = content.get('text', content.get('content'))
+        text = extract_text(value) if value is not None else ""
+    elif content is None:
+        text = ""
+    elif hasattr(content, 'text') and isinstance(content.text, str):
+        text = content.text
+    else:
+        text = str(content)
+
+    # 慢速路徑：只在看起來像字典字串表示時才進行解析
+    if text and looks_like_repr(text):
+        text = _unwrap_repr(text)
+    return text.strip()
+
+
+def _first_balanced(text: str, opener: str) -> str:
+    """取出第一個完整的 JSON 物件或陣列（會略過字串中的括號）。"""
+    closer = '}' if opener == '{' else ']'
+    start = text.find(opener)
+    if start == -1:
+        return text
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if escape:
+            escape = False
+        elif char == '\\':
+            escape = True
+        elif char == '"':
+            in_string = not in_string
+        elif not in_string:
+            if char == opener:
+                depth += 1
+            elif char == closer:
+                depth -= 1
+                if depth == 0:
+                    return text[start:i + 1]
+    return text[start:]
+
+
+def _repair_json(text: str) -> str:
+    """修復常見的 JSON 格式問題（單引號鍵值、結尾逗號）。"""
+    text = _SINGLE_QUOTED_KEY.sub(r'"\1"\2:', text)
+    text = _SINGLE_QUOTED_VALUE.sub(lambda m: f'{m.group(1)}"{m.group(2)}"{m.group(3)}', text)
+    return _TRAILING_COMMA.sub(r'\1', text)
+
+
+def parse_json(response: Any, expect: type = dict) -> Union[dict, list]:
+    """
+    解析 LLM 的結構化（JSON）輸出。
+
+    依序嘗試：直接 json.loads（JSON 模式的常見情況）→ 去除 markdown 程式碼區塊並擷取
+    第一個完整物件 → 修復單引號與結尾逗號 → ast.literal_eval。
+
+    Args:
+        response: LLM 回應物件或已取出的文字
+        expect: 期望的最外層型別（dict 或 list）
+
+    Returns:
+        Union[dict, list]: 解析結果
+
+    Raises:
+        ValueError: 所有策略都失敗，或結果型別不符時。錯誤訊息包含原始回應前 300 字元。
+    """
+    text = extract_text(response)
+    if not text:
+        raise ValueError("AI 回應為空")
+
+    opener = '[' if expect is list else '{'
+    candidates = [text]
+    if text[0] != opener or text[-1] not in '}]':
+        unfenced = _CODE_FENCE.sub('', text).strip()
+        candidates.append(_first_balanced(unfenced, opener))
+
+    last_error = None
+    for candidate in candidates:
+        for attempt in (candidate, _repair_json(candidate)):
+            try:
+                result = json.loads(attempt)
+            except json.JSONDecodeError as e:
+                last_error = e
+                continue
+            if isinstance(result, expect):
+                return result
+            last_error = TypeError(f"型別為 {type(result).__name__}")
+
+    try:
+        result = ast.literal_eval(candidates[-1])
+        if isinstance(result, expect):
+            return result
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        pass
+
+    raise ValueError(f"JSON 解析失敗：{last_error}。原始回應前 300 字元：{text[:300]}")
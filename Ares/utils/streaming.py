@@ -0,0 +1,302 @@
+"""
+串流處理管線模組
+
+以有界佇列串接的多階段生產者／消費者管線：
+- 來源（例如分頁搜尋）在獨立執行緒中逐筆產生資料，下游一收到就開始處理
+- 每個階段有自己的工作執行緒數量；佇列滿時上游阻塞等待（背壓），記憶體用量有上限
+- 階段可一次取出佇列中已到達的多筆資料（不等待湊滿），讓批次處理與低延遲兼顧
+- 每個階段記錄處理筆數、錯誤數、忙碌時間、吞吐量與延遲（從進入佇列到處理完成）
+
+資料以來源產生的順序編號，run() 依原順序回傳最後一個階段的輸出。
+資料不會在管線中遺失：handler 失敗時改為逐筆重試，單筆仍失敗則以階段的 on_error 產生預設輸出；
+來源中途失敗時，已產生的資料照常處理完畢並回傳，錯誤記錄在 source_error。
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_DONE = object()
+
+
+class _Item:
+    """管線中流動的資料與其時間戳記"""
+
+    __slots__ = ('index', 'value', 'created_at', 'enqueued_at')
+
+    def __init__(self, index: int, value: Any, created_at: float):
+        self.index = index
+        self.value = value
+        self.created_at = created_at
+        self.enqueued_at = created_at
+
+
+class StageStats:
+    """單一階段的處理統計（執行緒安全）"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.errors = 0
+        self.calls = 0
+        self.busy_s = 0.0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.first_output_s: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, count: int, busy: float, latencies: List[float], since_start: float) -> None:
+        with self._lock:
+            self.items += count
+            self.calls += 1
+            self.busy_s += busy
+            self.latency_total += sum(latencies)
+            self.latency_max = max([self.latency_max] + latencies)
+            if self.first_output_s is None and count:
+                self.first_output_s = since_start
+
+    def record_error(self, count: int) -> None:
+        with self._lock:
+            self.errors += count
+
+    def snapshot(self, elapsed: float) -> Dict[str, Any]:
+        """
+        Args:
+            elapsed: 管線總執行秒數（用於計算吞吐量）
+
+        Returns:
+            Dict[str, Any]: 筆數、錯誤數、呼叫次數、忙碌秒數、吞吐量（筆/秒）、
+                            平均與最大延遲（秒），以及第一筆輸出的時間（從管線開始起算）
+        """
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'items': self.items,
+                'errors': self.errors,
+                'calls': self.calls,
+                'busy_s': round(self.busy_s, 3),
+                'throughput': round(self.items / elapsed, 3) if elapsed > 0 else 0.0,
+                'avg_latency_s': round(self.latency_total / self.items, 3) if self.items else 0.0,
+                'max_latency_s': round(self.latency_max, 3),
+                'first_output_s': None if self.first_output_s is None else round(self.first_output_s, 3),
+            }
+
+
+class Stage:
+    """
+    管線階段 - handler 接收一批資料（list），回傳同樣長度、依序對應的輸出。
+
+    handler 拋出例外（或回傳筆數不符）時，該批資料改為逐筆重新處理；單筆仍失敗時計為錯誤，
+    並以 on_error(資料, 例外) 的回傳值作為輸出（未提供 on_error 時原樣傳給下一個階段），不會丟棄資料。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[List[Any]], List[Any]],
+        workers: int = 1,
+        queue_size: int = 8,
+        batch_size: int = 1,
+        on_error: Optional[Callable[[Any, BaseException], Any]] = None
+    ):
+        """
+        Args:
+            name: 階段名稱（用於統計與日誌）
+            handler: 處理一批資料的函式
+            workers: 工作執行緒數量
+            queue_size: 輸入佇列容量（背壓上限）
+            batch_size: 每次最多取出的資料筆數；只取佇列中已到達的資料，不等待湊滿
+            on_error: 單筆資料處理失敗時產生預設輸出的函式。預設為原樣輸出該筆資料。
+        """
+        if workers < 1 or queue_size < 1 or batch_size < 1:
+            raise ValueError("workers、queue_size 與 batch_size 必須至少為 1")
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.on_error = on_error
+
+    def fallback(self, value: Any, error: BaseException) -> Any:
+        """單筆資料失敗時的輸出；on_error 本身失敗時原樣輸出。"""
+        if self.on_error is None:
+            return value
+        try:
+            return self.on_error(value, error)
+        except Exception as e:
+            print(f"[Pipeline] {self.name} 產生預設輸出失敗：{e}")
+            return value
+
+    def process(self, values: List[Any]) -> List[Any]:
+        """呼叫 handler 並檢查輸出筆數。"""
+        outputs = self.handler(values)
+        if len(outputs) != len(values):
+            raise ValueError(f"{self.name} 回傳 {len(outputs)} 筆輸出，預期 {len(values)} 筆")
+        return list(outputs)
+
+
+class StreamingPipeline:
+    """
+    多階段串流管線 - 來源 → 階段 1 → 階段 2 → ... → 依原順序收集輸出。
+    """
+
+    def __init__(self, stages: List[Stage], source_name: str = "source"):
+        """
+        Args:
+            stages: 依序執行的階段
+            source_name: 來源在統計中的名稱
+        """
+        if not stages:
+            raise ValueError("至少需要一個階段")
+        self.stages = stages
+        self.source_name = source_name
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        # 最近一次 run() 中來源拋出的例外（來源正常結束時為 None）
+        self.source_error: Optional[Exception] = None
+
+    def _take(self, inbox: queue.Queue, batch_size: int) -> List[Any]:
+        """阻塞取得第一筆，再取出佇列中已到達的資料（最多 batch_size 筆，遇到結束標記即停止）。"""
+        batch = [inbox.get()]
+        while len(batch) < batch_size and batch[-1] is not _DONE:
+            try:
+                batch.append(inbox.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _process_batch(self, stage: Stage, stats: StageStats, values: List[Any]) -> List[Any]:
+        """處理一批資料；整批失敗時逐筆重試，單筆仍失敗則改用 stage.fallback()。"""
+        try:
+            return stage.process(values)
+        except Exception as e:
+            if len(values) == 1:
+                return [self._recover(stage, stats, values[0], e)]
+            print(f"[Pipeline] {stage.name} 批次處理 {len(values)} 筆資料失敗，改為逐筆處理：{e}")
+        outputs = []
+        for value in values:
+            try:
+                outputs.extend(stage.process([value]))
+            except Exception as e:
+                outputs.append(self._recover(stage, stats, value, e))
+        return outputs
+
+    def _recover(self, stage: Stage, stats: StageStats, value: Any, error: BaseException) -> Any:
+        print(f"[Pipeline] {stage.name} 處理資料失敗：{error}")
+        stats.record_error(1)
+        return stage.fallback(value, error)
+
+    def run(self, source: Iterable[Any]) -> List[Any]:
+        """
+        執行管線直到來源耗盡、所有資料流經每個階段。
+
+        Args:
+            source: 產生輸入資料的可迭代物件（在背景執行緒中迭代）
+
+        Returns:
+            List[Any]: 最後一個階段的輸出，依來源產生的順序排列。來源中途失敗時為已產生資料的
+                       處理結果（部分結果），例外記錄在 self.source_error。
+
+        Raises:
+            BaseException: 來源或工作執行緒遇到非 Exception 的例外（例如 KeyboardInterrupt）時，
+                           待管線排空後重新拋出。
+        """
+        start = time.perf_counter()
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        queues.append(queue.Queue())  # 最後一個階段的輸出由主執行緒收集
+        source_stats = StageStats(self.source_name, 1)
+        stage_stats = [StageStats(stage.name, stage.workers) for stage in self.stages]
+        source_error: List[BaseException] = []
+        fatal_errors: List[BaseException] = []
+        self.source_error = None
+
+        def produce():
+            index = 0
+            try:
+                last = time.perf_counter()
+                for value in source:
+                    now = time.perf_counter()
+                    source_stats.record(1, now - last, [now - last], now - start)
+                    queues[0].put(_Item(index, value, now))  # 佇列滿時阻塞（背壓）
+                    index += 1
+                    last = time.perf_counter()
+            except BaseException as e:
+                source_error.append(e)
+                source_stats.record_error(1)
+            finally:
+                for _ in range(self.stages[0].workers):
+                    queues[0].put(_DONE)
+
+        def work(position: int, stage: Stage, stats: StageStats, remaining: List[int], lock: threading.Lock):
+            inbox, outbox = queues[position], queues[position + 1]
+            downstream = self.stages[position + 1].workers if position + 1 < len(self.stages) else 1
+            fatal = None
+            try:
+                done = False
+                while not done:
+                    batch = self._take(inbox, stage.batch_size)
+                    if batch[-1] is _DONE:
+                        batch.pop()
+                        done = True
+                    if not batch:
+                        continue
+                    values = [item.value for item in batch]
+                    began = time.perf_counter()
+                    if fatal is None:
+                        try:
+                            outputs = self._process_batch(stage, stats, values)
+                        except BaseException as e:
+                            # 非 Exception 的例外：之後的資料不再呼叫 handler，但仍排空佇列並往下游傳遞
+                            fatal = e
+                            fatal_errors.append(e)
+                            outputs = [self._recover(stage, stats, value, e) for value in values]
+                    else:
+                        outputs = [self._recover(stage, stats, value, fatal) for value in values]
+                    finished = time.perf_counter()
+                    stats.record(len(batch), finished - began, [finished - item.enqueued_at for item in batch],
+                                 finished - start)
+                    for item, output in zip(batch, outputs):
+                        item.value = output
+                        item.enqueued_at = time.perf_counter()
+                        outbox.put(item)
+            finally:
+                # 最後一個結束的工作執行緒通知下游（即使發生例外也必須通知，否則主執行緒會一直等待）
+                with lock:
+                    remaining[0] -= 1
+                    last_worker = remaining[0] == 0
+                if last_worker:
+                    for _ in range(downstream):
+                        outbox.put(_DONE)
+
+        threads = [threading.Thread(target=produce, name=f"ares-{self.source_name}", daemon=True)]
+        for position, (stage, stats) in enumerate(zip(self.stages, stage_stats)):
+            remaining, lock = [stage.workers], threading.Lock()
+            for n in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=work, args=(position, stage, stats, remaining, lock),
+                    name=f"ares-{stage.name}-{n}", daemon=True
+                ))
+        for thread in threads:
+            thread.start()
+
+        results = []
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                break
+            results.append(item)
+        for thread in threads:
+            thread.join()
+
+        elapsed = time.perf_counter() - start
+        self.stats = {self.source_name: source_stats.snapshot(elapsed)}
+        for stats in stage_stats:
+            self.stats[stats.name] = stats.snapshot(elapsed)
+        self.stats['total'] = {'elapsed_s': round(elapsed, 3), 'items': len(results)}
+        fatal_errors.extend(e for e in source_error if not isinstance(e, Exception))
+        if fatal_errors:
+            raise fatal_errors[0]
+        if source_error:
+            self.source_error = source_error[0]
+            print(f"[Pipeline] {self.source_name} 中途失敗，回傳已處理的 {len(results)} 筆資料：{self.source_error}")
+        return [item.value for item in sorted(results, key=lambda item: item.index)]
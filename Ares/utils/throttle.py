@@ -0,0 +1,107 @@
+"""
+速率限制模組
+
+- TokenBucket：執行緒安全的權杖桶，限制平均速率並允許短暫突發
+- HostRateLimiter：依網址的主機名稱分別套用權杖桶（例如 NCBI 每秒 3 次請求）
+"""
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """
+    權杖桶速率限制器
+
+    每秒補充 rate 個權杖，最多累積 capacity 個；acquire() 在權杖不足時阻塞等待。
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: 每秒補充的權杖數（平均速率上限）；小於等於 0 表示不限速
+            capacity: 權杖上限（允許的突發量）。預設等於 max(rate, 1)。
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        取得權杖，不足時等待。
+
+        Args:
+            tokens: 需要的權杖數
+            timeout: 最長等待秒數；None 表示一直等待
+
+        Returns:
+            bool: 是否在時限內取得權杖
+
+        Raises:
+            ValueError: tokens 超過權杖桶容量（永遠無法取得）
+        """
+        if self.rate <= 0:
+            return True
+        if tokens > self.capacity:
+            raise ValueError(f"需要的權杖數 {tokens} 超過容量 {self.capacity}")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+            with self._lock:
+                self.waited_seconds += wait
+
+
+class HostRateLimiter:
+    """
+    依主機名稱分別限速的速率限制器
+    """
+
+    def __init__(self, default_rate: float = 3.0, per_host: Dict[str, float] = None, burst: Optional[float] = None):
+        """
+        Args:
+            default_rate: 未特別設定的主機每秒請求數上限。預設為 3（NCBI 未使用 API 金鑰時的上限）。
+            per_host: 個別主機的每秒請求數上限，例如 {"eutils.ncbi.nlm.nih.gov": 10}
+            burst: 每個主機允許的突發請求數。預設等於速率。
+        """
+        self.default_rate = default_rate
+        self.per_host = dict(per_host or {})
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url_or_host: str) -> TokenBucket:
+        """回傳網址（或主機名稱）對應的權杖桶。"""
+        host = urlparse(url_or_host).hostname or url_or_host
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate = self.per_host.get(host, self.default_rate)
+                bucket = self._buckets[host] = TokenBucket(rate, self.burst)
+            return bucket
+
+    def acquire(self, url_or_host: str, timeout: Optional[float] = None) -> bool:
+        """為該主機取得一次請求的權杖，必要時等待。"""
+        return self.bucket(url_or_host).acquire(timeout=timeout)
+
+    @property
+    def waited_seconds(self) -> float:
+        """所有主機累計的等待秒數。"""
+        with self._lock:
+            return sum(bucket.waited_seconds for bucket in self._buckets.values())
@@ -0,0 +1,136 @@
+"""
+聊天服務（ChatService）並行負載測試
+
+以 N 個並行對話（模擬 N 個瀏覽器分頁）對共用的 ChatService 發送問題，量測：
+1. 吞吐量（questions/s）
+2. 每個問題的延遲 p50 / p99
+3. 與「逐一同步呼叫 chat()」的基準相比的加速倍數
+
+LLM 以固定延遲的假客戶端取代（不需網路），知識庫使用本地雜湊嵌入；
+回應快取停用，確保每個問題都會經過生成階段。
+結果附加到 benchmarks/results/chat_service.jsonl。
+
+使用範例：
+    python benchmarks/bench_chat_service.py --sessions 1 4 16 64 --turns 5 --llm-latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from langchain_core.messages import AIMessage
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from Ares.brain.chat import AresChatbot
+from Ares.brain.memory import KnowledgeBase
+from Ares.brain.response_cache import ResponseCache
+from Ares.brain.service import ChatService
+from bench_knowledge_store import HashingEmbedding, build_corpus, git_revision, percentile
+
+RESULTS_FILE = Path(__file__).resolve().parent / "results" / "chat_service.jsonl"
+
+
+class FakeLLM:
+    """固定延遲的假 LLM：invoke 以 time.sleep、ainvoke 以 asyncio.sleep 模擬網路等待。"""
+
+    ANSWER = "根據記憶庫中的資料，這篇研究提出了新的方法 [1]。"
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def invoke(self, prompt):
+        time.sleep(self.latency)
+        return AIMessage(content=self.ANSWER)
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.latency)
+        return AIMessage(content=self.ANSWER)
+
+
+async def run_sessions(service: ChatService, sessions: int, turns: int) -> list:
+    """啟動 sessions 個並行對話，每個對話依序提出 turns 個問題，回傳每個問題的延遲。"""
+    latencies = []
+
+    async def session(session_id: int):
+        for turn in range(turns):
+            start = time.perf_counter()
+            await service.achat(f"t{session_id * turns + turn}x0 method")
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    return latencies
+
+
+def run_benchmark(sessions: int, turns: int, llm_latency: float, max_concurrency: int, corpus_size: int) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix="ares_chat_bench_"))
+    try:
+        brain = KnowledgeBase(persist_directory=str(workdir / "store"), embeddings=HashingEmbedding())
+        brain.memorize(build_corpus(corpus_size), tag="bench")
+        bot = AresChatbot(
+            response_cache=ResponseCache(path=str(workdir / "cache.sqlite3"), max_entries=0),
+            brain=brain,
+            llm=FakeLLM(llm_latency),
+        )
+        service = ChatService(bot, max_concurrency=max_concurrency)
+
+        # 基準：同樣數量的問題逐一同步呼叫
+        total = sessions * turns
+        start = time.perf_counter()
+        for i in range(min(total, 10)):
+            bot.chat(f"t{i}x0 method")
+        sequential_per_question = (time.perf_counter() - start) / min(total, 10)
+
+        start = time.perf_counter()
+        latencies = asyncio.run(run_sessions(service, sessions, turns))
+        elapsed = time.perf_counter() - start
+
+        throughput = total / elapsed if elapsed else None
+        return {
+            'timestamp': datetime.now().isoformat(timespec="seconds"),
+            'revision': git_revision(),
+            'sessions': sessions,
+            'turns': turns,
+            'llm_latency_s': llm_latency,
+            'max_concurrency': max_concurrency,
+            'throughput_qps': round(throughput, 2) if throughput else None,
+            'sequential_qps': round(1 / sequential_per_question, 2),
+            'speedup': round(throughput * sequential_per_question, 2) if throughput else None,
+            'latency_p50_ms': round(percentile(latencies, 50), 1),
+            'latency_p99_ms': round(percentile(latencies, 99), 1),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ares 聊天服務並行負載測試")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16], help="並行對話數（可多個）")
+    parser.add_argument("--turns", type=int, default=5, help="每個對話的問題數（預設：5）")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="假 LLM 的回應延遲秒數（預設：0.5）")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="ChatService 的並行上限（預設：8）")
+    parser.add_argument("--corpus-size", type=int, default=1000, help="知識庫論文數（預設：1000）")
+    parser.add_argument("--no-save", action="store_true", help="不將結果附加到 results/chat_service.jsonl")
+    args = parser.parse_args()
+
+    for sessions in args.sessions:
+        print(f"\n👥 [Benchmark] 並行對話數：{sessions}")
+        result = run_benchmark(sessions, args.turns, args.llm_latency, args.max_concurrency, args.corpus_size)
+        for key, value in result.items():
+            print(f"   {key}: {value}")
+
+        if not args.no_save:
+            RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(RESULTS_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            print(f"   ✅ 已記錄至 {RESULTS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+PubMed HTML 解析基準測試
+
+以 tests/fixtures/pubmed 中儲存的搜尋結果頁與詳細頁面為樣板，比較：
+1. 舊版：BeautifulSoup（html.parser）解析整頁，逐項嘗試 7 個摘要選擇器（含 lambda 比對）
+2. 新版：Ares.departments.Research.parsing（lxml + 預先編譯的 XPath，只解析結果區塊）
+
+搜尋結果頁依 --limits 複製結果項目（模擬每頁 N 筆），兩種實作的輸出必須完全相同。
+結果附加到 benchmarks/results/html_parsing.jsonl。
+
+使用範例：
+    python benchmarks/bench_html_parsing.py --limits 10 50 200 --number 20
+"""
+import argparse
+import json
+import re
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from Ares.departments.Research.parsing import NO_ABSTRACT, PUBMED_URL, extract_abstract, parse_search_results
+from bench_knowledge_store import git_revision
+
+FIXTURES_DIR = Path(__file__).resolve().parents[1] / "tests" / "fixtures" / "pubmed"
+RESULTS_FILE = Path(__file__).resolve().parent / "results" / "html_parsing.jsonl"
+_ARTICLE = re.compile(r"[ \t]*<article class=\"full-docsum\".*?</article>\n", re.DOTALL)
+
+
+def legacy_parse_search_results(html, limit):
+    """改版前 SeleniumFetcher 的解析流程（BeautifulSoup + html.parser）"""
+    soup = BeautifulSoup(html, 'html.parser')
+    result_items = soup.find_all('article', class_='full-docsum', limit=limit)
+    if not result_items:
+        result_items = soup.find_all('div', class_='docsum-content', limit=limit)
+    results = []
+    for item in result_items:
+        title_elem = item.find('a', class_='docsum-title') or item.find('a', href=True)
+        title = title_elem.get_text(strip=True) if title_elem else "無標題"
+        if title_elem and title_elem.get('href'):
+            link = title_elem['href']
+            if not link.startswith('http'):
+                link = f"{PUBMED_URL}{link}"
+        else:
+            link = ""
+        snippet = NO_ABSTRACT
+        selectors = [
+            ('div', 'full-view-snippet'), ('p', 'docsum-snippet'), ('div', 'snippet'),
+            ('div', 'abstract'), ('p', 'abstract'),
+            ('div', {'class': lambda x: x and 'snippet' in x.lower()}),
+            ('p', {'class': lambda x: x and 'snippet' in x.lower()}),
+        ]
+        for tag, selector in selectors:
+            snippet_elem = item.find(tag, class_=selector) if isinstance(selector, str) else item.find(tag, selector)
+            if snippet_elem:
+                snippet = snippet_elem.get_text(strip=True)
+                if snippet and len(snippet) > 10:
+                    break
+        if not snippet or snippet == NO_ABSTRACT or len(snippet) < 10:
+            all_text = item.get_text(separator=' ', strip=True)
+            if title and title in all_text:
+                parts = all_text.split(title, 1)
+                if len(parts) > 1:
+                    potential_snippet = parts[1].strip()
+                    if 20 < len(potential_snippet) < 1000:
+                        snippet = potential_snippet[:500]
+        results.append({'title': title, 'link': link, 'snippet': snippet})
+    return results
+
+
+def legacy_extract_abstract(html):
+    """改版前詳細頁面的摘要擷取（BeautifulSoup + html.parser）"""
+    detail_page = BeautifulSoup(html, 'html.parser')
+    for tag, selector in [
+        ('div', {'id': 'abstract'}), ('div', {'class': 'abstract'}), ('section', {'class': 'abstract'}),
+        ('div', {'class': lambda x: x and 'abstract' in x.lower()}),
+        ('div', {'id': lambda x: x and 'abstract' in x.lower()}),
+    ]:
+        abstract_elem = detail_page.find(tag, selector)
+        if abstract_elem:
+            abstract_text = abstract_elem.get_text(separator=' ', strip=True)
+            if abstract_text and len(abstract_text) > 20:
+                return abstract_text[:1000]
+    return ""
+
+
+def build_results_page(count):
+    """以樣板中的結果項目複製出 count 筆結果的搜尋頁面。"""
+    template = (FIXTURES_DIR / "search_results.html").read_text(encoding="utf-8")
+    articles = _ARTICLE.findall(template)
+    copies = [articles[i % len(articles)].replace('data-rel-pos="', f'data-rel-pos="{i}-') for i in range(count)]
+    start, end = template.index(articles[0]), template.index(articles[-1]) + len(articles[-1])
+    return template[:start] + "".join(copies) + template[end:]
+
+
+def time_ms(func, number):
+    return timeit.timeit(func, number=number) / number * 1000
+
+
+def run_benchmark(limits, number):
+    detail = (FIXTURES_DIR / "detail.html").read_text(encoding="utf-8")
+    assert extract_abstract(detail) == legacy_extract_abstract(detail)
+    rows = [{
+        'page': 'detail', 'limit': 1, 'html_kb': round(len(detail) / 1024, 1),
+        'legacy_ms': round(time_ms(lambda: legacy_extract_abstract(detail), number), 3),
+        'lxml_ms': round(time_ms(lambda: extract_abstract(detail), number), 3),
+    }]
+    for limit in limits:
+        page = build_results_page(limit)
+        assert parse_search_results(page, limit) == legacy_parse_search_results(page, limit)
+        rows.append({
+            'page': 'search', 'limit': limit, 'html_kb': round(len(page) / 1024, 1),
+            'legacy_ms': round(time_ms(lambda: legacy_parse_search_results(page, limit), number), 3),
+            'lxml_ms': round(time_ms(lambda: parse_search_results(page, limit), number), 3),
+        })
+    for row in rows:
+        row['speedup'] = round(row['legacy_ms'] / row['lxml_ms'], 1) if row['lxml_ms'] else None
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PubMed HTML 解析基準測試")
+    parser.add_argument("--limits", type=int, nargs="+", default=[10, 50, 200], help="每頁結果數（可多個）")
+    parser.add_argument("--number", type=int, default=20, help="每種頁面的解析次數（預設：20）")
+    parser.add_argument("--no-save", action="store_true", help="不將結果附加到 results/html_parsing.jsonl")
+    args = parser.parse_args()
+
+    revision, timestamp = git_revision(), datetime.now().isoformat(timespec="seconds")
+    print(f"{'頁面':<8}{'筆數':>6}{'HTML KB':>10}{'舊版 ms':>10}{'lxml ms':>10}{'加速':>8}")
+    print("-" * 52)
+    for row in run_benchmark(args.limits, args.number):
+        print(f"{row['page']:<8}{row['limit']:>6}{row['html_kb']:>10}{row['legacy_ms']:>10}{row['lxml_ms']:>10}{row['speedup']:>7}x")
+        if not args.no_save:
+            RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(RESULTS_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps({'timestamp': timestamp, 'revision': revision, **row}, ensure_ascii=False) + "\n")
+    if not args.no_save:
+        print(f"✅ 已記錄至 {RESULTS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
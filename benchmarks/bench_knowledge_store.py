@@ -0,0 +1,198 @@
+"""
+知識庫（Hippocampus）檢索品質與延遲基準測試
+
+在暫存的 persist_directory 中以確定性的本地嵌入建立 1k–1M 篇的合成論文語料，量測：
+1. 寫入吞吐量（papers/s）
+2. recall 延遲 p50 / p99（未快取、已快取與 recall_many 批次）
+3. 磁碟上的索引大小
+4. 依預先埋入的標準答案計算 recall@k
+
+每次執行的結果會附加到 benchmarks/results/knowledge_store.jsonl，方便追蹤索引或快取調整前後的差異。
+
+使用範例：
+    python benchmarks/bench_knowledge_store.py --sizes 1000 10000 --queries 200 --k 5
+"""
+import argparse
+import hashlib
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from Ares.brain.memory import KnowledgeBase
+
+RESULTS_FILE = Path(__file__).resolve().parent / "results" / "knowledge_store.jsonl"
+TOPICS = ["oncology", "genomics", "neuroscience", "cardiology", "immunology", "llm", "imaging", "proteomics"]
+
+
+class HashingEmbedding(Embeddings):
+    """
+    確定性的本地嵌入：以雜湊詞袋（hashing trick）產生 L2 正規化向量。
+    不需網路，相同文字永遠得到相同向量，適合量測檢索品質。
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _embed(self, text: str) -> list:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in text.lower().split():
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dim] += 1.0 if (value >> 63) else -1.0
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def build_corpus(size: int, seed: int = 42) -> list:
+    """
+    建立合成論文語料。
+
+    每篇論文由主題詞與數個專屬於該論文的「指紋詞」組成，
+    查詢時使用指紋詞，該論文即為標準答案。
+    """
+    rng = random.Random(seed)
+    papers = []
+    for i in range(size):
+        topic = TOPICS[i % len(TOPICS)]
+        fingerprint = [f"t{i}x{j}" for j in range(4)]
+        filler = [f"w{rng.randrange(5000)}" for _ in range(12)]
+        papers.append({
+            'Title': f"{topic} study {i} " + " ".join(fingerprint[:2]),
+            'TLDR': " ".join(filler[:6] + fingerprint[2:]),
+            'Innovation': " ".join(filler[6:] + [topic]),
+            'Link': f"https://example.com/paper/{i}",
+            'Score': rng.randint(1, 10),
+            'Date': f"2026-01-{(i % 28) + 1:02d}",
+        })
+    return papers
+
+
+def build_queries(size: int, n_queries: int, seed: int = 7) -> list:
+    """從語料中抽樣，回傳 (查詢字串, 標準答案連結) 列表。"""
+    rng = random.Random(seed)
+    targets = rng.sample(range(size), min(n_queries, size))
+    queries = []
+    for i in targets:
+        words = [f"t{i}x{j}" for j in rng.sample(range(4), 3)]
+        queries.append((" ".join(words), f"https://example.com/paper/{i}"))
+    return queries
+
+
+def percentile(samples: list, pct: float) -> float:
+    return float(np.percentile(samples, pct) * 1000) if samples else 0.0
+
+
+def directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def run_benchmark(size: int, n_queries: int, k: int, batch_size: int, dim: int) -> dict:
+    """對指定語料大小執行一輪基準測試，回傳量測結果。"""
+    workdir = Path(tempfile.mkdtemp(prefix="ares_bench_"))
+    try:
+        kb = KnowledgeBase(persist_directory=str(workdir / "store"), embeddings=HashingEmbedding(dim), cache_size=0)
+        corpus = build_corpus(size)
+
+        # 1. 寫入吞吐量
+        start = time.perf_counter()
+        for offset in range(0, size, batch_size):
+            kb.memorize(corpus[offset:offset + batch_size], tag="bench")
+        ingest_seconds = time.perf_counter() - start
+
+        # 2. 未快取的 recall 延遲與 recall@k
+        queries = build_queries(size, n_queries)
+        latencies, hits = [], 0
+        for query, expected in queries:
+            t0 = time.perf_counter()
+            docs = kb.recall(query, k=k)
+            latencies.append(time.perf_counter() - t0)
+            hits += any(doc.metadata.get('Link') == expected for doc in docs)
+
+        # 3. 已快取的 recall 延遲
+        kb.recall_cache.maxsize = len(queries) + 1
+        for query, _ in queries:
+            kb.recall(query, k=k)
+        cached_latencies = []
+        for query, _ in queries:
+            t0 = time.perf_counter()
+            kb.recall(query, k=k)
+            cached_latencies.append(time.perf_counter() - t0)
+
+        # 4. recall_many 批次（平均每個查詢的延遲）
+        kb.recall_cache.clear()
+        kb.recall_cache.maxsize = 0
+        t0 = time.perf_counter()
+        kb.recall_many([query for query, _ in queries], k=k)
+        batched_per_query = (time.perf_counter() - t0) / max(len(queries), 1)
+
+        return {
+            'timestamp': datetime.now().isoformat(timespec="seconds"),
+            'revision': git_revision(),
+            'corpus_size': size,
+            'queries': len(queries),
+            'k': k,
+            'embedding_dim': dim,
+            'ingest_papers_per_s': round(size / ingest_seconds, 1) if ingest_seconds else None,
+            'recall_p50_ms': round(percentile(latencies, 50), 3),
+            'recall_p99_ms': round(percentile(latencies, 99), 3),
+            'cached_recall_p50_ms': round(percentile(cached_latencies, 50), 4),
+            'cached_recall_p99_ms': round(percentile(cached_latencies, 99), 4),
+            'recall_many_per_query_ms': round(batched_per_query * 1000, 3),
+            'index_bytes': directory_size(workdir / "store"),
+            f'recall_at_{k}': round(hits / max(len(queries), 1), 4),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ares 知識庫檢索品質與延遲基準測試")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000], help="語料大小（可多個，例如 1000 100000 1000000）")
+    parser.add_argument("--queries", type=int, default=200, help="每輪的查詢數量（預設：200）")
+    parser.add_argument("--k", type=int, default=5, help="recall@k 的 k（預設：5）")
+    parser.add_argument("--batch-size", type=int, default=2000, help="每次 memorize 寫入的論文數（預設：2000）")
+    parser.add_argument("--dim", type=int, default=256, help="本地嵌入維度（預設：256）")
+    parser.add_argument("--no-save", action="store_true", help="不將結果附加到 results/knowledge_store.jsonl")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(f"\n📏 [Benchmark] 語料大小：{size:,} 篇")
+        result = run_benchmark(size, args.queries, args.k, args.batch_size, args.dim)
+        for key, value in result.items():
+            print(f"   {key}: {value}")
+
+        if not args.no_save:
+            RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(RESULTS_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            print(f"   ✅ 已記錄至 {RESULTS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
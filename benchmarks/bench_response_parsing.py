@@ -0,0 +1,55 @@
+"""
+LLM 回應正規化微基準測試
+
+以 Gemini / LangChain 實際出現過的回應形狀建立語料，量測 Ares.utils.llm_response
+中 extract_text（聊天回答）與 parse_json（審查 JSON）每次呼叫的耗時。
+
+使用範例：
+    python benchmarks/bench_response_parsing.py --number 20000
+"""
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+from langchain_core.messages import AIMessage
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from Ares.utils.llm_response import extract_text, parse_json
+
+ANSWER = "根據記憶庫中的資料，圖神經網路可用於預測藥物與標靶的交互作用 [1]，並已在多標靶藥物開發中驗證 [1,2]。" * 4
+REVIEW = {"score": 8, "tldr": "以 GNN 預測藥物交互作用", "innovation": "多標靶圖神經網路", "recommendation": "值得閱讀"}
+REVIEW_JSON = json.dumps(REVIEW, ensure_ascii=False)
+PART = {'type': 'text', 'text': ANSWER, 'extras': {'signature': 'Q2lRQmNnWUlCeEF=' * 8}}
+
+# (名稱, 解析函式, 回應)
+CORPUS = [
+    ("chat: AIMessage(str)", extract_text, AIMessage(content=ANSWER)),
+    ("chat: AIMessage(parts+signature)", extract_text, AIMessage(content=[PART])),
+    ("chat: parts list", extract_text, [PART]),
+    ("chat: dict", extract_text, PART),
+    ("chat: str(dict) repr", extract_text, str(PART)),
+    ("review: JSON mode", parse_json, AIMessage(content=REVIEW_JSON)),
+    ("review: fenced JSON", parse_json, AIMessage(content=f"```json\n{REVIEW_JSON}\n```")),
+    ("review: single quotes", parse_json, AIMessage(content=str(REVIEW))),
+    ("review: str(dict) wrapped JSON", parse_json, str({'type': 'text', 'text': REVIEW_JSON, 'extras': {}})),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 回應正規化微基準測試")
+    parser.add_argument("--number", type=int, default=20000, help="每種回應形狀的執行次數（預設：20000）")
+    args = parser.parse_args()
+
+    print(f"{'回應形狀':<36}{'µs/次':>10}")
+    print("-" * 46)
+    for name, func, response in CORPUS:
+        func(response)  # 暖身並確認可解析
+        seconds = timeit.timeit(lambda: func(response), number=args.number)
+        print(f"{name:<36}{seconds / args.number * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
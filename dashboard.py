@@ -6,7 +6,7 @@ Ares Intelligence System - Web Dashboard
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from Ares.brain.chat import AresChatbot
+from Ares.brain.service import ChatService
 import os
 from pathlib import Path
 
@@ -23,30 +23,42 @@ page = st.sidebar.radio(
     ["💬 戰略對話 (Chat)", "💰 財務監控 (Finance)", "🔬 研究情報 (Research)"]
 )
 
-# 初始化 session_state
-if 'chatbot' not in st.session_state:
-    st.session_state.chatbot = None
 
+@st.cache_resource(show_spinner="正在啟動 Ares 聊天機器人...")
+def get_chat_service() -> ChatService:
+    """
+    所有瀏覽器分頁共用同一個聊天服務（單一 KnowledgeBase、LLM 客戶端與回應快取），
+    記憶體與連線數不會隨分頁數量增加。
+    """
+    return ChatService()
+
+
+# 初始化 session_state（每個分頁只保存自己的對話紀錄）
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 
+if 'conversation' not in st.session_state:
+    st.session_state.conversation = None
+
 # 標籤頁 1: 戰略對話 (Chat)
 if page == "💬 戰略對話 (Chat)":
     st.title("💬 戰略對話 (Chat)")
     st.markdown("---")
     
-    # 初始化聊天機器人（只初始化一次）
-    if st.session_state.chatbot is None:
-        try:
-            with st.spinner("正在啟動 Ares 聊天機器人..."):
-                st.session_state.chatbot = AresChatbot()
-            st.success("✅ Ares 已就緒")
-        except Exception as e:
-            st.error(f"❌ 初始化失敗：{str(e)}")
-            st.session_state.chatbot = None
+    # 取得共用的聊天服務（整個 Streamlit 行程只初始化一次）
+    try:
+        chat_service = get_chat_service()
+        st.success("✅ Ares 已就緒")
+    except Exception as e:
+        st.error(f"❌ 初始化失敗：{str(e)}")
+        chat_service = None
     
     # 顯示聊天歷史
-    if st.session_state.chatbot:
+    if chat_service:
+        # 對話狀態（滾動摘要 + 最近幾輪），讓追問能延續上下文
+        if st.session_state.conversation is None:
+            st.session_state.conversation = chat_service.new_conversation()
+        
         # 顯示歷史訊息
         for message in st.session_state.chat_history:
             if message['role'] == 'user':
@@ -73,9 +85,13 @@ if page == "💬 戰略對話 (Chat)":
             # 獲取 AI 回應
             try:
                 with st.chat_message("assistant"):
-                    with st.spinner("Ares 思考中..."):
-                        response = st.session_state.chatbot.chat(user_query)
-                        st.write(response)
+                    # 串流輸出：token 一到達就顯示，最後附上參考文獻
+                    response = st.write_stream(
+                        chat_service.chat_stream(
+                            user_query,
+                            conversation=st.session_state.conversation
+                        )
+                    )
                     
                     # 保存 AI 回應到歷史
                     st.session_state.chat_history.append({
@@ -11,7 +11,10 @@ from pathlib import Path
 
 from Ares.departments.finance.manager import FinancePipeline
 from Ares.departments.Research.manager import ResearchPipeline
+from Ares.departments.Research.editor import ResearchEditor
+from Ares.departments.Research.review_cache import ReviewCache
 from Ares.brain.chat import AresChatbot
+from Ares.brain import KnowledgeBase, KnowledgeMaintainer
 
 
 def run_finance(file_path: str, output_path: str = None):
@@ -97,15 +100,14 @@ def run_chat(query: str, tag: str = None):
             print(f"   過濾條件：{tag}")
         print()
         
-        # 調用聊天機器人
-        response = bot.chat(query, filter_tag=tag)
-        
-        # 美化輸出回答
+        # 美化輸出回答（串流顯示，token 一到達就輸出）
         print("=" * 60)
         print("💬 Ares 的回答：")
         print("=" * 60)
         print()
-        print(response)
+        for text in bot.chat_stream(query, filter_tag=tag):
+            print(text, end="", flush=True)
+        print()
         print()
         print("=" * 60)
         
@@ -126,6 +128,80 @@ def run_chat(query: str, tag: str = None):
         sys.exit(1)
 
 
+def run_maintain(
+    min_score: float = None,
+    before: str = None,
+    reindex: bool = True,
+    m: int = 16,
+    ef_construction: int = 200,
+    ef_search: int = 100
+):
+    """
+    執行知識庫維護（去重、封存冷資料、重建索引）。
+    
+    Args:
+        min_score: 評分低於此值的論文移至冷儲存層。
+        before: 日期早於此值（YYYY-MM-DD）的論文移至冷儲存層。
+        reindex: 是否以新的 HNSW 參數重建索引。
+        m: HNSW M 參數。
+        ef_construction: HNSW 建立索引時的搜尋寬度。
+        ef_search: HNSW 查詢時的搜尋寬度。
+    """
+    print("=" * 60)
+    print("🧹 Ares Knowledge Store Maintenance - 知識庫維護")
+    print("=" * 60)
+    
+    try:
+        maintainer = KnowledgeMaintainer(KnowledgeBase())
+        report = maintainer.run(
+            min_score=min_score,
+            before=before,
+            reindex=reindex,
+            m=m,
+            ef_construction=ef_construction,
+            ef_search=ef_search
+        )
+        print(f"\n[OK] 維護完成！")
+        print(f"   論文數：{report['before']['documents']} → {report['after']['documents']}")
+        print(f"   去重：{report['deduplicated']} 筆，封存：{report['archived']} 筆")
+    except Exception as e:
+        print(f"\n[ERROR] 知識庫維護失敗：{str(e)}")
+        sys.exit(1)
+
+
+def run_review_cache(purge: list = None, purge_outdated: bool = False, path: str = "./ares_review_cache.sqlite3"):
+    """
+    檢視或清除論文審查快取。
+    
+    Args:
+        purge: 要清除的提示詞版本列表。
+        purge_outdated: 是否清除目前版本（ResearchEditor.PROMPT_VERSION）以外的所有版本。
+        path: 審查快取的 SQLite 檔案路徑。
+    """
+    print("=" * 60)
+    print("🗂️  Ares Review Cache - 論文審查快取")
+    print("=" * 60)
+    
+    try:
+        cache = ReviewCache(path)
+        if purge:
+            removed = cache.purge(prompt_versions=purge)
+            print(f"\n[OK] 已清除版本 {', '.join(purge)} 的 {removed} 筆審查結果")
+        if purge_outdated:
+            removed = cache.purge(keep=ResearchEditor.PROMPT_VERSION)
+            print(f"\n[OK] 已清除目前版本（{ResearchEditor.PROMPT_VERSION}）以外的 {removed} 筆審查結果")
+        
+        versions = cache.versions()
+        print(f"\n目前提示詞版本：{ResearchEditor.PROMPT_VERSION}")
+        print(f"快取筆數：{sum(versions.values())}")
+        for version, count in versions.items():
+            print(f"   版本 {version}：{count} 筆")
+        cache.close()
+    except Exception as e:
+        print(f"\n[ERROR] 審查快取操作失敗：{str(e)}")
+        sys.exit(1)
+
+
 def run_all():
     """
     執行所有流程（模擬「早安」例行程序）。
@@ -181,6 +257,14 @@ def main():
   python main.py chat "什麼是深度學習？"
   python main.py chat "生成式AI的應用" --tag "LLM in healthcare"
   
+  # 知識庫維護（封存 5 分以下或 2025 年前的論文並重建索引）
+  python main.py maintain --archive-below 5 --archive-before 2025-01-01
+  
+  # 檢視審查快取，或清除舊提示詞版本的審查結果
+  python main.py review-cache
+  python main.py review-cache --purge 1
+  python main.py review-cache --purge-outdated
+  
   # 執行所有流程
   python main.py all
         """
@@ -247,6 +331,57 @@ def main():
         help='可選的分類標籤過濾器（例如："LLM in healthcare"）'
     )
     
+    # 知識庫維護子命令
+    maintain_parser = subparsers.add_parser(
+        'maintain',
+        help='知識庫維護（去重、封存冷資料、重建索引）'
+    )
+    maintain_parser.add_argument(
+        '--archive-below',
+        type=float,
+        default=None,
+        help='評分低於此值的論文移至冷儲存層'
+    )
+    maintain_parser.add_argument(
+        '--archive-before',
+        type=str,
+        default=None,
+        help='日期早於此值（YYYY-MM-DD）的論文移至冷儲存層'
+    )
+    maintain_parser.add_argument(
+        '--no-reindex',
+        action='store_true',
+        help='跳過 HNSW 索引重建'
+    )
+    maintain_parser.add_argument('--m', type=int, default=16, help='HNSW M 參數（預設：16）')
+    maintain_parser.add_argument('--ef-construction', type=int, default=200, help='HNSW ef_construction（預設：200）')
+    maintain_parser.add_argument('--ef-search', type=int, default=100, help='HNSW ef_search（預設：100）')
+    
+    # 審查快取子命令
+    review_cache_parser = subparsers.add_parser(
+        'review-cache',
+        help='檢視或清除論文審查快取'
+    )
+    review_cache_parser.add_argument(
+        '--purge',
+        type=str,
+        nargs='+',
+        default=None,
+        metavar='VERSION',
+        help='清除指定提示詞版本的審查結果（可多個）'
+    )
+    review_cache_parser.add_argument(
+        '--purge-outdated',
+        action='store_true',
+        help='清除目前提示詞版本以外的所有審查結果'
+    )
+    review_cache_parser.add_argument(
+        '--path',
+        type=str,
+        default="./ares_review_cache.sqlite3",
+        help='審查快取檔案路徑（預設：./ares_review_cache.sqlite3）'
+    )
+    
     # 執行所有流程子命令
     all_parser = subparsers.add_parser(
         'all',
@@ -262,6 +397,17 @@ def main():
         run_research(args.query, args.limit, args.output)
     elif args.command == 'chat':
         run_chat(args.query, args.tag)
+    elif args.command == 'maintain':
+        run_maintain(
+            min_score=args.archive_below,
+            before=args.archive_before,
+            reindex=not args.no_reindex,
+            m=args.m,
+            ef_construction=args.ef_construction,
+            ef_search=args.ef_search
+        )
+    elif args.command == 'review-cache':
+        run_review_cache(args.purge, args.purge_outdated, args.path)
     elif args.command == 'all':
         run_all()
     else:
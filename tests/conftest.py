@@ -1,3 +1,11 @@
+import hashlib
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
 import pytest
 import pandas as pd
 import numpy as np
@@ -34,4 +42,111 @@ def mock_element():
     element.text = "  Mock Text  "
     # 設定當呼叫 get_attribute('href') 時的回傳值
     element.get_attribute.side_effect = lambda attr: "http://mock.com" if attr == "href" else None
-    return element
\ No newline at end of file
+    return element
+
+# ==========================================
+# 3. 給 Research 抓取後端用的 PubMed E-utilities stub 伺服器
+# ==========================================
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class PubMedStubHandler(BaseHTTPRequestHandler):
+    """
+    以錄製的 XML fixture 模擬 ESearch / EFetch。
+    ESearch 依 retstart / retmax 切分 PMID，EFetch 只回傳請求的文章。
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def _params(self) -> dict:
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        if self.command == "POST":
+            length = int(self.headers.get("Content-Length", 0))
+            params.update(parse_qs(self.rfile.read(length).decode("utf-8")))
+        return {key: values[-1] for key, values in params.items()}
+
+    def _reply(self, body: bytes, status: int = 200, content_type: str = "text/xml"):
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.server.stub.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 200:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        stub = self.server.stub
+        endpoint = urlparse(self.path).path.rsplit("/", 1)[-1]
+        params = self._params()
+        stub.requests.append((endpoint, params))
+
+        if stub.fail_next > 0:
+            stub.fail_next -= 1
+            self._reply(b"<error>service unavailable</error>", status=503)
+        elif endpoint == "esearch.fcgi":
+            start, count = int(params.get("retstart", 0)), int(params.get("retmax", 20))
+            ids = "".join(f"<Id>{pmid}</Id>" for pmid in stub.pmids[start:start + count])
+            body = (f"<?xml version=\"1.0\" ?><eSearchResult><Count>{len(stub.pmids)}</Count>"
+                    f"<RetMax>{count}</RetMax><RetStart>{start}</RetStart><IdList>{ids}</IdList></eSearchResult>")
+            self._reply(body.encode("utf-8"))
+        elif endpoint == "efetch.fcgi":
+            wanted = params.get("id", "").split(",")
+            articles = "".join(stub.articles[pmid] for pmid in wanted if pmid in stub.articles)
+            self._reply(f"<?xml version=\"1.0\" ?><PubmedArticleSet>{articles}</PubmedArticleSet>".encode("utf-8"))
+        elif endpoint == "" and urlparse(self.path).path.strip("/") in stub.articles:
+            # 論文詳細頁面：/<pmid>/
+            time.sleep(stub.detail_delay)
+            pmid = urlparse(self.path).path.strip("/")
+            abstract = re.sub(r"<[^>]+>", "", "".join(re.findall(
+                r"<AbstractText[^>]*>(.*?)</AbstractText>", stub.articles[pmid], re.DOTALL)))
+            body = (f"<html><body><main><h1 class=\"heading-title\">{pmid}</h1>"
+                    f"<div class=\"abstract\" id=\"abstract\"><div class=\"abstract-content\"><p>{abstract}</p>"
+                    f"</div></div></main></body></html>")
+            self._reply(body.encode("utf-8"), content_type="text/html")
+        else:
+            self._reply(b"<error>not found</error>", status=404)
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+class PubMedStub:
+    def __init__(self):
+        fixture = (FIXTURES_DIR / "pubmed" / "efetch.xml").read_text(encoding="utf-8")
+        search = (FIXTURES_DIR / "pubmed" / "esearch.xml").read_text(encoding="utf-8")
+        self.pmids = re.findall(r"<Id>(\d+)</Id>", search)
+        self.articles = {
+            re.search(r"<PMID[^>]*>(\d+)</PMID>", article).group(1): article
+            for article in re.findall(r"<PubmedArticle>.*?</PubmedArticle>", fixture, re.DOTALL)
+        }
+        self.requests = []
+        self.detail_delay = 0.0
+        self.fail_next = 0  # 接下來幾個請求回傳 503
+        self.not_modified = 0  # 回傳 304 的次數（ETag 驗證成功）
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), PubMedStubHandler)
+        self.server.stub = self
+        self.host_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.base_url = f"{self.host_url}/entrez/eutils"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def pubmed_stub():
+    """啟動本地 PubMed E-utilities stub 伺服器，回傳含 base_url 與請求紀錄的物件。"""
+    stub = PubMedStub()
+    yield stub
+    stub.close()
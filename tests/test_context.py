@@ -0,0 +1,56 @@
+from langchain_core.documents import Document
+
+from Ares.brain.context import ContextBudgeter, estimate_tokens
+
+
+def _doc(title, content):
+    return Document(page_content=content, metadata={'Title': title, 'Link': f"https://example.com/{title}"})
+
+
+def test_estimate_tokens_counts_cjk_characters_and_latin_words():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("藥物發現") == 4
+    assert estimate_tokens("graph neural networks") == 6
+
+
+def test_near_duplicate_passages_are_dropped():
+    content = "圖神經網路可以預測藥物與標靶的交互作用。模型在三個資料集上超越基準方法。"
+    memories = [_doc("A", content), _doc("B", content + "此外"), _doc("C", "蛋白質結構預測使用注意力機制。")]
+
+    context_str, references, stats = ContextBudgeter().assemble("藥物交互作用", memories)
+
+    assert [ref['title'] for ref in references] == ["A", "C"]
+    assert [ref['id'] for ref in references] == [1, 2]
+    assert "[論文 2] C" in context_str
+    assert stats['duplicates_dropped'] == 1
+    assert stats['compressed'] is False
+
+
+def test_over_budget_context_keeps_query_relevant_sentences_in_order():
+    filler = "".join(f"第{i}段描述實驗環境與硬體設定的細節。" for i in range(20))
+    content = "本研究提出新的模型。" + filler + "圖神經網路顯著提升藥物交互作用預測準確率。"
+    budgeter = ContextBudgeter(max_tokens=80)
+
+    context_str, references, stats = budgeter.assemble("圖神經網路如何提升藥物交互作用預測？", [_doc("A", content)])
+
+    assert stats['compressed'] is True
+    assert stats['context_tokens'] <= 80 < stats['context_tokens_raw']
+    kept = references[0]['content']
+    assert kept.startswith("本研究提出新的模型。")
+    assert kept.endswith("圖神經網路顯著提升藥物交互作用預測準確率。")
+    assert " … " in kept
+
+
+def test_oversized_top_passage_is_clipped_instead_of_dropped():
+    content = "圖神經網路" + "以多目標注意力機制整合分子結構與蛋白質交互作用網路" * 30 + "。後續句子。"
+    budgeter = ContextBudgeter(max_tokens=60)
+
+    context_str, references, stats = budgeter.assemble("圖神經網路", [_doc("A", content), _doc("B", "另一篇論文的內容。")])
+
+    assert references and references[0]['title'] == "A"
+    assert references[0]['content'].startswith("圖神經網路以多目標")
+    assert stats['context_tokens'] <= 60
+
+    # 標題本身就超出預算時仍保留排名第一論文的開頭
+    _, references, _ = ContextBudgeter(max_tokens=5).assemble("圖神經網路", [_doc("很長的標題" * 5, content)])
+    assert references[0]['content'].startswith("圖神經網路")
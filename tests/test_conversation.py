@@ -0,0 +1,115 @@
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.messages import AIMessage
+
+from Ares.brain.chat import AresChatbot
+from Ares.brain.context import estimate_tokens
+from Ares.brain.conversation import Conversation
+from Ares.brain.memory import KnowledgeBase
+from Ares.brain.response_cache import ResponseCache
+
+
+def test_history_stays_within_budget_and_folds_into_summary():
+    conversation = Conversation(max_turns=2, history_budget=150, summary_budget=60)
+    for i in range(20):
+        conversation.add_turn(f"第{i}個問題是什麼？", f"根據記憶庫中的資料，第{i}個答案說明了模型的效果 [1]。" * 3)
+
+    assert len(conversation.turns) <= 2
+    assert conversation.summary
+    assert estimate_tokens(conversation.render_history()) <= 150
+    assert "第19個問題" in conversation.render_history()
+
+
+def make_docs(*links):
+    return [Document(page_content=f"Paper {link}", metadata={'Title': link, 'Link': link}) for link in links]
+
+
+def test_explicit_follow_up_reuses_memories_until_version_changes():
+    conversation = Conversation()
+    docs = make_docs("gnn")
+    conversation.remember(docs, version=1)
+
+    assert conversation.reusable_memories("這篇的資料集有多大？", version=1) == docs
+    assert conversation.reusable_memories("[1] 的樣本數是多少？", version=1) == docs
+    assert conversation.reusable_memories("第二篇的方法是什麼？", version=1) == docs
+    assert conversation.reusable_memories("這篇的資料集有多大？", version=2) == []
+
+
+@pytest.mark.parametrize("question", [
+    "What are the lung cancer immunotherapy drugs that work?",
+    "Is it true that transformers beat CNNs on small datasets?",
+    "這些年癌症免疫療法有什麼進展？",
+    "剛才提到的蛋白質折疊，有什麼新方法？",
+])
+def test_unrelated_questions_with_pronouns_are_not_follow_ups(question):
+    conversation = Conversation()
+    conversation.remember(make_docs("crispr"), version=1)
+
+    assert conversation.reusable_memories(question, version=1) == []
+
+
+def test_recalled_papers_overlapping_previous_turn_are_reused():
+    conversation = Conversation(reuse_overlap=0.5)
+    docs = make_docs("a", "b", "c")
+    conversation.remember(docs, version=1)
+
+    assert conversation.overlapping_memories(make_docs("b", "a", "x"), version=1) == docs
+    assert conversation.overlapping_memories(make_docs("a", "x", "y"), version=1) == []
+    assert conversation.overlapping_memories(make_docs("a", "b"), version=1, filter_tag="AI") == []
+
+
+class RecordingLLM:
+    """記錄提示詞的假 LLM"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return AIMessage(content="根據記憶庫中的資料，該研究使用圖神經網路預測藥物交互作用 [1]。")
+
+
+def test_chatbot_sends_history_and_skips_recall_on_follow_up(tmp_path):
+    brain = KnowledgeBase(persist_directory=str(tmp_path / "store"), embeddings=DeterministicFakeEmbedding(size=32))
+    brain.memorize([{'Title': 'GNN for Drugs', 'TLDR': 'Graph neural network predicts drug interactions',
+                     'Innovation': 'Multi-target GNN', 'Link': 'https://example.com/1'}], tag="AI")
+    llm = RecordingLLM()
+    bot = AresChatbot(response_cache=ResponseCache(path=str(tmp_path / "cache.sqlite3")), brain=brain, llm=llm)
+    conversation = bot.new_conversation(max_turns=2, history_budget=300)
+
+    bot.chat("GNN 如何用於藥物發現？", conversation=conversation)
+    recalls = brain.recall_cache.stats['misses']
+    bot.chat("這篇用了哪些資料集？", conversation=conversation)
+
+    assert brain.recall_cache.stats['misses'] == recalls
+    assert conversation.last_stats['memories_reused'] is True
+    assert "GNN 如何用於藥物發現？" in llm.prompts[-1]
+
+    for i in range(10):
+        bot.chat(f"這篇的第{i}個細節？", conversation=conversation)
+    sizes = [estimate_tokens(prompt) for prompt in llm.prompts if prompt.startswith("請根據")]
+    assert max(sizes[4:]) - min(sizes[4:]) <= 60
+
+
+class StreamingLLM(RecordingLLM):
+    def stream(self, prompt):
+        self.prompts.append(prompt)
+        for word in ["根據記憶庫中的資料，", "該研究使用圖神經網路", "預測藥物交互作用 [1]。", "另外還有更多內容。"]:
+            yield AIMessage(content=word)
+
+
+def test_stream_records_turn_when_client_disconnects(tmp_path):
+    brain = KnowledgeBase(persist_directory=str(tmp_path / "store"), embeddings=DeterministicFakeEmbedding(size=32))
+    brain.memorize([{'Title': 'GNN for Drugs', 'TLDR': 'Graph neural network predicts drug interactions',
+                     'Innovation': 'Multi-target GNN', 'Link': 'https://example.com/1'}], tag="AI")
+    bot = AresChatbot(response_cache=ResponseCache(path=str(tmp_path / "cache.sqlite3")), brain=brain,
+                      llm=StreamingLLM())
+    conversation = bot.new_conversation()
+
+    stream = bot.chat_stream("GNN 如何用於藥物發現？", conversation=conversation)
+    first = next(stream)
+    stream.close()  # 用戶在串流途中離開
+
+    assert len(conversation.turns) == 1
+    assert conversation.turns[0].assistant.startswith(first)
@@ -0,0 +1,184 @@
+import threading
+
+import pytest
+
+from Ares.departments.Research.fetchers import SeleniumFetcher
+from Ares.spider import core
+from Ares.spider.pool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.heap = 10 * 1024 * 1024
+        self.page_heap = 0  # 目前頁面額外佔用的記憶體，導向 about:blank 後釋放
+        self.url = "data:,"
+        self.alive = True
+        self.quit_called = False
+
+    def get(self, url):
+        self.url = url
+        if url == "about:blank":
+            self.page_heap = 0
+
+    def execute_script(self, script, *args):
+        if not self.alive:
+            raise ConnectionError("chrome not reachable")
+        return self.heap + self.page_heap if "usedJSHeapSize" in script else 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def factory():
+        created.append(FakeDriver())
+        return created[-1]
+
+    return DriverPool(factory=factory, **kwargs), created
+
+
+def test_pool_reuses_prewarmed_drivers_and_recycles_after_max_pages():
+    pool, created = make_pool(size=2, max_pages=3)
+    assert pool.prewarm() == 2
+
+    for _ in range(3):
+        with pool.checkout() as driver:
+            assert driver in created
+    assert len(created) == 2  # 前 3 次借出都使用預熱的瀏覽器
+
+    for _ in range(6):
+        with pool.checkout():
+            pass
+    assert pool.stats['recycled'] >= 2
+    assert all(d.quit_called for d in created[:2])
+    pool.close()
+
+
+def test_pool_replaces_unhealthy_and_bloated_drivers():
+    pool, created = make_pool(size=1, max_memory_growth_mb=100)
+    with pool.checkout() as driver:
+        driver.heap += 200 * 1024 * 1024  # 記憶體成長 200 MB
+    with pool.checkout() as driver:
+        assert driver is created[1]
+        driver.alive = False  # 瀏覽器當掉
+    with pool.checkout() as driver:
+        assert driver is created[2]
+
+    assert pool.stats['recycled'] == 1
+    assert pool.stats['unhealthy'] == 1
+    pool.close()
+
+
+def test_heap_growth_is_measured_on_blank_page():
+    pool, created = make_pool(size=1, max_memory_growth_mb=100)
+    with pool.checkout() as driver:
+        driver.get("https://pubmed.ncbi.nlm.nih.gov/")
+        driver.page_heap = 200 * 1024 * 1024  # 大型頁面本身的記憶體，不是洩漏
+
+    assert pool.stats['recycled'] == 0
+    assert created[0].url == "about:blank"
+    pool.close()
+
+
+def test_checkout_waits_for_prewarming_driver_instead_of_launching():
+    gate = threading.Event()
+    created = []
+
+    def factory():
+        gate.wait(2)
+        created.append(FakeDriver())
+        return created[-1]
+
+    pool = DriverPool(size=2, factory=factory, prewarm=1)
+    threading.Timer(0.05, gate.set).start()
+    with pool.checkout(timeout=2) as driver:
+        assert driver is created[0]
+    assert pool.stats['created'] == 1
+    pool.close()
+
+
+def test_checkout_waits_for_free_driver_and_times_out():
+    pool, _ = make_pool(size=1)
+    with pool.checkout():
+        with pytest.raises(TimeoutError):
+            with pool.checkout(timeout=0.05):
+                pass
+
+    results = []
+
+    def borrow():
+        with pool.checkout(timeout=2) as driver:
+            results.append(driver)
+
+    with pool.checkout() as first:
+        worker = threading.Thread(target=borrow)
+        worker.start()
+    worker.join()
+    assert results == [first]
+    pool.close()
+
+
+def test_selenium_fetcher_borrows_driver_from_pool():
+    pool, created = make_pool(size=1)
+    fetcher = SeleniumFetcher(pool=pool)
+    fetcher._search = lambda query, limit: [{'title': query, 'driver': fetcher.driver}]
+
+    assert fetcher.search("crispr")[0]['driver'] is created[0]
+    assert fetcher.driver is None
+    fetcher.search("again")
+    assert len(created) == 1
+    assert pool.stats['checkouts'] == 2
+    pool.close()
+
+
+def test_driver_path_resolution_is_cached(tmp_path, monkeypatch):
+    binary = tmp_path / "chromedriver"
+    binary.write_text("")
+    installs = []
+
+    class FakeManager:
+        def install(self):
+            installs.append(1)
+            return str(binary)
+
+    monkeypatch.setattr(core, "ChromeDriverManager", FakeManager)
+    monkeypatch.setattr(core, "DRIVER_PATH_CACHE", str(tmp_path / "cache" / "chromedriver_path"))
+    monkeypatch.setattr(core, "_driver_path", None)
+    monkeypatch.delenv("ARES_CHROMEDRIVER", raising=False)
+
+    assert core.resolve_driver_path() == str(binary)
+    assert core.resolve_driver_path() == str(binary)
+    monkeypatch.setattr(core, "_driver_path", None)  # 模擬新的行程：改讀磁碟快取
+    assert core.resolve_driver_path() == str(binary)
+    assert len(installs) == 1
+
+
+def test_lean_profile_blocks_resources_through_devtools(monkeypatch):
+    launched = {}
+
+    class FakeChrome:
+        def __init__(self, service, options):
+            launched['arguments'] = options.arguments
+            self.cdp = []
+
+        def execute_cdp_cmd(self, cmd, params):
+            self.cdp.append((cmd, params))
+
+        def execute_script(self, script):
+            return [48_000, 3]
+
+    monkeypatch.setattr(core.webdriver, "Chrome", FakeChrome)
+    monkeypatch.setenv("ARES_CHROMEDRIVER", "/usr/bin/chromedriver")
+
+    driver = core.setup_driver(headless=True, profile="lean", memory_cap_mb=256)
+    assert "--start-maximized" not in launched['arguments']
+    assert "--js-flags=--max-old-space-size=256" in launched['arguments']
+    assert driver.cdp[0] == ("Network.enable", {})
+    blocked = driver.cdp[1][1]['urls']
+    assert "*.woff2" in blocked and "*.css" in blocked and "*google-analytics.com*" in blocked
+    assert core.page_transfer_bytes(driver) == {'bytes': 48_000, 'requests': 3}
+
+    default = core.setup_driver(headless=True)
+    assert "--start-maximized" in launched['arguments'] and default.cdp == []
@@ -0,0 +1,98 @@
+import json
+import re
+
+import pytest
+
+from Ares.departments.Research.editor import ResearchEditor
+
+
+class FakeLLM:
+    """依提示詞回傳固定 JSON 的 LLM，記錄收到的提示詞。"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return self.respond(prompt)
+
+
+def single_review(prompt):
+    title = re.search(r"標題：(.*)", prompt).group(1)
+    return json.dumps({'score': 6, 'tldr': f"單篇：{title}", 'innovation': "方法", 'recommendation': "可讀"})
+
+
+def batch_reviews(prompt):
+    indexes = [int(i) for i in re.findall(r"^\[(\d+)\]$", prompt, re.MULTILINE)]
+    return json.dumps([
+        {'index': i, 'score': 12, 'tldr': f"批次 {i}", 'innovation': "方法", 'recommendation': "可讀"}
+        for i in reversed(indexes)
+    ])
+
+
+def make_papers(count):
+    return [{'title': f"Paper {i}", 'snippet': f"Abstract of paper {i} " * 5} for i in range(count)]
+
+
+def make_editor(batch_respond=batch_reviews, **kwargs):
+    return ResearchEditor(llm=FakeLLM(single_review), batch_llm=FakeLLM(batch_respond), **kwargs)
+
+
+def test_review_batch_maps_results_by_index():
+    editor = make_editor()
+    results = editor.review_batch(make_papers(4))
+
+    assert len(editor.batch_llm.prompts) == 1
+    assert editor.llm.prompts == []
+    assert [r['tldr'] for r in results] == ["批次 0", "批次 1", "批次 2", "批次 3"]
+    assert all(r['score'] == 10 for r in results)
+
+
+def test_review_batch_falls_back_for_invalid_items():
+    def partial(prompt):
+        items = json.loads(batch_reviews(prompt))
+        items = [item for item in items if item['index'] != 1]  # 缺少第 1 篇
+        items[0]['tldr'] = ""                                    # 第 3 篇欄位為空
+        return json.dumps(items + [{'index': 9, 'score': 5, 'tldr': "x", 'innovation': "x", 'recommendation': "x"}])
+
+    editor = make_editor(partial)
+    papers = make_papers(4) + [{'title': "Short", 'snippet': "tiny"}]
+    results = editor.review_batch(papers)
+
+    assert [r['tldr'] for r in results[:4]] == ["批次 0", "單篇：Paper 1", "批次 2", "單篇：Paper 3"]
+    assert results[4]['error'] == "論文摘要太短或為空，無法進行分析"
+    assert editor.batch_stats['fallbacks'] == 2
+
+
+def test_review_batch_acquires_limiter_for_every_request():
+    class CountingLimiter:
+        calls = 0
+
+        def acquire(self):
+            self.calls += 1
+
+    limiter = CountingLimiter()
+    editor = make_editor(lambda prompt: "抱歉，我無法處理")
+    editor.review_batch(make_papers(3), limiter=limiter)
+
+    # 1 次批次請求 + 3 次逐篇補審
+    assert limiter.calls == 1 + len(editor.llm.prompts) == 4
+
+
+def test_review_batch_falls_back_when_response_is_not_json():
+    editor = make_editor(lambda prompt: "抱歉，我無法處理")
+    results = editor.review_batch(make_papers(3))
+
+    assert [r['tldr'] for r in results] == ["單篇：Paper 0", "單篇：Paper 1", "單篇：Paper 2"]
+    assert len(editor.llm.prompts) == 3
+
+
+@pytest.mark.parametrize("budget, expected", [(100_000, 1), (1500, 3)])
+def test_plan_batches_respects_token_budget(budget, expected):
+    editor = make_editor(batch_token_budget=budget, max_batch_size=20)
+    groups = editor.plan_batches(make_papers(12))
+
+    assert len(groups) == expected
+    assert [i for group in groups for i in group] == list(range(12))
+    assert len(make_editor(max_batch_size=5).plan_batches(make_papers(12))) == 3
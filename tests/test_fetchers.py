@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from Ares.departments.Research.fetchers import DetailFetcher, EUtilsFetcher, PaperFetcher, NO_ABSTRACT
+from Ares.departments.Research.scout import PubMedScout
+from Ares.utils.throttle import HostRateLimiter
+
+
+def test_eutils_search_parses_recorded_fixtures(pubmed_stub):
+    fetcher = EUtilsFetcher(base_url=pubmed_stub.base_url)
+    papers = fetcher.search("crispr sickle cell", limit=3)
+    fetcher.close()
+
+    assert [p['pmid'] for p in papers] == ["39012345", "38876543", "38765432"]
+    first = papers[0]
+    assert first['title'] == "Exagamglogene Autotemcel for Severe Sickle Cell Disease."
+    assert first['link'] == "https://pubmed.ncbi.nlm.nih.gov/39012345/"
+    assert first['snippet'].startswith("Background: Exagamglogene autotemcel")
+    assert "ex vivo CRISPR-Cas9" in first['snippet']
+    assert first['date'] == "2024-08-01"
+    assert papers[1]['title'].startswith("Base editing of the HBB locus")
+    assert papers[1]['date'] == "2024-06"
+    assert papers[2]['snippet'] == NO_ABSTRACT
+    assert papers[2]['date'] == "2024-05"
+
+
+def test_efetch_batches_ids(pubmed_stub):
+    fetcher = EUtilsFetcher(base_url=pubmed_stub.base_url, batch_size=2)
+    papers = fetcher.efetch(pubmed_stub.pmids)
+
+    assert [p['pmid'] for p in papers] == pubmed_stub.pmids
+    efetch_calls = [params for endpoint, params in pubmed_stub.requests if endpoint == "efetch.fcgi"]
+    assert [len(params['id'].split(",")) for params in efetch_calls] == [2, 2, 1]
+
+
+class BrokenFetcher(PaperFetcher):
+    name = "broken"
+
+    def search(self, query, limit=5):
+        raise ConnectionError("unreachable")
+
+
+class StaticFetcher(PaperFetcher):
+    name = "static"
+
+    def search(self, query, limit=5):
+        return [{'title': 'Fallback', 'link': '', 'snippet': NO_ABSTRACT}]
+
+
+def test_scout_falls_back_to_next_backend():
+    scout = PubMedScout(fetchers=[BrokenFetcher(), StaticFetcher()])
+    assert scout.search("anything")[0]['title'] == "Fallback"
+
+    with pytest.raises(RuntimeError, match="broken: unreachable"):
+        PubMedScout(fetchers=[BrokenFetcher()]).search("anything")
+
+
+def test_detail_fetcher_collects_abstracts_concurrently(pubmed_stub):
+    pubmed_stub.detail_delay = 0.2
+    links = [f"{pubmed_stub.host_url}/{pmid}/" for pmid in pubmed_stub.pmids[:4]]
+    fetcher = DetailFetcher(max_workers=4, rate_limiter=HostRateLimiter(default_rate=100))
+
+    start = time.perf_counter()
+    abstracts = fetcher.fetch_abstracts(links)
+    elapsed = time.perf_counter() - start
+    fetcher.close()
+
+    assert elapsed < 0.6  # 序列抓取至少需要 0.8 秒
+    assert "CRISPR-Cas9 gene editing" in abstracts[links[0]]
+    assert abstracts[links[2]] == ""  # 沒有摘要的論文
+
+
+def test_iter_search_pages_through_results_with_prefetch(pubmed_stub):
+    fetcher = EUtilsFetcher(base_url=pubmed_stub.base_url)
+    papers = fetcher.iter_search("crispr", page_size=2, since="2024-01-01")
+
+    first = next(papers)
+    time.sleep(0.2)  # 處理第一篇時，下一頁已在背景抓取
+    starts = [params['retstart'] for endpoint, params in pubmed_stub.requests if endpoint == "esearch.fcgi"]
+    assert first['pmid'] == pubmed_stub.pmids[0]
+    assert starts == ["0", "2"]
+
+    rest = list(papers)
+    assert [p['pmid'] for p in [first, *rest]] == pubmed_stub.pmids
+    esearch = [params for endpoint, params in pubmed_stub.requests if endpoint == "esearch.fcgi"]
+    assert esearch[0]['mindate'] == "2024/01/01" and esearch[0]['datetype'] == "edat"
+
+    limited = list(EUtilsFetcher(base_url=pubmed_stub.base_url).iter_search("crispr", limit=3, page_size=2))
+    assert [p['pmid'] for p in limited] == pubmed_stub.pmids[:3]
+    fetcher.close()
+
+
+def test_scout_iter_search_falls_back_before_first_paper():
+    scout = PubMedScout(fetchers=[BrokenFetcher(), StaticFetcher()])
+    assert [p['title'] for p in scout.iter_search("anything", limit=10)] == ["Fallback"]
+
+
+def test_default_iter_search_drops_undated_papers_when_since_is_given(capsys):
+    class DatedFetcher(PaperFetcher):
+        name = "dated"
+
+        def search(self, query, limit=5):
+            return [
+                {'title': 'Old', 'date': '2023-05-01'},
+                {'title': 'New', 'date': '2024-03'},
+                {'title': 'Undated'},
+            ]
+
+    fetcher = DatedFetcher()
+    assert [p['title'] for p in fetcher.iter_search("x", since="2024-01-01")] == ["New"]
+    assert "1 篇論文沒有日期" in capsys.readouterr().out
+    assert len(list(fetcher.iter_search("x"))) == 3
@@ -0,0 +1,27 @@
+from Ares.brain.grounding import CitationGrounder
+
+PAPERS = [
+    "Deep Learning for Drug Discovery\n\n本研究使用圖神經網路預測藥物與標靶的交互作用。模型在多標靶資料集上的準確率提升了百分之九十五。",
+    "Transformer Models in Bioinformatics\n\n作者設計了針對蛋白質序列的注意力機制。此方法在基準資料集上取得最佳結果，並具備可解釋性。",
+]
+
+
+def test_ground_returns_sentence_spans_for_each_citation():
+    grounder = CitationGrounder(PAPERS)
+    response = "根據記憶庫中的資料，圖神經網路可以預測藥物交互作用 [1]。另外，蛋白質序列的注意力機制具備可解釋性 [2]。"
+
+    grounded = grounder.ground(response, max_spans=1)
+
+    assert set(grounded) == {1, 2}
+    span = grounded[1][0]
+    assert span.text == "本研究使用圖神經網路預測藥物與標靶的交互作用。"
+    assert PAPERS[0][span.start:span.end] == span.text
+    assert "注意力機制" in grounded[2][0].text
+
+
+def test_ground_handles_multi_citations_and_out_of_range_ids():
+    grounder = CitationGrounder(PAPERS)
+    grounded = grounder.ground("兩篇論文都在基準資料集上提升準確率 [1, 2]，詳見 [7]。")
+
+    assert set(grounded) == {1, 2}
+    assert all(grounded[ref_id] for ref_id in (1, 2))
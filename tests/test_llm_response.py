@@ -0,0 +1,37 @@
+import pytest
+from langchain_core.messages import AIMessage
+
+from Ares.utils.llm_response import extract_text, parse_json
+
+ANSWER = "根據記憶庫中的資料，GNN 可預測藥物交互作用 [1]。"
+
+
+@pytest.mark.parametrize("response", [
+    AIMessage(content=ANSWER),
+    AIMessage(content=[{'type': 'text', 'text': ANSWER, 'extras': {'signature': 'abc=='}}]),
+    [{'type': 'thinking', 'thinking': '...'}, {'type': 'text', 'text': ANSWER}],
+    {'type': 'text', 'text': ANSWER},
+    str({'type': 'text', 'text': ANSWER, 'extras': {'signature': 'abc=='}}),
+    "{'type': 'text', 'text': \"" + ANSWER + "\", 'extras': {'signature': 'broken",
+    "  " + ANSWER + "\n",
+])
+def test_extract_text_handles_response_shapes(response):
+    assert extract_text(response) == ANSWER
+
+
+@pytest.mark.parametrize("text", [
+    '{"score": 8, "tldr": "摘要"}',
+    '```json\n{"score": 8, "tldr": "摘要"}\n```',
+    '以下是分析：{"score": 8, "tldr": "摘要"} 謝謝',
+    "{'score': 8, 'tldr': '摘要'}",
+    '{"score": 8, "tldr": "摘要",}',
+    str({'type': 'text', 'text': '{"score": 8, "tldr": "摘要"}', 'extras': {}}),
+])
+def test_parse_json_repairs_common_formats(text):
+    assert parse_json(text) == {'score': 8, 'tldr': '摘要'}
+
+
+def test_parse_json_array_and_failure():
+    assert parse_json('```json\n[{"index": 0}, {"index": 1}]\n```', expect=list) == [{'index': 0}, {'index': 1}]
+    with pytest.raises(ValueError, match="JSON 解析失敗"):
+        parse_json("完全不是 JSON")
@@ -0,0 +1,87 @@
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from Ares.brain.memory import KnowledgeBase
+from Ares.brain.maintenance import KnowledgeMaintainer
+
+
+def make_papers():
+    return [
+        {'Title': f'Paper {i}', 'TLDR': f'summary {i}', 'Innovation': f'idea {i}',
+         'Link': f'https://example.com/{i}', 'Score': score, 'Date': date}
+        for i, (score, date) in enumerate([(9, '2026-01-18'), ('3/10', '2026-01-18'), (8, '2025-06-01')])
+    ]
+
+
+def test_maintenance_dedup_archive_reindex_restore(tmp_path):
+    kb = KnowledgeBase(persist_directory=str(tmp_path / "hot"), embeddings=DeterministicFakeEmbedding(size=16))
+    kb.memorize(make_papers(), tag="AI")
+    kb.memorize(make_papers()[:1], tag="AI")  # 重複寫入
+    maintainer = KnowledgeMaintainer(kb, cold_directory=str(tmp_path / "cold"))
+
+    report = maintainer.run(min_score=5, before='2026-01-01', m=8, ef_search=50)
+
+    assert report['before']['documents'] == 4
+    assert report['deduplicated'] == 1
+    assert report['archived'] == 2
+    assert report['after']['documents'] == 1
+    assert report['after']['cold_bytes'] > 0
+    assert kb._chroma_collection().configuration['hnsw']['max_neighbors'] == 8
+    assert [d.metadata['Title'] for d in kb.recall("paper", k=5)] == ['Paper 0']
+
+    archive_file = next((tmp_path / "cold").glob("*.jsonl.gz"))
+    assert maintainer.restore(str(archive_file)) == 2
+    assert len(kb.recall("paper", k=5)) == 3
+
+
+def test_normalize_metadata_backfills_legacy_records(tmp_path):
+    kb = KnowledgeBase(persist_directory=str(tmp_path / "hot"), embeddings=DeterministicFakeEmbedding(size=16))
+    kb.vector_db.add_texts(["legacy paper"], metadatas=[{'Title': 'Legacy', 'Score': '8/10', 'Date': '2026-01-18', 'category': 'AI'}])
+    maintainer = KnowledgeMaintainer(kb, cold_directory=str(tmp_path / "cold"))
+
+    assert kb.recall("legacy", k=1, min_score=7) == []
+    assert maintainer.normalize_metadata() == 1
+    assert maintainer.normalize_metadata() == 0
+
+    docs = kb.recall("legacy", k=1, min_score=7, since="2026-01")
+    assert docs[0].metadata['Score'] == 8.0
+    assert docs[0].metadata['date_ord'] == 20260118
+
+
+def test_archive_rejects_invalid_date(tmp_path):
+    kb = KnowledgeBase(persist_directory=str(tmp_path / "hot"), embeddings=DeterministicFakeEmbedding(size=16))
+    kb.memorize(make_papers(), tag="AI")
+    maintainer = KnowledgeMaintainer(kb, cold_directory=str(tmp_path / "cold"))
+
+    with pytest.raises(ValueError):
+        maintainer.run(before="2026/13/01")
+    with pytest.raises(ValueError):
+        maintainer.archive(before="last year")
+    assert kb._chroma_collection().count() == 3
+    assert maintainer.archive(before="2026-01-01T00:00:00") == 1
+
+
+def test_reindex_keeps_live_collection_when_swap_fails(tmp_path, monkeypatch):
+    kb = KnowledgeBase(persist_directory=str(tmp_path / "hot"), embeddings=DeterministicFakeEmbedding(size=16))
+    kb.memorize(make_papers(), tag="AI")
+    maintainer = KnowledgeMaintainer(kb, cold_directory=str(tmp_path / "cold"))
+    client = kb._chroma_client()
+    original_create = client.create_collection
+
+    def create_collection(*args, **kwargs):
+        target = original_create(*args, **kwargs)
+
+        def broken_modify(name=None, **kw):  # 「新集合改名為正式名稱」這一步失敗
+            raise RuntimeError("disk full")
+
+        monkeypatch.setattr(target, "modify", broken_modify)
+        return target
+
+    monkeypatch.setattr(client, "create_collection", create_collection)
+
+    with pytest.raises(RuntimeError):
+        maintainer.reindex(m=8)
+    names = {c.name for c in client.list_collections()}
+    assert KnowledgeBase.COLLECTION_NAME in names
+    assert KnowledgeBase.COLLECTION_NAME + KnowledgeMaintainer.BACKUP_SUFFIX not in names
+    assert client.get_collection(KnowledgeBase.COLLECTION_NAME).count() == 3
@@ -0,0 +1,131 @@
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from Ares.brain.memory import KnowledgeBase
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    """會記錄呼叫次數的本地假嵌入模型"""
+    query_calls: int = 0
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return super().embed_query(text)
+
+
+PAPERS = [
+    {'Title': 'Deep Learning for Drug Discovery', 'TLDR': 'GNN for drug-target interactions',
+     'Innovation': 'Multi-target GNN', 'Link': 'https://example.com/1', 'Score': 9, 'Date': '2026-01-17'},
+    {'Title': 'Transformer Models in Bioinformatics', 'TLDR': 'Attention for protein sequences',
+     'Innovation': 'Biological attention', 'Link': 'https://example.com/2', 'Score': 7, 'Date': '2026-01-18'},
+]
+
+
+@pytest.fixture
+def kb(tmp_path):
+    """使用暫存目錄與本地嵌入的知識庫"""
+    return KnowledgeBase(persist_directory=str(tmp_path / "store"), embeddings=CountingEmbedding(size=32))
+
+
+def test_recall_cache_hit_skips_embedding(kb):
+    kb.memorize(PAPERS, tag="AI")
+    first = kb.recall("deep learning", k=1, filter_tag="AI")
+    calls = kb.embeddings.query_calls
+
+    # 大小寫與空白不同的相同問題應命中快取
+    second = kb.recall("  Deep   LEARNING ", k=1, filter_tag="AI")
+
+    assert kb.embeddings.query_calls == calls
+    assert [d.page_content for d in second] == [d.page_content for d in first]
+    assert kb.recall_cache.stats['hits'] == 1
+
+
+def test_recall_cache_invalidated_by_memorize_and_clear(kb):
+    kb.memorize(PAPERS[:1], tag="AI")
+    version = kb.version
+    assert len(kb.recall("drug", k=5)) == 1
+
+    kb.memorize(PAPERS[1:], tag="AI")
+    assert kb.version == version + 1
+    assert len(kb.recall("drug", k=5)) == 2
+
+    kb.clear()
+    assert kb.version == version + 2
+    assert kb.recall("drug", k=5) == []
+
+
+def test_version_persists_across_instances(kb, tmp_path):
+    kb.memorize(PAPERS, tag="AI")
+    reopened = KnowledgeBase(persist_directory=kb.persist_directory, embeddings=CountingEmbedding(size=32))
+    assert reopened.version == kb.version
+
+
+def test_recall_many_matches_recall_and_batches_embeddings(kb):
+    kb.memorize(PAPERS, tag="AI")
+    kb.memorize([dict(PAPERS[0], Title='Cell Atlas', Link='https://example.com/3')], tag="Biology")
+    queries = ["deep learning", "protein attention", "deep learning"]
+
+    batched = kb.recall_many(queries, k=2, filter_tag=["AI", "AI", "Biology"])
+    kb.recall_cache.clear()
+
+    assert len(batched) == 3
+    assert [d.page_content for d in batched[0]] == [d.page_content for d in kb.recall(queries[0], k=2, filter_tag="AI")]
+    assert all(d.metadata['category'] == "Biology" for d in batched[2])
+    # recall_many 只使用批次嵌入，並寫入向量快取，之後的 recall 不再呼叫 embed_query
+    assert kb.embeddings.query_calls == 0
+
+
+def test_recall_pushes_down_score_and_date_filters(kb):
+    kb.memorize([dict(PAPERS[0], Score='9/10'), dict(PAPERS[1], Score=' 6 ', Date='2025/12/30')], tag="AI")
+
+    docs = kb.recall("learning", k=5, filter_tag="AI", min_score=7, since="2026-01")
+    assert [d.metadata['Title'] for d in docs] == [PAPERS[0]['Title']]
+    assert docs[0].metadata['Score'] == 9.0
+    assert docs[0].metadata['Date'] == '2026-01-17'
+
+    older = kb.recall_many(["learning"], k=5, until="2025-12-31")
+    assert [d.metadata['Title'] for d in older[0]] == [PAPERS[1]['Title']]
+
+
+def test_cached_recall_returns_copies(kb):
+    kb.memorize(PAPERS, tag="AI")
+    first = kb.recall("deep learning", k=1)
+    first[0].metadata['Title'] = "changed"
+    first.clear()
+
+    again = kb.recall("deep learning", k=1)
+    assert again[0].metadata['Title'] == PAPERS[0]['Title']
+    again[0].page_content = "changed"
+    assert kb.recall("deep learning", k=1)[0].page_content != "changed"
+
+
+def test_embedding_cache_keyed_by_normalized_query(kb):
+    kb.embed_query("Deep Learning")
+    kb.embed_query("  deep   learning ")
+
+    assert kb.embeddings.query_calls == 1
+
+
+def test_recall_many_shares_embedding_cache(kb):
+    kb.recall_many(["Deep Learning"], k=1)
+    kb.embed_query("  deep   learning ")
+
+    assert kb.embeddings.query_calls == 0
+    assert kb.embedding_cache.stats['hits'] == 1
+
+
+def test_version_file_checked_at_most_once_per_interval(kb, monkeypatch):
+    kb.memorize(PAPERS, tag="AI")
+    other = KnowledgeBase(persist_directory=kb.persist_directory, embeddings=CountingEmbedding(size=32),
+                          version_check_interval=60)
+    version = other.version
+    loads = []
+    monkeypatch.setattr(other, "_load_version", lambda: loads.append(1))
+
+    for _ in range(5):
+        assert other.version == version
+    assert loads == []
+
+    other._version_checked_at -= 60
+    other.version
+    assert loads == [1]
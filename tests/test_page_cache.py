@@ -0,0 +1,50 @@
+from Ares.departments.Research.fetchers import DetailFetcher, EUtilsFetcher
+from Ares.spider.cache import PageCache, cache_key
+from Ares.utils.throttle import HostRateLimiter
+
+
+def endpoints(stub):
+    return [endpoint or "detail" for endpoint, _ in stub.requests]
+
+
+def test_cache_compresses_and_expires_per_kind(tmp_path):
+    cache = PageCache(path=str(tmp_path / "pages.sqlite3"), ttls={'search': 0})
+    body = b"<eSearchResult>" + b"<Id>39012345</Id>" * 500 + b"</eSearchResult>"
+    cache.put("esearch?term=crispr", body, kind="search", etag='"v1"')
+    cache.put("pubmed:39012345", b'{"title": "x"}', kind="paper")
+
+    stored = cache._conn.execute("SELECT length(body) FROM pages WHERE kind = 'search'").fetchone()[0]
+    assert stored < len(body) / 10
+    assert cache.get_fresh("esearch?term=crispr") is None  # search 類型立即過期
+    assert cache.get("esearch?term=crispr").conditional_headers() == {'If-None-Match': '"v1"'}
+    assert cache.get_fresh("pubmed:39012345") == b'{"title": "x"}'
+    assert cache_key("https://x/esearch.fcgi", {'term': 'a', 'api_key': 'secret'}) == "https://x/esearch.fcgi?term=a"
+
+
+def test_rerun_hits_cache_and_revalidates_search_with_etag(pubmed_stub, tmp_path):
+    cache = PageCache(path=str(tmp_path / "pages.sqlite3"), ttls={'search': 0})
+    first = EUtilsFetcher(base_url=pubmed_stub.base_url, cache=cache).search("crispr", limit=3)
+    assert endpoints(pubmed_stub) == ["esearch.fcgi", "efetch.fcgi"]
+
+    second = EUtilsFetcher(base_url=pubmed_stub.base_url, cache=cache).search("crispr", limit=3)
+    assert second == first
+    # 搜尋結果已過期但 ETag 未變更（304），論文內容全部來自快取，不再呼叫 EFetch
+    assert endpoints(pubmed_stub) == ["esearch.fcgi", "efetch.fcgi", "esearch.fcgi"]
+    assert pubmed_stub.not_modified == 1
+
+    EUtilsFetcher(base_url=pubmed_stub.base_url, cache=cache).search("crispr", limit=5)
+    efetch_ids = [params['id'] for endpoint, params in pubmed_stub.requests if endpoint == "efetch.fcgi"]
+    assert efetch_ids[-1] == ",".join(pubmed_stub.pmids[3:5])  # 只下載新出現的論文
+    assert cache.stats['revalidated'] == 1
+
+
+def test_detail_pages_are_cached(pubmed_stub, tmp_path):
+    cache = PageCache(path=str(tmp_path / "pages.sqlite3"))
+    link = f"{pubmed_stub.host_url}/{pubmed_stub.pmids[0]}/"
+    fetcher = DetailFetcher(rate_limiter=HostRateLimiter(default_rate=100), cache=cache)
+
+    first = fetcher.fetch_abstract(link)
+    assert fetcher.fetch_abstract(link) == first
+    assert "CRISPR-Cas9" in first
+    assert endpoints(pubmed_stub) == ["detail"]
+    assert cache.stats['hits'] == 1
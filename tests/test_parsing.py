@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from Ares.departments.Research.parsing import NO_ABSTRACT, extract_abstract, parse_search_results
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "pubmed"
+
+
+def test_parse_search_results_from_saved_page():
+    html = (FIXTURES_DIR / "search_results.html").read_text(encoding="utf-8")
+    results = parse_search_results(html, limit=10)
+
+    assert len(results) == 5
+    assert results[0]['title'] == "Exagamglogene Autotemcel for Severe Sickle Cell Disease."
+    assert results[0]['link'] == "https://pubmed.ncbi.nlm.nih.gov/39012345/"
+    assert results[0]['snippet'].startswith("Background: Exagamglogene autotemcel")
+    # 沒有摘要片段時取標題之後的文字（與舊版相同）
+    assert results[2]['snippet'] != NO_ABSTRACT and "PMID: 38765432" in results[2]['snippet']
+    assert [r['title'] for r in parse_search_results(html, limit=2)] == [r['title'] for r in results[:2]]
+
+
+def test_docsum_content_fallback_and_empty_page():
+    html = ('<div class="docsum-content"><a href="/123/">A short title</a>'
+            '<p class="Snippet-Text">Fallback snippet found by class substring.</p></div>')
+    assert parse_search_results(html) == [{
+        'title': "A short title",
+        'link': "https://pubmed.ncbi.nlm.nih.gov/123/",
+        'snippet': "Fallback snippet found by class substring.",
+    }]
+    assert parse_search_results("") == []
+
+
+def test_extract_abstract_from_detail_page():
+    html = (FIXTURES_DIR / "detail.html").read_text(encoding="utf-8")
+    assert extract_abstract(html).startswith("Abstract Background: Exagamglogene autotemcel")
+
+    keyword_only = "<html><body><p>" + "Results: the intervention reduced vaso-occlusive events. " * 2 + "</p></body></html>"
+    assert extract_abstract(keyword_only).startswith("Results:")
+    assert extract_abstract("<html><body><p>nothing here</p></body></html>") == ""
@@ -0,0 +1,236 @@
+import json
+import re
+import threading
+import time
+
+import pytest
+
+from Ares.departments.Research.editor import ResearchEditor
+from Ares.departments.Research.manager import ResearchPipeline
+
+
+class FakeScout:
+    def __init__(self, papers):
+        self.papers = papers
+        self.closed = False
+
+    def search(self, query, limit=5):
+        return self.papers[:limit]
+
+    def close(self):
+        self.closed = True
+
+
+class SlowEditor:
+    """每篇審查耗時 delay 秒，標題含 "boom" 時拋出例外，並記錄同時進行的審查數。"""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def review(self, paper):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            # 讓前面的論文較晚完成，確認結果仍依輸入順序排列
+            time.sleep(self.delay * (1 + 1 / (1 + int(paper['title'].split()[-1]))))
+            if "boom" in paper['title']:
+                raise RuntimeError("LLM 逾時")
+            return {'score': 7, 'tldr': paper['title'], 'innovation': "新方法", 'recommendation': "值得閱讀"}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class FakeBrain:
+    def __init__(self):
+        self.memorized = []
+
+    def memorize(self, papers, tag=None):
+        self.memorized.extend(papers)
+
+
+class FakePublisher:
+    def __init__(self):
+        self.published = None
+
+    def publish(self, papers, output_file):
+        self.published = papers
+
+
+def make_papers(count, failing=()):
+    return [
+        {'title': f"{'boom ' if i in failing else ''}Paper {i}", 'link': f"https://example.org/{i}", 'snippet': "x" * 50}
+        for i in range(count)
+    ]
+
+
+def make_pipeline(papers, editor, **kwargs):
+    return ResearchPipeline(
+        scout=FakeScout(papers), editor=editor, publisher=FakePublisher(), brain=FakeBrain(), **kwargs
+    )
+
+
+def test_reviews_run_concurrently_and_keep_input_order():
+    papers = make_papers(8)
+    editor = SlowEditor(delay=0.1)
+    pipeline = make_pipeline(papers, editor, review_concurrency=4, review_rate=None)
+
+    start = time.perf_counter()
+    reviewed = pipeline.review_papers(papers)
+    elapsed = time.perf_counter() - start
+
+    assert [p['title'] for p in reviewed] == [p['title'] for p in papers]
+    assert all(p['analysis']['tldr'] == p['title'] for p in reviewed)
+    assert editor.peak == 4
+    # 逐篇審查至少需要 8 × 0.1 秒
+    assert elapsed < 0.6
+
+
+def test_failed_review_only_affects_that_paper(tmp_path):
+    papers = make_papers(5, failing={2})
+    pipeline = make_pipeline(papers, SlowEditor(delay=0.01), review_concurrency=3, review_rate=None)
+
+    pipeline.run_daily_brief("crispr", limit=5, output_file=str(tmp_path / "brief.md"))
+
+    published = pipeline.publisher.published
+    assert [p['title'] for p in published] == [p['title'] for p in papers]
+    failed = published[2]['analysis']
+    assert failed == {
+        'score': 0, 'tldr': '分析失敗', 'innovation': '無法分析', 'recommendation': '無法提供建議', 'error': "LLM 逾時"
+    }
+    assert len(pipeline.brain.memorized) == 4
+    assert pipeline.scout.closed
+
+
+def test_review_rate_limit_spaces_out_requests():
+    papers = make_papers(6)
+    pipeline = make_pipeline(papers, SlowEditor(delay=0), review_concurrency=2, review_rate=20.0)
+
+    start = time.perf_counter()
+    pipeline.review_papers(papers)
+
+    # 權杖桶容量等於並行數（2），其餘 4 篇以每秒 20 篇的速率放行
+    assert time.perf_counter() - start >= 0.15
+
+
+class BatchLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        indexes = re.findall(r"^\[(\d+)\]$", prompt, re.MULTILINE)
+        return json.dumps([
+            {'index': int(i), 'score': 8, 'tldr': f"批次 {i}", 'innovation': "方法", 'recommendation': "可讀"}
+            for i in indexes
+        ])
+
+
+def test_pipeline_sends_batched_reviews():
+    papers = make_papers(6)
+    editor = ResearchEditor(llm=BatchLLM(), batch_llm=BatchLLM(), max_batch_size=3)
+    pipeline = make_pipeline(papers, editor, review_concurrency=2, review_rate=None)
+
+    reviewed = pipeline.review_papers(papers)
+
+    assert len(editor.batch_llm.prompts) == 2
+    assert editor.llm.prompts == []
+    assert [p['analysis']['tldr'] for p in reviewed] == ["批次 0", "批次 1", "批次 2"] * 2
+
+
+def test_pipeline_consults_review_cache_before_scheduling(tmp_path):
+    from Ares.departments.Research.review_cache import ReviewCache
+
+    papers = make_papers(4, failing={3})
+    cache = ReviewCache(tmp_path / "reviews.sqlite3")
+    editor = SlowEditor(delay=0)
+    editor.PROMPT_VERSION, editor.MODEL_NAME = "1", "fake"
+    pipeline = make_pipeline(papers, editor, review_rate=None, batch_reviews=False, review_cache=cache)
+
+    first = pipeline.review_papers(papers)
+    editor.review = lambda paper: {'score': 1, 'tldr': "重新審查", 'innovation': "", 'recommendation': ""}
+    second = pipeline.review_papers(papers)
+
+    assert [p['analysis'] for p in second[:3]] == [p['analysis'] for p in first[:3]]
+    assert second[3]['analysis']['tldr'] == "重新審查"  # 失敗的審查不寫入快取
+    assert cache.stats['hits'] == 3
+    cache.close()
+
+
+class StreamingScout(FakeScout):
+    """每篇論文間隔 delay 秒產生，模擬分頁抓取。"""
+
+    def __init__(self, papers, delay):
+        super().__init__(papers)
+        self.delay = delay
+        self.finished_at = None
+
+    def iter_search(self, query, limit=None, page_size=100):
+        for paper in self.papers[:limit]:
+            time.sleep(self.delay)
+            yield paper
+        self.finished_at = time.perf_counter()
+
+
+def test_daily_brief_streams_papers_through_stages(tmp_path):
+    papers = make_papers(6, failing={4})
+    reviewed_at = []
+
+    class TimedEditor(SlowEditor):
+        def review(self, paper):
+            result = super().review(paper)
+            reviewed_at.append(time.perf_counter())
+            return result
+
+    pipeline = make_pipeline(papers, TimedEditor(delay=0.01), review_concurrency=2, review_rate=None, queue_size=2)
+    pipeline.scout = StreamingScout(papers, delay=0.05)
+
+    pipeline.run_daily_brief("crispr", limit=6, output_file=str(tmp_path / "brief.md"))
+
+    # 第一篇在搜尋結束前就已完成審查
+    assert min(reviewed_at) < pipeline.scout.finished_at
+    assert [p['title'] for p in pipeline.publisher.published] == [p['title'] for p in papers]
+    assert len(pipeline.brain.memorized) == 5
+    stats = pipeline.last_run_stats
+    assert stats['scout']['items'] == stats['editor']['items'] == stats['brain']['items'] == 6
+    assert stats['editor']['workers'] == 2
+
+
+def test_daily_brief_publishes_partial_results_when_search_fails(tmp_path):
+    papers = make_papers(3)
+
+    class BrokenScout(FakeScout):
+        def iter_search(self, query, limit=None, page_size=100):
+            yield from self.papers[:2]
+            raise ConnectionError("PubMed 連線中斷")
+
+    pipeline = make_pipeline(papers, SlowEditor(delay=0), review_rate=None)
+    pipeline.scout = BrokenScout(papers)
+
+    with pytest.raises(RuntimeError, match="部分日報"):
+        pipeline.run_daily_brief("crispr", limit=3, output_file=str(tmp_path / "brief.md"))
+
+    assert [p['title'] for p in pipeline.publisher.published] == ["Paper 0", "Paper 1"]
+    assert pipeline.scout.closed
+
+
+def test_stage_handler_failure_keeps_every_paper(tmp_path):
+    papers = make_papers(4)
+    pipeline = make_pipeline(papers, SlowEditor(delay=0), review_rate=None)
+
+    def flaky_review(batch, concurrency=None):
+        if any(p['title'] == "Paper 2" for p in batch):
+            raise OSError("review cache unavailable")
+        return [{**p, 'analysis': {'score': 7, 'tldr': p['title'], 'innovation': "", 'recommendation': ""}} for p in batch]
+
+    pipeline.review_papers = flaky_review
+    pipeline.run_daily_brief("crispr", limit=4, output_file=str(tmp_path / "brief.md"))
+
+    published = pipeline.publisher.published
+    assert [p['title'] for p in published] == [p['title'] for p in papers]
+    assert published[2]['analysis']['error'] == "review cache unavailable"
+    assert pipeline.last_run_stats['editor']['errors'] == 1
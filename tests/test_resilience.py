@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import pytest
+import requests
+
+from Ares.departments.Research.fetchers import EUtilsFetcher
+from Ares.spider.core import retry
+from Ares.spider.resilience import (
+    CircuitBreakerRegistry, CircuitOpenError, RetryMetrics, RetryPolicy, is_retryable, resilient,
+)
+
+FAST = RetryPolicy(max_attempts=4, base_delay=0.01, max_delay=0.05)
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+def test_retryable_classification():
+    assert is_retryable(requests.ConnectionError("reset"))
+    assert is_retryable(http_error(503)) and is_retryable(http_error(429))
+    assert not is_retryable(http_error(404))
+    assert not is_retryable(ValueError("bad input"))
+
+
+def test_backoff_grows_exponentially_with_jitter_cap():
+    policy = RetryPolicy(base_delay=1, max_delay=5, jitter=False)
+    assert [policy.backoff(n) for n in range(1, 5)] == [1, 2, 4, 5]
+    jittered = RetryPolicy(base_delay=1, max_delay=5)
+    assert all(0 <= jittered.backoff(3) <= 4 for _ in range(50))
+
+
+def test_resilient_retries_transient_errors_and_records_metrics():
+    metrics = RetryMetrics()
+    calls = []
+
+    @resilient(policy=FAST, metrics=metrics, breakers=CircuitBreakerRegistry())
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    assert flaky() == "ok"
+    snapshot = metrics.snapshot()
+    assert snapshot['retries'] == 2 and snapshot['failures'] == 0
+    assert snapshot['backoff_s'] > 0
+
+    @resilient(policy=FAST, metrics=metrics)
+    def broken():
+        calls.append(1)
+        raise ValueError("programming error")
+
+    before = len(calls)
+    with pytest.raises(ValueError):
+        broken()
+    assert len(calls) - before == 1  # 不可重試的錯誤不重試
+
+
+def test_async_functions_are_supported():
+    attempts = []
+
+    @resilient(policy=FAST, metrics=RetryMetrics())
+    async def fetch():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise TimeoutError("slow")
+        return 42
+
+    assert asyncio.run(fetch()) == 42
+    assert len(attempts) == 2
+
+
+def test_circuit_breaker_fails_fast_and_recovers_after_probe():
+    breakers = CircuitBreakerRegistry(failure_threshold=2, recovery_timeout=0.1)
+    calls = []
+    healthy = {'value': False}
+
+    @resilient(policy=RetryPolicy(max_attempts=1), host="https://down.example.org", breakers=breakers, metrics=RetryMetrics())
+    def request():
+        calls.append(1)
+        if not healthy['value']:
+            raise requests.ConnectionError("refused")
+        return "up"
+
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            request()
+    with pytest.raises(CircuitOpenError):
+        request()
+    assert len(calls) == 2  # 斷路後不再送出請求
+
+    time.sleep(0.12)
+    healthy['value'] = True
+    assert request() == "up"
+    assert breakers.states["down.example.org"] == "closed"
+
+
+def test_legacy_retry_keeps_returning_none():
+    attempts = []
+
+    @retry(times=2, delay=0.01)
+    def always_fails():
+        attempts.append(1)
+        raise RuntimeError("element not found")
+
+    assert always_fails() is None
+    assert len(attempts) == 2
+
+
+def test_eutils_fetcher_retries_503_from_ncbi(pubmed_stub):
+    pubmed_stub.fail_next = 2
+    fetcher = EUtilsFetcher(base_url=pubmed_stub.base_url, retry_policy=FAST, breakers=CircuitBreakerRegistry())
+    papers = fetcher.search("crispr", limit=2)
+    fetcher.close()
+
+    assert [p['pmid'] for p in papers] == pubmed_stub.pmids[:2]
+    assert [endpoint for endpoint, _ in pubmed_stub.requests][:3] == ["esearch.fcgi"] * 3
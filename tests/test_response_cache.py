@@ -0,0 +1,121 @@
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.messages import AIMessage
+
+from langchain_core.documents import Document
+
+from Ares.brain.chat import AresChatbot
+from Ares.brain.memory import KnowledgeBase
+from Ares.brain.response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(path=str(tmp_path / "chat_cache.sqlite3"), threshold=0.95, max_entries=2)
+
+
+def test_similar_query_hits_only_with_same_documents_and_version(cache):
+    cache.put("什麼是 GNN？", [1.0, 0.0, 0.0], ["a", "b"], version=3, response="根據記憶庫中的資料，GNN [1]")
+
+    # 方向幾乎相同的查詢向量、召回論文順序不同也應命中
+    assert cache.get([0.99, 0.05, 0.0], ["b", "a"], version=3) == "根據記憶庫中的資料，GNN [1]"
+    assert cache.get([0.0, 1.0, 0.0], ["a", "b"], version=3) is None
+    assert cache.get([1.0, 0.0, 0.0], ["a", "c"], version=3) is None
+    assert cache.get([1.0, 0.0, 0.0], ["a", "b"], version=4) is None
+    assert cache.get([1.0, 0.0, 0.0], ["a", "b"], version=3, filter_tag="AI") is None
+    assert cache.stats['hits'] == 1
+
+
+def test_lru_eviction_and_persistence(cache, tmp_path):
+    cache.put("q1", [1.0, 0.0], ["a"], 1, "r1")
+    cache.put("q2", [0.0, 1.0], ["b"], 1, "r2")
+    assert cache.get([1.0, 0.0], ["a"], 1) == "r1"  # q1 變為最近使用
+    cache.put("q3", [1.0, 1.0], ["c"], 1, "r3")
+
+    reopened = ResponseCache(path=str(tmp_path / "chat_cache.sqlite3"), max_entries=2)
+    assert len(reopened) == 2
+    assert reopened.get([0.0, 1.0], ["b"], 1) is None
+    assert reopened.get([1.0, 0.0], ["a"], 1) == "r1"
+    assert reopened.get([1.0, 1.0], ["c"], 1) == "r3"
+
+
+class CountingLLM:
+    """回傳固定回答並記錄呼叫次數的假 LLM"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return AIMessage(content="根據記憶庫中的資料，圖神經網路可預測藥物交互作用 [1]。")
+
+
+def test_chatbot_serves_repeat_question_from_cache(tmp_path):
+    bot = AresChatbot(
+        response_cache=ResponseCache(path=str(tmp_path / "chat_cache.sqlite3")),
+        brain=KnowledgeBase(persist_directory=str(tmp_path / "store"), embeddings=DeterministicFakeEmbedding(size=32)),
+        llm=CountingLLM(),
+    )
+
+    bot.brain.memorize([{'Title': 'GNN for Drugs', 'TLDR': 'Graph neural network predicts drug interactions',
+                         'Innovation': 'Multi-target GNN', 'Link': 'https://example.com/1'}], tag="AI")
+
+    first, first_stats = bot.chat_with_stats("GNN 如何用於藥物？")
+    second, second_stats = bot.chat_with_stats("GNN 如何用於藥物？")
+    assert second == first
+    assert bot.llm.calls == 1
+    assert first_stats['cache_hit'] is False
+    assert second_stats['cache_hit'] is True
+
+    # 知識庫更新後版本號改變，需重新生成
+    bot.brain.memorize([{'Title': 'Other', 'TLDR': 'Unrelated', 'Innovation': '', 'Link': 'https://example.com/2'}])
+    bot.chat("GNN 如何用於藥物？")
+    assert bot.llm.calls == 2
+
+
+class ReprStreamingLLM(CountingLLM):
+    """串流回傳無法解析的 parts 字串表示（應被清理，不寫入快取）"""
+
+    def stream(self, prompt):
+        self.calls += 1
+        yield AIMessage(content="{'type': 'text', 'text': 'GNN 可預測藥物', 'extras': {'signature': 'abc'}}")
+
+
+def test_streamed_answer_is_scrubbed_before_caching(tmp_path):
+    bot = AresChatbot(
+        response_cache=ResponseCache(path=str(tmp_path / "chat_cache.sqlite3")),
+        brain=KnowledgeBase(persist_directory=str(tmp_path / "store"), embeddings=DeterministicFakeEmbedding(size=32)),
+        llm=ReprStreamingLLM(),
+    )
+    bot.brain.memorize([{'Title': 'GNN for Drugs', 'TLDR': 'Graph neural network predicts drug interactions',
+                         'Innovation': 'Multi-target GNN', 'Link': 'https://example.com/1'}], tag="AI")
+
+    "".join(bot.chat_stream("GNN 如何用於藥物？"))
+
+    assert len(bot.response_cache) == 0
+    assert "extras" not in bot.chat("GNN 如何用於藥物？")
+
+
+def test_new_question_in_conversation_uses_cache_but_follow_up_does_not(tmp_path):
+    bot = AresChatbot(
+        response_cache=ResponseCache(path=str(tmp_path / "chat_cache.sqlite3")),
+        brain=KnowledgeBase(persist_directory=str(tmp_path / "store"), embeddings=DeterministicFakeEmbedding(size=32)),
+        llm=CountingLLM(),
+    )
+    bot.brain.memorize([{'Title': 'GNN for Drugs', 'TLDR': 'Graph neural network predicts drug interactions',
+                         'Innovation': 'Multi-target GNN', 'Link': 'https://example.com/1'}], tag="AI")
+    first = bot.chat("GNN 如何用於藥物？")
+
+    # 對話先前討論的是另一批論文：新的問題仍可直接使用快取
+    conversation = bot.new_conversation()
+    conversation.remember([Document(page_content="CRISPR", metadata={'Link': 'https://example.com/crispr'})],
+                          version=bot.brain.version)
+    conversation.add_turn("CRISPR 有什麼新進展？", "根據記憶庫中的資料，CRISPR 有新的遞送方式 [1]。")
+    answer, stats = bot.chat_with_stats("GNN 如何用於藥物？", conversation=conversation)
+    assert answer == first and stats['cache_hit'] is True
+    assert bot.llm.calls == 1
+
+    # 明確追問上一輪論文時回答取決於對話內容，不使用快取
+    _, stats = bot.chat_with_stats("這篇用了哪些資料集？", conversation=conversation)
+    assert stats['cache_hit'] is False and stats['memories_reused'] is True
+    assert bot.llm.calls == 2
@@ -0,0 +1,43 @@
+from Ares.departments.Research.review_cache import ReviewCache, review_key
+
+PAPER = {'title': "CRISPR base editing", 'snippet': "Background: base editors convert single nucleotides."}
+ANALYSIS = {'score': 8, 'tldr': "鹼基編輯", 'innovation': "新方法", 'recommendation': "值得閱讀"}
+
+
+def test_key_changes_with_content_prompt_version_and_model():
+    key = review_key(PAPER, "1", "gemini")
+
+    assert review_key({**PAPER, 'link': "https://example.org"}, "1", "gemini") == key
+    assert review_key({**PAPER, 'snippet': PAPER['snippet'] + " More."}, "1", "gemini") != key
+    assert review_key(PAPER, "2", "gemini") != key
+    assert review_key(PAPER, "1", "gemini-pro") != key
+
+
+def test_hit_miss_and_persistence(tmp_path):
+    path = tmp_path / "reviews.sqlite3"
+    cache = ReviewCache(path)
+    assert cache.get(PAPER, "1", "gemini") is None
+    assert cache.put(PAPER, ANALYSIS, "1", "gemini")
+    assert not cache.put({**PAPER, 'title': "Failed"}, {**ANALYSIS, 'score': 0, 'error': "逾時"}, "1", "gemini")
+    assert cache.get(PAPER, "1", "gemini") == ANALYSIS
+    assert cache.get(PAPER, "2", "gemini") is None
+    assert cache.stats == {'hits': 1, 'misses': 2, 'stored': 1, 'hit_rate': 1 / 3}
+    cache.close()
+
+    reopened = ReviewCache(path)
+    assert reopened.get(PAPER, "1", "gemini") == ANALYSIS
+    reopened.close()
+
+
+def test_purge_by_prompt_version(tmp_path):
+    cache = ReviewCache(tmp_path / "reviews.sqlite3")
+    for version in ("1", "2", "3"):
+        for i in range(2):
+            cache.put({**PAPER, 'title': f"Paper {i}"}, ANALYSIS, version, "gemini")
+
+    assert cache.versions() == {"1": 2, "2": 2, "3": 2}
+    assert cache.purge(["1"]) == 2
+    assert cache.purge(keep="3") == 2
+    assert cache.versions() == {"3": 2}
+    assert cache.purge([]) == 0
+    cache.close()
@@ -0,0 +1,42 @@
+import asyncio
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.messages import AIMessage
+
+from Ares.brain.chat import AresChatbot
+from Ares.brain.memory import KnowledgeBase
+from Ares.brain.response_cache import ResponseCache
+from Ares.brain.service import ChatService
+
+
+class SlowAsyncLLM:
+    """記錄最大並行數的假非同步 LLM"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def ainvoke(self, prompt):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        return AIMessage(content="根據檢索到的論文，答案在此 [1]。")
+
+
+def test_achat_many_shares_one_chatbot_and_limits_concurrency(tmp_path):
+    brain = KnowledgeBase(persist_directory=str(tmp_path / "store"), embeddings=DeterministicFakeEmbedding(size=32))
+    brain.memorize([{'Title': 'Paper', 'TLDR': 'Some finding', 'Innovation': 'New idea',
+                     'Link': 'https://example.com/1'}], tag="AI")
+    llm = SlowAsyncLLM()
+    bot = AresChatbot(response_cache=ResponseCache(path=str(tmp_path / "cache.sqlite3"), max_entries=0),
+                      brain=brain, llm=llm)
+    service = ChatService(bot, max_concurrency=3)
+
+    answers = asyncio.run(service.achat_many([f"question {i}" for i in range(9)]))
+
+    assert len(answers) == 9
+    assert all(answer.startswith("根據檢索到的論文") for answer in answers)
+    assert llm.peak == 3
+    assert service.stats['requests'] == 9
+    assert service.stats['in_flight'] == 0
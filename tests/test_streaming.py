@@ -0,0 +1,118 @@
+import threading
+import time
+
+from Ares.utils.streaming import Stage, StreamingPipeline
+
+
+def slow_source(count, delay):
+    for i in range(count):
+        time.sleep(delay)
+        yield i
+
+
+def test_outputs_keep_source_order_across_workers():
+    def double(batch):
+        time.sleep(0.01 * (batch[0] % 3))  # 讓各工作執行緒以不同順序完成
+        return [value * 2 for value in batch]
+
+    pipeline = StreamingPipeline([Stage("double", double, workers=4), Stage("inc", lambda b: [v + 1 for v in b], workers=2)])
+    results = pipeline.run(range(20))
+
+    assert results == [i * 2 + 1 for i in range(20)]
+    assert pipeline.stats['double']['items'] == 20
+    assert pipeline.stats['inc']['items'] == 20
+    assert pipeline.stats['total']['items'] == 20
+
+
+def test_first_item_is_processed_before_source_finishes():
+    processed_at = []
+    pipeline = StreamingPipeline([Stage("record", lambda b: [processed_at.append(time.perf_counter()) or v for v in b])])
+
+    start = time.perf_counter()
+    pipeline.run(slow_source(5, 0.05))
+
+    assert processed_at[0] - start < 0.15
+    assert pipeline.stats['record']['first_output_s'] < 0.15
+
+
+def test_bounded_queue_applies_backpressure():
+    produced = []
+    release = threading.Event()
+
+    def source():
+        for i in range(10):
+            produced.append(i)
+            yield i
+
+    def blocked(batch):
+        release.wait()
+        return batch
+
+    pipeline = StreamingPipeline([Stage("blocked", blocked, workers=1, queue_size=2)])
+    runner = threading.Thread(target=pipeline.run, args=(source(),))
+    runner.start()
+    time.sleep(0.1)
+    # 1 筆處理中 + 佇列 2 筆 + 來源手上 1 筆
+    assert len(produced) <= 4
+    release.set()
+    runner.join(timeout=5)
+    assert len(produced) == 10
+
+
+def test_batches_take_only_items_already_queued():
+    sizes = []
+    pipeline = StreamingPipeline([Stage("batch", lambda b: sizes.append(len(b)) or b, queue_size=16, batch_size=4)])
+    pipeline.run(range(12))
+    assert max(sizes) <= 4
+    assert sum(sizes) == 12
+
+
+def test_failed_batch_is_retried_item_by_item_without_dropping():
+    def fragile(batch):
+        if 3 in batch:
+            raise RuntimeError("boom")
+        return [value * 10 for value in batch]
+
+    pipeline = StreamingPipeline([Stage("fragile", fragile, queue_size=16, batch_size=4)])
+    assert pipeline.run(range(6)) == [0, 10, 20, 3, 40, 50]
+    assert pipeline.stats['fragile']['errors'] == 1
+
+    pipeline = StreamingPipeline([Stage("fragile", fragile, on_error=lambda value, e: f"{value}: {e}")])
+    assert pipeline.run(range(6))[3] == "3: boom"
+
+
+def test_source_error_returns_partial_results():
+    def broken():
+        yield 1
+        yield 2
+        raise ConnectionError("search failed")
+
+    pipeline = StreamingPipeline([Stage("double", lambda b: [v * 2 for v in b])])
+    assert pipeline.run(broken()) == [2, 4]
+    assert isinstance(pipeline.source_error, ConnectionError)
+    assert pipeline.stats['source']['errors'] == 1
+
+    pipeline.run(range(2))
+    assert pipeline.source_error is None
+
+
+def test_base_exception_in_handler_does_not_hang():
+    def interrupted(batch):
+        if 2 in batch:
+            raise KeyboardInterrupt
+        return batch
+
+    pipeline = StreamingPipeline([Stage("interrupted", interrupted), Stage("next", lambda b: b, workers=2)])
+    raised = []
+
+    def run():
+        try:
+            pipeline.run(range(5))
+        except KeyboardInterrupt:
+            raised.append(True)
+
+    runner = threading.Thread(target=run)
+    runner.start()
+    runner.join(timeout=5)
+    assert not runner.is_alive()
+    assert raised and pipeline.stats['total']['items'] == 5
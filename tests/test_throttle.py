@@ -0,0 +1,42 @@
+import threading
+import time
+
+import pytest
+
+from Ares.utils.throttle import HostRateLimiter, TokenBucket
+
+
+def test_token_bucket_limits_rate_after_burst():
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.perf_counter()
+    for _ in range(6):
+        bucket.acquire()
+    elapsed = time.perf_counter() - start
+
+    # 前 2 個為突發，其餘 4 個每個需等待 1/20 秒
+    assert 0.15 <= elapsed < 0.5
+    assert bucket.acquire(timeout=0) is False
+
+
+def test_token_bucket_rejects_requests_larger_than_capacity():
+    bucket = TokenBucket(rate=10.0, capacity=2)
+
+    with pytest.raises(ValueError):
+        bucket.acquire(3)
+    assert bucket.acquire(2)
+    assert TokenBucket(rate=0).acquire(100)
+
+
+def test_host_rate_limiter_keeps_hosts_independent():
+    limiter = HostRateLimiter(default_rate=1, per_host={"fast.example.com": 1000})
+    limiter.acquire("https://slow.example.com/a")
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=limiter.acquire, args=("https://fast.example.com/x",)) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.perf_counter() - start < 0.5
+    assert limiter.acquire("https://slow.example.com/b", timeout=0.01) is False
@@ -0,0 +1,86 @@
+import logging
+import time
+
+from Ares.spider.actions import nuclear_scroll, safe_type
+from Ares.spider.waits import AdaptiveTimeout, WaitStrategy
+
+logger = logging.getLogger("test_waits")
+
+
+class FakeDriver:
+    """依經過時間回傳 readyState 與資源數的假瀏覽器"""
+
+    def __init__(self, ready_after=0.0, resources_settle_after=0.0, heights=(1000,)):
+        self.start = time.monotonic()
+        self.ready_after = ready_after
+        self.resources_settle_after = resources_settle_after
+        self.heights = list(heights)
+        self.scrolls = 0
+
+    def execute_script(self, script, *args):
+        elapsed = time.monotonic() - self.start
+        if "readyState" in script:
+            return "complete" if elapsed >= self.ready_after else "loading"
+        if "getEntriesByType" in script:
+            return 20 if elapsed >= self.resources_settle_after else int(elapsed * 1000)
+        if "scrollHeight" in script and script.strip().startswith("return"):
+            return self.heights[min(self.scrolls, len(self.heights) - 1)]
+        self.scrolls += 1
+
+
+class FakeInput:
+    def __init__(self):
+        self.keys = []
+
+    def clear(self):
+        self.keys = []
+
+    def send_keys(self, keys):
+        self.keys.append(keys)
+
+
+def test_waits_return_as_soon_as_page_is_ready():
+    waits = WaitStrategy(profile="fast", poll_frequency=0.01, logger=logger)
+    driver = FakeDriver(ready_after=0.05, resources_settle_after=0.1)
+
+    start = time.perf_counter()
+    waits.dom_ready(driver)
+    waits.network_idle(driver, idle_time=0.1)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.6  # 原本固定 sleep(2) + sleep(2)
+    assert waits.stats['dom_ready']['count'] == 1
+    assert waits.stats['network_idle']['timeouts'] == 0
+    assert waits.total_seconds() > 0
+
+
+def test_adaptive_timeout_tightens_with_fast_pages():
+    timeout = AdaptiveTimeout(min_timeout=0.5, max_timeout=30)
+    assert timeout.timeout == 30
+    for _ in range(20):
+        timeout.observe(0.2)
+    assert timeout.timeout < 1.0
+
+
+def test_fast_profile_types_whole_text_and_human_types_per_char(monkeypatch):
+    element = FakeInput()
+    driver = type("Driver", (), {"find_element": lambda self, by, value: element})()
+
+    safe_type(driver, "id", "term", "crispr", waits=WaitStrategy(profile="fast", logger=logger))
+    assert element.keys == ["crispr"]
+
+    monkeypatch.setattr("Ares.spider.waits.time.sleep", lambda s: None)
+    safe_type(driver, "id", "term", "crispr", waits=WaitStrategy(profile="human", logger=logger))
+    assert element.keys == list("crispr")
+
+
+def test_nuclear_scroll_stops_waiting_once_height_settles():
+    waits = WaitStrategy(profile="fast", poll_frequency=0.01, logger=logger)
+    driver = FakeDriver(heights=(1000, 2000, 2000))
+
+    start = time.perf_counter()
+    nuclear_scroll(driver, times=3, wait=1.5, waits=waits)
+
+    assert time.perf_counter() - start < 2.0  # 原本固定 3 × 1.5 秒
+    assert driver.scrolls == 3
+    assert waits.stats['scroll_load']['count'] == 3